@@ -0,0 +1,209 @@
+"""Remove unreferenced parts from a PPTX package.
+
+Removes:
+- Orphaned slides (not in sldIdLst) and their relationships
+- [trash] directory (unreferenced files)
+- Orphaned .rels files for deleted resources
+- Unreferenced media, embeddings, charts, diagrams, drawings, ink files
+- Unreferenced theme files
+- Unreferenced notes slides
+- Content-Type overrides for deleted files
+"""
+
+import posixpath
+import re
+
+
+def get_slides_in_sldidlst(package) -> set[str]:
+    pres_part = "ppt/presentation.xml"
+    pres_rels_part = "ppt/_rels/presentation.xml.rels"
+
+    if not package.has_part(pres_part) or not package.has_part(pres_rels_part):
+        return set()
+
+    rels_dom = package.dom(pres_rels_part)
+    rid_to_slide = {}
+    for rel in rels_dom.getElementsByTagName("Relationship"):
+        rid = rel.getAttribute("Id")
+        target = rel.getAttribute("Target")
+        rel_type = rel.getAttribute("Type")
+        if "slide" in rel_type and target.startswith("slides/"):
+            rid_to_slide[rid] = target.replace("slides/", "")
+
+    pres_content = package.read_text(pres_part)
+    referenced_rids = set(re.findall(r'<p:sldId[^>]*r:id="([^"]+)"', pres_content))
+
+    return {rid_to_slide[rid] for rid in referenced_rids if rid in rid_to_slide}
+
+
+def remove_orphaned_slides(package) -> list[str]:
+    pres_rels_part = "ppt/_rels/presentation.xml.rels"
+
+    slide_parts = package.glob("ppt/slides/slide*.xml")
+    if not slide_parts:
+        return []
+
+    referenced_slides = get_slides_in_sldidlst(package)
+    removed = []
+
+    for slide_part in slide_parts:
+        slide_name = _basename(slide_part)
+        if slide_name not in referenced_slides:
+            package.remove_part(slide_part)
+            removed.append(slide_part)
+
+            rels_part = f"ppt/slides/_rels/{slide_name}.rels"
+            if package.has_part(rels_part):
+                package.remove_part(rels_part)
+                removed.append(rels_part)
+
+    if removed and package.has_part(pres_rels_part):
+        rels_dom = package.dom(pres_rels_part)
+        changed = False
+
+        for rel in list(rels_dom.getElementsByTagName("Relationship")):
+            target = rel.getAttribute("Target")
+            if target.startswith("slides/"):
+                slide_name = target.replace("slides/", "")
+                if slide_name not in referenced_slides:
+                    if rel.parentNode:
+                        rel.parentNode.removeChild(rel)
+                        changed = True
+
+        if changed:
+            package.mark_changed(pres_rels_part)
+
+    return removed
+
+
+def remove_trash_directory(package) -> list[str]:
+    removed = package.glob("[trash]/*")
+    for part in removed:
+        package.remove_part(part)
+    return removed
+
+
+def get_slide_referenced_files(package) -> set:
+    referenced = set()
+    for rels_part in package.glob("ppt/slides/_rels/*.rels"):
+        referenced |= _rels_targets(package, rels_part)
+    return referenced
+
+
+def remove_orphaned_rels_files(package) -> list[str]:
+    resource_dirs = ["charts", "diagrams", "drawings"]
+    removed = []
+    slide_referenced = get_slide_referenced_files(package)
+
+    for dir_name in resource_dirs:
+        for rels_part in package.glob(f"ppt/{dir_name}/_rels/*.rels"):
+            resource_part = f"ppt/{dir_name}/" + _basename(rels_part).replace(".rels", "")
+            if not package.has_part(resource_part) or resource_part not in slide_referenced:
+                package.remove_part(rels_part)
+                removed.append(rels_part)
+
+    return removed
+
+
+def get_referenced_files(package) -> set:
+    referenced = set()
+    for rels_part in package.rglob("*.rels"):
+        referenced |= _rels_targets(package, rels_part)
+    return referenced
+
+
+def remove_orphaned_files(package, referenced: set) -> list[str]:
+    resource_dirs = ["media", "embeddings", "charts", "diagrams", "tags", "drawings", "ink"]
+    removed = []
+
+    for dir_name in resource_dirs:
+        for part in package.glob(f"ppt/{dir_name}/*"):
+            if part not in referenced:
+                package.remove_part(part)
+                removed.append(part)
+
+    for part in package.glob("ppt/theme/theme*.xml"):
+        if part not in referenced:
+            package.remove_part(part)
+            removed.append(part)
+            theme_rels = f"ppt/theme/_rels/{_basename(part)}.rels"
+            if package.has_part(theme_rels):
+                package.remove_part(theme_rels)
+                removed.append(theme_rels)
+
+    for part in package.glob("ppt/notesSlides/*.xml"):
+        if part not in referenced:
+            package.remove_part(part)
+            removed.append(part)
+
+    for part in package.glob("ppt/notesSlides/_rels/*.rels"):
+        notes_part = "ppt/notesSlides/" + _basename(part).replace(".rels", "")
+        if not package.has_part(notes_part):
+            package.remove_part(part)
+            removed.append(part)
+
+    return removed
+
+
+def update_content_types(package, removed_files: list[str]) -> None:
+    ct_part = "[Content_Types].xml"
+    if not package.has_part(ct_part):
+        return
+
+    dom = package.dom(ct_part)
+    changed = False
+
+    for override in list(dom.getElementsByTagName("Override")):
+        part_name = override.getAttribute("PartName").lstrip("/")
+        if part_name in removed_files:
+            if override.parentNode:
+                override.parentNode.removeChild(override)
+                changed = True
+
+    if changed:
+        package.mark_changed(ct_part)
+
+
+def clean_unused_files(package) -> list[str]:
+    all_removed = []
+
+    slides_removed = remove_orphaned_slides(package)
+    all_removed.extend(slides_removed)
+
+    trash_removed = remove_trash_directory(package)
+    all_removed.extend(trash_removed)
+
+    while True:
+        removed_rels = remove_orphaned_rels_files(package)
+        referenced = get_referenced_files(package)
+        removed_files = remove_orphaned_files(package, referenced)
+
+        total_removed = removed_rels + removed_files
+        if not total_removed:
+            break
+
+        all_removed.extend(total_removed)
+
+    if all_removed:
+        update_content_types(package, all_removed)
+
+    return all_removed
+
+
+def _rels_targets(package, rels_part: str) -> set[str]:
+    # Targets are relative to the folder holding the _rels folder; absolute
+    # targets and targets outside the package are left out.
+    base = posixpath.dirname(posixpath.dirname(rels_part))
+    targets = set()
+    for rel in package.dom(rels_part).getElementsByTagName("Relationship"):
+        target = rel.getAttribute("Target")
+        if not target or target.startswith("/"):
+            continue
+        part = posixpath.normpath(posixpath.join(base, target))
+        if part != ".." and not part.startswith("../"):
+            targets.add(part)
+    return targets
+
+
+def _basename(part: str) -> str:
+    return part.rpartition("/")[2]
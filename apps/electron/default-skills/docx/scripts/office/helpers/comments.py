@@ -0,0 +1,259 @@
+"""Add comments and replies to the parts of a DOCX package.
+
+Creates comments.xml, commentsExtended.xml, commentsIds.xml and
+commentsExtensible.xml from the files in templates/ on first use, together
+with their relationships and content types.
+"""
+
+import random
+from datetime import datetime, timezone
+from pathlib import Path
+
+import defusedxml.minidom
+
+TEMPLATE_DIR = Path(__file__).resolve().parent.parent / "templates"
+NS = {
+    "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main",
+    "w14": "http://schemas.microsoft.com/office/word/2010/wordml",
+    "w15": "http://schemas.microsoft.com/office/word/2012/wordml",
+    "w16cid": "http://schemas.microsoft.com/office/word/2016/wordml/cid",
+    "w16cex": "http://schemas.microsoft.com/office/word/2018/wordml/cex",
+}
+
+COMMENT_XML = """\
+<w:comment w:id="{id}" w:author="{author}" w:date="{date}" w:initials="{initials}">
+  <w:p w14:paraId="{para_id}" w14:textId="77777777">
+    <w:r>
+      <w:rPr><w:rStyle w:val="CommentReference"/></w:rPr>
+      <w:annotationRef/>
+    </w:r>
+    <w:r>
+      <w:rPr>
+        <w:color w:val="000000"/>
+        <w:sz w:val="20"/>
+        <w:szCs w:val="20"/>
+      </w:rPr>
+      <w:t>{text}</w:t>
+    </w:r>
+  </w:p>
+</w:comment>"""
+
+COMMENTS_PART = "word/comments.xml"
+COMMENTS_EXTENDED_PART = "word/commentsExtended.xml"
+COMMENTS_IDS_PART = "word/commentsIds.xml"
+COMMENTS_EXTENSIBLE_PART = "word/commentsExtensible.xml"
+DOCUMENT_RELS_PART = "word/_rels/document.xml.rels"
+CONTENT_TYPES_PART = "[Content_Types].xml"
+
+
+def _generate_hex_id() -> str:
+    return f"{random.randint(0, 0x7FFFFFFE):08X}"
+
+
+def _copy_template(package, part_name: str) -> None:
+    template = TEMPLATE_DIR / part_name.rpartition("/")[2]
+    package.write_bytes(part_name, template.read_bytes())
+
+
+def _append_xml(package, part_name: str, root_tag: str, content: str) -> None:
+    dom = package.dom(part_name)
+    root = dom.getElementsByTagName(root_tag)[0]
+    ns_attrs = " ".join(f'xmlns:{k}="{v}"' for k, v in NS.items())
+    wrapper_dom = defusedxml.minidom.parseString(f"<root {ns_attrs}>{content}</root>")
+    for child in wrapper_dom.documentElement.childNodes:
+        if child.nodeType == child.ELEMENT_NODE:
+            root.appendChild(dom.importNode(child, True))
+    package.mark_changed(part_name)
+
+
+def _find_para_id(package, comment_id: int) -> str | None:
+    dom = package.dom(COMMENTS_PART)
+    for c in dom.getElementsByTagName("w:comment"):
+        if c.getAttribute("w:id") == str(comment_id):
+            for p in c.getElementsByTagName("w:p"):
+                if pid := p.getAttribute("w14:paraId"):
+                    return pid
+    return None
+
+
+def _get_next_rid(dom) -> int:
+    max_rid = 0
+    for rel in dom.getElementsByTagName("Relationship"):
+        rid = rel.getAttribute("Id")
+        if rid and rid.startswith("rId"):
+            try:
+                max_rid = max(max_rid, int(rid[3:]))
+            except ValueError:
+                pass
+    return max_rid + 1
+
+
+def _has_relationship(dom, target: str) -> bool:
+    for rel in dom.getElementsByTagName("Relationship"):
+        if rel.getAttribute("Target") == target:
+            return True
+    return False
+
+
+def _has_content_type(dom, part_name: str) -> bool:
+    for override in dom.getElementsByTagName("Override"):
+        if override.getAttribute("PartName") == part_name:
+            return True
+    return False
+
+
+def _ensure_comment_relationships(package) -> None:
+    if not package.has_part(DOCUMENT_RELS_PART):
+        return
+
+    dom = package.dom(DOCUMENT_RELS_PART)
+    if _has_relationship(dom, "comments.xml"):
+        return
+
+    root = dom.documentElement
+    next_rid = _get_next_rid(dom)
+
+    rels = [
+        (
+            "http://schemas.openxmlformats.org/officeDocument/2006/relationships/comments",
+            "comments.xml",
+        ),
+        (
+            "http://schemas.microsoft.com/office/2011/relationships/commentsExtended",
+            "commentsExtended.xml",
+        ),
+        (
+            "http://schemas.microsoft.com/office/2016/09/relationships/commentsIds",
+            "commentsIds.xml",
+        ),
+        (
+            "http://schemas.microsoft.com/office/2018/08/relationships/commentsExtensible",
+            "commentsExtensible.xml",
+        ),
+    ]
+
+    for rel_type, target in rels:
+        rel = dom.createElement("Relationship")
+        rel.setAttribute("Id", f"rId{next_rid}")
+        rel.setAttribute("Type", rel_type)
+        rel.setAttribute("Target", target)
+        root.appendChild(rel)
+        next_rid += 1
+
+    package.mark_changed(DOCUMENT_RELS_PART)
+
+
+def _ensure_comment_content_types(package) -> None:
+    if not package.has_part(CONTENT_TYPES_PART):
+        return
+
+    dom = package.dom(CONTENT_TYPES_PART)
+    if _has_content_type(dom, "/word/comments.xml"):
+        return
+
+    root = dom.documentElement
+
+    overrides = [
+        (
+            "/word/comments.xml",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.comments+xml",
+        ),
+        (
+            "/word/commentsExtended.xml",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.commentsExtended+xml",
+        ),
+        (
+            "/word/commentsIds.xml",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.commentsIds+xml",
+        ),
+        (
+            "/word/commentsExtensible.xml",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.commentsExtensible+xml",
+        ),
+    ]
+
+    for part_name, content_type in overrides:
+        override = dom.createElement("Override")
+        override.setAttribute("PartName", part_name)
+        override.setAttribute("ContentType", content_type)
+        root.appendChild(override)
+
+    package.mark_changed(CONTENT_TYPES_PART)
+
+
+def add_comment(
+    package,
+    comment_id: int,
+    text: str,
+    author: str = "Claude",
+    initials: str = "C",
+    parent_id: int | None = None,
+) -> tuple[str, str]:
+    if not package.glob("word/*"):
+        return "", f"Error: {package.path / 'word'} not found"
+
+    parent_para = None
+    if parent_id is not None:
+        if package.has_part(COMMENTS_PART):
+            parent_para = _find_para_id(package, parent_id)
+        if not parent_para:
+            return "", f"Error: Parent comment {parent_id} not found"
+
+    para_id, durable_id = _generate_hex_id(), _generate_hex_id()
+    ts = datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+    if not package.has_part(COMMENTS_PART):
+        _copy_template(package, COMMENTS_PART)
+        _ensure_comment_relationships(package)
+        _ensure_comment_content_types(package)
+    _append_xml(
+        package,
+        COMMENTS_PART,
+        "w:comments",
+        COMMENT_XML.format(
+            id=comment_id,
+            author=author,
+            date=ts,
+            initials=initials,
+            para_id=para_id,
+            text=text,
+        ),
+    )
+
+    if not package.has_part(COMMENTS_EXTENDED_PART):
+        _copy_template(package, COMMENTS_EXTENDED_PART)
+    if parent_para:
+        _append_xml(
+            package,
+            COMMENTS_EXTENDED_PART,
+            "w15:commentsEx",
+            f'<w15:commentEx w15:paraId="{para_id}" w15:paraIdParent="{parent_para}" w15:done="0"/>',
+        )
+    else:
+        _append_xml(
+            package,
+            COMMENTS_EXTENDED_PART,
+            "w15:commentsEx",
+            f'<w15:commentEx w15:paraId="{para_id}" w15:done="0"/>',
+        )
+
+    if not package.has_part(COMMENTS_IDS_PART):
+        _copy_template(package, COMMENTS_IDS_PART)
+    _append_xml(
+        package,
+        COMMENTS_IDS_PART,
+        "w16cid:commentsIds",
+        f'<w16cid:commentId w16cid:paraId="{para_id}" w16cid:durableId="{durable_id}"/>',
+    )
+
+    if not package.has_part(COMMENTS_EXTENSIBLE_PART):
+        _copy_template(package, COMMENTS_EXTENSIBLE_PART)
+    _append_xml(
+        package,
+        COMMENTS_EXTENSIBLE_PART,
+        "w16cex:commentsExtensible",
+        f'<w16cex:commentExtensible w16cex:durableId="{durable_id}" w16cex:dateUtc="{ts}"/>',
+    )
+
+    action = "reply" if parent_id is not None else "comment"
+    return para_id, f"Added {action} {comment_id} (para_id={para_id})"
@@ -0,0 +1,26 @@
+"""Ordered per-part work spread over a process pool, for pack and unpack."""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+
+def map_parts(func, arguments, jobs: int = 1):
+    """Yields func(*args) for each tuple in arguments, in order.
+
+    The calls run in jobs worker processes (0 = one per CPU), or in this
+    process when there is one job or at most one part. func and its
+    arguments must be picklable.
+    """
+    arguments = list(arguments)
+    workers = min(jobs or os.cpu_count() or 1, len(arguments))
+    if workers <= 1:
+        for args in arguments:
+            yield func(*args)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(
+            func,
+            *zip(*arguments),
+            chunksize=max(1, len(arguments) // (workers * 4)),
+        )
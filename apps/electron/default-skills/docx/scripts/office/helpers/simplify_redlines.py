@@ -27,15 +27,7 @@ def simplify_redlines(input_dir: str) -> tuple[int, str]:
 
     try:
         dom = defusedxml.minidom.parseString(doc_xml.read_text(encoding="utf-8"))
-        root = dom.documentElement
-
-        merge_count = 0
-
-        containers = _find_elements(root, "p") + _find_elements(root, "tc")
-
-        for container in containers:
-            merge_count += _merge_tracked_changes_in(container, "ins")
-            merge_count += _merge_tracked_changes_in(container, "del")
+        merge_count = simplify_document_redlines(dom)
 
         doc_xml.write_bytes(dom.toxml(encoding="UTF-8"))
         return merge_count, f"Simplified {merge_count} tracked changes"
@@ -44,6 +36,21 @@ def simplify_redlines(input_dir: str) -> tuple[int, str]:
         return 0, f"Error: {e}"
 
 
+def simplify_document_redlines(dom) -> int:
+    """Merges tracked changes in a parsed document.xml in place; returns the
+    merge count."""
+    root = dom.documentElement
+
+    merge_count = 0
+
+    containers = _find_elements(root, "p") + _find_elements(root, "tc")
+
+    for container in containers:
+        merge_count += _merge_tracked_changes_in(container, "ins")
+        merge_count += _merge_tracked_changes_in(container, "del")
+    return merge_count
+
+
 def _merge_tracked_changes_in(container, tag: str) -> int:
     merge_count = 0
 
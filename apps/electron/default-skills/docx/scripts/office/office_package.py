@@ -0,0 +1,429 @@
+"""In-memory Office package for chaining unpack, edit, validate and pack steps.
+
+    from office_package import OfficePackage
+
+    with OfficePackage.open("document.docx") as package:
+        package.add_comment(0, "Please check this figure")
+        success, output = package.validate("document.docx")
+        if success:
+            package.pack("reviewed.docx")
+
+An OfficePackage reads parts from a .docx/.pptx/.xlsx file or an unpacked
+directory on first use and keeps the parts it changes, with their parsed DOM,
+in memory. A chain of operations therefore parses each part once and writes
+nothing to disk until save() or pack(). pack() copies the parts of a packed
+source that were never changed as their stored compressed bytes.
+
+comment.py, add_slide.py and clean.py open an unpacked directory, run one
+operation and save() the parts it changed; pack.py validates and packs a
+directory through the same object.
+"""
+
+import io
+import shutil
+from fnmatch import fnmatchcase
+from pathlib import Path, PurePosixPath
+
+import defusedxml.minidom
+
+from helpers import clean, comments, slides
+from helpers.merge_runs import merge_document_runs
+from helpers.simplify_redlines import simplify_document_redlines
+from validators import (
+    BaseSchemaValidator,
+    DOCXSchemaValidator,
+    PPTXSchemaValidator,
+    RedliningValidator,
+    XLSXSchemaValidator,
+)
+from validators.package import ZipSource, open_package_source
+from validators.report import report_phase
+
+OFFICE_SUFFIXES = {".docx", ".pptx", ".xlsx"}
+
+# Main part of each format, for telling an unpacked directory's type.
+MAIN_PARTS = {
+    ".docx": "word/document.xml",
+    ".pptx": "ppt/presentation.xml",
+    ".xlsx": "xl/workbook.xml",
+}
+
+SMART_QUOTE_REPLACEMENTS = {
+    "\u201c": "&#x201C;",
+    "\u201d": "&#x201D;",
+    "\u2018": "&#x2018;",
+    "\u2019": "&#x2019;",
+}
+
+
+class OfficePackage:
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.source = open_package_source(self.path)
+        self._source_names = None
+        self._data = {}
+        self._added = {}
+        self._removed = set()
+        self._doms = {}
+        self._dirty = set()
+
+    @classmethod
+    def open(cls, path, merge_runs=True, simplify_redlines=True):
+        """Opens a packed Office file or an unpacked directory.
+
+        Runs and tracked changes in the word/document.xml of a packed .docx are
+        merged the way unpack.py merges them; an unpacked directory is taken
+        as it is.
+        """
+        package = cls(path)
+        document = MAIN_PARTS[".docx"]
+        if (
+            package.is_packed
+            and package.suffix == ".docx"
+            and (merge_runs or simplify_redlines)
+            and package.has_part(document)
+        ):
+            try:
+                dom = package.dom(document)
+                changed = simplify_document_redlines(dom) if simplify_redlines else 0
+                changed += merge_document_runs(dom) if merge_runs else 0
+                if changed:
+                    package.mark_changed(document)
+            except Exception:
+                package._doms.pop(document, None)
+        return package
+
+    @property
+    def is_packed(self):
+        return isinstance(self.source, ZipSource)
+
+    @property
+    def suffix(self):
+        """The package's format (".docx", ".pptx" or ".xlsx"), or None."""
+        if self.is_packed:
+            suffix = self.path.suffix.lower()
+            return suffix if suffix in OFFICE_SUFFIXES else None
+        for suffix, main_part in MAIN_PARTS.items():
+            if self.has_part(main_part):
+                return suffix
+        return None
+
+    @property
+    def has_changes(self):
+        return bool(self._data or self._removed or self._dirty)
+
+    def part_names(self):
+        names = [name for name in self._names() if name not in self._removed]
+        return names + list(self._added)
+
+    def glob(self, pattern):
+        """Part names in one folder, e.g. glob("ppt/slides/slide*.xml")."""
+        parent, _, name_pattern = pattern.rpartition("/")
+        return [
+            name
+            for name in self.part_names()
+            if name.rpartition("/")[0] == parent
+            and fnmatchcase(name.rpartition("/")[2], name_pattern)
+        ]
+
+    def rglob(self, pattern):
+        """Part names in any folder whose file name matches pattern."""
+        return [
+            name
+            for name in self.part_names()
+            if fnmatchcase(name.rpartition("/")[2], pattern)
+        ]
+
+    def has_part(self, name):
+        name = _part_key(name)
+        if name in self._data:
+            return True
+        return name not in self._removed and self.source.is_file(name)
+
+    def read_bytes(self, name):
+        name = _part_key(name)
+        if name in self._dirty:
+            self._flush(name)
+        if name in self._data:
+            return self._data[name]
+        if not self.has_part(name):
+            raise KeyError(f"No part {name} in {self.path}")
+        return self.source.read_bytes(name)
+
+    def read_text(self, name):
+        return self.read_bytes(name).decode("utf-8")
+
+    def write_bytes(self, name, data):
+        name = _part_key(name)
+        self._data[name] = data
+        self._doms.pop(name, None)
+        self._dirty.discard(name)
+        self._removed.discard(name)
+        if name not in self._names():
+            self._added[name] = None
+
+    def write_text(self, name, text):
+        self.write_bytes(name, text.encode("utf-8"))
+
+    def remove_part(self, name):
+        name = _part_key(name)
+        self._data.pop(name, None)
+        self._doms.pop(name, None)
+        self._dirty.discard(name)
+        self._added.pop(name, None)
+        if name in self._names():
+            self._removed.add(name)
+
+    def dom(self, name):
+        """The part parsed with minidom, parsed once and shared by every
+        operation. Call mark_changed() after modifying it."""
+        name = _part_key(name)
+        if name not in self._doms:
+            self._doms[name] = defusedxml.minidom.parseString(self.read_bytes(name))
+        return self._doms[name]
+
+    def mark_changed(self, name):
+        name = _part_key(name)
+        if name not in self._doms:
+            raise KeyError(f"Part {name} has not been parsed")
+        self._dirty.add(name)
+
+    def add_comment(
+        self, comment_id, text, author="Claude", initials="C", parent_id=None
+    ):
+        return comments.add_comment(
+            self, comment_id, text, author, initials, parent_id
+        )
+
+    def add_slide(self, source):
+        return slides.add_slide(self, source)
+
+    def clean_unused_files(self):
+        return clean.clean_unused_files(self)
+
+    def validate(
+        self,
+        original_file=None,
+        author="Claude",
+        auto_repair=True,
+        jobs=1,
+        incremental=False,
+        report=None,
+    ):
+        """Validates the parts as they are in memory; auto-repairs are applied
+        to the package. Returns (success, output), where output holds the
+        summary lines to print, or None."""
+        source = _PackageSource(self)
+        suffix = self.suffix
+        validator_class = {
+            ".docx": DOCXSchemaValidator,
+            ".pptx": PPTXSchemaValidator,
+            ".xlsx": XLSXSchemaValidator,
+        }.get(suffix)
+        if validator_class is None:
+            return True, None
+
+        output_lines = []
+        with report_phase(report, "setup"):
+            validators = [
+                validator_class(
+                    source,
+                    original_file,
+                    jobs=jobs,
+                    incremental=incremental,
+                    report=report,
+                )
+            ]
+            if suffix == ".docx" and original_file:
+                validators.append(
+                    RedliningValidator(
+                        source, original_file, author=author, report=report
+                    )
+                )
+
+        if auto_repair:
+            with report_phase(report, "repair"):
+                total_repairs = sum(v.repair() for v in validators)
+            if total_repairs:
+                output_lines.append(f"Auto-repaired {total_repairs} issue(s)")
+
+        with report_phase(report, "validate"):
+            success = all(v.validate() for v in validators)
+
+        for v in validators:
+            if isinstance(v, BaseSchemaValidator):
+                v.save_manifest()
+
+        if success:
+            output_lines.append("All validations PASSED!")
+
+        return success, "\n".join(output_lines) if output_lines else None
+
+    def pack(
+        self,
+        output_file,
+        original_file=None,
+        jobs=1,
+        report=None,
+        reuse_original=True,
+        compress_level=None,
+    ):
+        """Writes the package to output_file. Returns (None, message).
+
+        Parts of a packed source that were never changed are copied as they
+        are stored in it. Otherwise, with reuse_original, parts that match a
+        member of original_file are copied from there. Other parts are
+        compressed as pack.write_package() does, at compress_level.
+        """
+        from pack import write_package
+
+        if Path(output_file).suffix.lower() not in OFFICE_SUFFIXES:
+            return None, f"Error: {output_file} must be a .docx, .pptx, or .xlsx file"
+
+        parts = []
+        for name in self.part_names():
+            if name in self._data or name in self._dirty:
+                content = self.read_bytes(name)
+            elif self.is_packed:
+                content = None
+            else:
+                content = self.source.path / name
+            parts.append((name, content))
+
+        if self.is_packed:
+            reuse_file = self.source.path
+        else:
+            reuse_file = original_file if reuse_original else None
+        reused = write_package(
+            output_file, parts, reuse_file, jobs, report, compress_level
+        )
+
+        message = f"Successfully packed {self.path} to {output_file}"
+        if reused:
+            message += f" ({reused} unchanged part(s) copied from the original)"
+        return None, message
+
+    def save(self, directory=None):
+        """Writes the package out as an unpacked directory.
+
+        Without directory, writes the changes made since opening back into the
+        directory the package was opened from. Otherwise writes every part
+        into directory.
+        """
+        if directory is None:
+            if self.is_packed:
+                raise ValueError(f"{self.path} is a packed file, not a directory")
+            self._save_changes()
+            return
+
+        directory = Path(directory)
+        for name in self.part_names():
+            target = directory / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            if name in self._data or name in self._dirty:
+                target.write_bytes(self.read_bytes(name))
+            else:
+                with self.source.open(name) as f, open(target, "wb") as dest:
+                    shutil.copyfileobj(f, dest)
+
+    def close(self):
+        self.source.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _save_changes(self):
+        root = self.source.path
+        for name in list(self._dirty):
+            self._flush(name)
+        for name, data in self._data.items():
+            target = root / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_bytes(data)
+
+        # Folders emptied by the removals (e.g. [trash]) go too.
+        emptied = set()
+        for name in self._removed:
+            (root / name).unlink(missing_ok=True)
+            emptied.add((root / name).parent)
+        for folder in sorted(emptied, key=lambda f: len(f.parts), reverse=True):
+            if folder != root and not any(folder.iterdir()):
+                folder.rmdir()
+
+        self._data.clear()
+        self._added.clear()
+        self._removed.clear()
+        self._source_names = None
+
+    def _names(self):
+        if self._source_names is None:
+            self._source_names = {
+                name.as_posix(): None for name in self.source.rglob("*")
+            }
+        return self._source_names
+
+    def _flush(self, name):
+        text = self._doms[name].toxml(encoding="UTF-8").decode("utf-8")
+        for char, entity in SMART_QUOTE_REPLACEMENTS.items():
+            text = text.replace(char, entity)
+        self._data[name] = text.encode("utf-8")
+        self._dirty.discard(name)
+
+
+class _PackageSource:
+    """A package source (see validators/package.py) over the parts of an
+    OfficePackage as they are in memory. Repairs are written to the package."""
+
+    def __init__(self, package):
+        self.package = package
+        self.path = package.source.path
+
+    def rglob(self, pattern):
+        return [PurePosixPath(name) for name in self.package.rglob(pattern)]
+
+    def glob(self, pattern):
+        return [PurePosixPath(name) for name in self.package.glob(pattern)]
+
+    def is_file(self, part_name):
+        return self.package.has_part(part_name)
+
+    def size(self, part_name):
+        if self._in_memory(part_name):
+            return len(self.package.read_bytes(part_name))
+        return self.package.source.size(_part_key(part_name))
+
+    def open(self, part_name):
+        if self._in_memory(part_name):
+            return io.BytesIO(self.package.read_bytes(part_name))
+        if not self.package.has_part(part_name):
+            raise FileNotFoundError(f"No part {part_name} in {self.path}")
+        return self.package.source.open(_part_key(part_name))
+
+    def read_bytes(self, part_name):
+        return self.package.read_bytes(part_name)
+
+    def write_bytes(self, part_name, data):
+        self.package.write_bytes(part_name, data)
+
+    @property
+    def has_pending_writes(self):
+        return self.package.has_changes
+
+    def close(self):
+        pass
+
+    def _in_memory(self, part_name):
+        name = _part_key(part_name)
+        return name in self.package._data or name in self.package._dirty
+
+
+def _part_key(name):
+    return PurePosixPath(name).as_posix()
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
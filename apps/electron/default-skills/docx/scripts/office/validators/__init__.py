@@ -3,13 +3,19 @@ Validation modules for Word document processing.
 """
 
 from .base import BaseSchemaValidator
+from .checks import CheckSelection
 from .docx import DOCXSchemaValidator
 from .pptx import PPTXSchemaValidator
 from .redlining import RedliningValidator
+from .report import ValidationReport
+from .xlsx import XLSXSchemaValidator
 
 __all__ = [
     "BaseSchemaValidator",
+    "CheckSelection",
     "DOCXSchemaValidator",
     "PPTXSchemaValidator",
     "RedliningValidator",
+    "ValidationReport",
+    "XLSXSchemaValidator",
 ]
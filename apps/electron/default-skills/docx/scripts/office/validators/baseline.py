@@ -0,0 +1,165 @@
+"""
+Per-part XSD error sets of the original Office file, cached on disk.
+"""
+
+import functools
+import hashlib
+import json
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+CACHE_VERSION = 2
+
+
+def default_cache_dir():
+    if override := os.environ.get("OFFICE_VALIDATOR_CACHE_DIR"):
+        return Path(override)
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "office-validators"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@functools.cache
+def code_fingerprint():
+    """SHA-256 of the validators' source code."""
+    digest = hashlib.sha256()
+    for module in sorted(Path(__file__).parent.glob("*.py")):
+        digest.update(module.name.encode())
+        digest.update(module.read_bytes())
+    return digest.hexdigest()
+
+
+@functools.cache
+def schemas_fingerprint(schemas_dir):
+    """SHA-256 of the names and contents of the XSDs under schemas_dir."""
+    digest = hashlib.sha256()
+    schemas_dir = Path(schemas_dir)
+    for path in sorted(schemas_dir.rglob("*.xsd")):
+        digest.update(f"{path.relative_to(schemas_dir).as_posix()}\0".encode())
+        digest.update(file_sha256(path).encode())
+    return digest.hexdigest()
+
+
+class BaselineErrorCache:
+    """XSD errors of each part of the original file, computed at most once.
+
+    Parts are read straight from the original zip on first use. Results are
+    persisted under the SHA-256 of the original file, the validator code and
+    the caller's identity (e.g. the schemas' fingerprint), so later runs
+    against the same source do not validate it again, and a change to the
+    checks or schemas starts a new cache file.
+    """
+
+    def __init__(self, original_file, compute_errors, cache_dir=None, identity=()):
+        self.original_file = Path(original_file)
+        self.compute_errors = compute_errors
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.identity = list(identity)
+        self.hits = 0
+        self.misses = 0
+        self._cache_file = None
+        self._parts = None
+        self._dirty = False
+        self._new_entries = {}
+        self._zip = None
+        self._digest = None
+
+    def digest(self):
+        if self._digest is None:
+            self._digest = file_sha256(self.original_file)
+        return self._digest
+
+    def get(self, part_name):
+        parts = self._load()
+
+        if part_name in parts:
+            self.hits += 1
+            return set(parts[part_name])
+
+        self.misses += 1
+        errors = self._compute(part_name)
+        parts[part_name] = self._new_entries[part_name] = sorted(errors)
+        self._dirty = True
+        return errors
+
+    def take_new_entries(self):
+        entries, self._new_entries = self._new_entries, {}
+        return entries
+
+    def update(self, entries):
+        parts = self._load()
+        for part_name, errors in entries.items():
+            if part_name not in parts:
+                parts[part_name] = errors
+                self._dirty = True
+
+    def save(self):
+        if self._zip is not None:
+            self._zip.close()
+            self._zip = None
+
+        if not self._dirty or self._cache_file is None:
+            return
+
+        try:
+            self._cache_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(
+                dir=self._cache_file.parent, suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "parts": self._parts}, f)
+            os.replace(temp_name, self._cache_file)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def summary(self):
+        return f"Baseline cache: {self.hits} hit(s), {self.misses} miss(es)"
+
+    def _load(self):
+        if self._parts is not None:
+            return self._parts
+
+        self._parts = {}
+        try:
+            digest = self.digest()
+        except OSError:
+            return self._parts
+
+        key = hashlib.sha256(
+            "\0".join(
+                [str(CACHE_VERSION), digest, code_fingerprint(), *self.identity]
+            ).encode()
+        ).hexdigest()
+        self._cache_file = self.cache_dir / "baseline" / f"{key}.json"
+        try:
+            data = json.loads(self._cache_file.read_text(encoding="utf-8"))
+            if data.get("version") == CACHE_VERSION:
+                self._parts = data["parts"]
+        except (OSError, ValueError, KeyError):
+            pass
+
+        return self._parts
+
+    def _compute(self, part_name):
+        try:
+            if self._zip is None:
+                self._zip = zipfile.ZipFile(self.original_file, "r")
+            data = self._zip.read(part_name)
+        except (KeyError, OSError, zipfile.BadZipFile):
+            return set()
+
+        return self.compute_errors(part_name, data) or set()
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
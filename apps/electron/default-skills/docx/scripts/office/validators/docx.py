@@ -2,15 +2,22 @@
 Validator for Word document XML files against XSD schemas.
 """
 
-import random
-import re
-import tempfile
 import zipfile
 
-import defusedxml.minidom
 import lxml.etree
 
 from .base import BaseSchemaValidator
+from .manifest import incremental_check
+from .package import iterparse_clearing
+from .repairs import DurableIdRepair, WhitespacePreservationRepair
+from .report import check_error, print_errors, reported_check
+from .rules import (
+    DeletionRule,
+    IdConstraintRule,
+    InsertionRule,
+    UniqueIdRule,
+    WhitespacePreservationRule,
+)
 
 
 class DOCXSchemaValidator(BaseSchemaValidator):
@@ -21,6 +28,16 @@ class DOCXSchemaValidator(BaseSchemaValidator):
 
     ELEMENT_RELATIONSHIP_TYPES = {}
 
+    ELEMENT_RULES = (
+        UniqueIdRule,
+        WhitespacePreservationRule,
+        DeletionRule,
+        InsertionRule,
+        IdConstraintRule,
+    )
+
+    REPAIRS = (WhitespacePreservationRepair, DurableIdRepair)
+
     def validate(self):
         if not self.validate_xml():
             return False
@@ -63,97 +80,26 @@ class DOCXSchemaValidator(BaseSchemaValidator):
 
         return all_valid
 
+    @reported_check("whitespace_preservation")
     def validate_whitespace_preservation(self):
-        errors = []
-
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                for elem in root.iter(f"{{{self.WORD_2006_NAMESPACE}}}t"):
-                    if elem.text:
-                        text = elem.text
-                        if re.search(r"^[ \t\n\r]", text) or re.search(
-                            r"[ \t\n\r]$", text
-                        ):
-                            xml_space_attr = f"{{{self.XML_NAMESPACE}}}space"
-                            if (
-                                xml_space_attr not in elem.attrib
-                                or elem.attrib[xml_space_attr] != "preserve"
-                            ):
-                                text_preview = (
-                                    repr(text)[:50] + "..."
-                                    if len(repr(text)) > 50
-                                    else repr(text)
-                                )
-                                errors.append(
-                                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                    f"Line {elem.sourceline}: w:t element with whitespace missing xml:space='preserve': {text_preview}"
-                                )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors("whitespace_preservation")
 
         if errors:
             print(f"FAILED - Found {len(errors)} whitespace preservation violations:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
                 print("PASSED - All whitespace is properly preserved")
             return True
 
+    @reported_check("deletions")
     def validate_deletions(self):
-        errors = []
-
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-                for t_elem in root.xpath(".//w:del//w:t", namespaces=namespaces):
-                    if t_elem.text:
-                        text_preview = (
-                            repr(t_elem.text)[:50] + "..."
-                            if len(repr(t_elem.text)) > 50
-                            else repr(t_elem.text)
-                        )
-                        errors.append(
-                            f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                            f"Line {t_elem.sourceline}: <w:t> found within <w:del>: {text_preview}"
-                        )
-
-                for instr_elem in root.xpath(
-                    ".//w:del//w:instrText", namespaces=namespaces
-                ):
-                    text_preview = (
-                        repr(instr_elem.text or "")[:50] + "..."
-                        if len(repr(instr_elem.text or "")) > 50
-                        else repr(instr_elem.text or "")
-                    )
-                    errors.append(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Line {instr_elem.sourceline}: <w:instrText> found within <w:del> (use <w:delInstrText>): {text_preview}"
-                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors("deletions")
 
         if errors:
             print(f"FAILED - Found {len(errors)} deletion validation violations:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
@@ -168,9 +114,12 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 continue
 
             try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+                count = sum(
+                    1
+                    for _ in self._iter_elements(
+                        xml_file, f"{{{self.WORD_2006_NAMESPACE}}}p"
+                    )
+                )
             except Exception as e:
                 print(f"Error counting paragraphs in unpacked document: {e}")
 
@@ -184,62 +133,39 @@ class DOCXSchemaValidator(BaseSchemaValidator):
         count = 0
 
         try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                with zipfile.ZipFile(original, "r") as zip_ref:
-                    zip_ref.extractall(temp_dir)
-
-                doc_xml_path = temp_dir + "/word/document.xml"
-                root = lxml.etree.parse(doc_xml_path).getroot()
-
-                paragraphs = root.findall(f".//{{{self.WORD_2006_NAMESPACE}}}p")
-                count = len(paragraphs)
+            p_tag = f"{{{self.WORD_2006_NAMESPACE}}}p"
+            with zipfile.ZipFile(original, "r") as zip_ref:
+                with zip_ref.open("word/document.xml") as doc_xml:
+                    if self.streaming:
+                        count = sum(
+                            1
+                            for _, elem in iterparse_clearing(doc_xml, ("start",))
+                            if elem.tag == p_tag
+                        )
+                    else:
+                        root = lxml.etree.parse(doc_xml).getroot()
+                        count = len(root.findall(f".//{p_tag}"))
 
         except Exception as e:
             print(f"Error counting paragraphs in original document: {e}")
 
         return count
 
+    @reported_check("insertions")
     def validate_insertions(self):
-        errors = []
-
-        for xml_file in self.xml_files:
-            if xml_file.name != "document.xml":
-                continue
-
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-                invalid_elements = root.xpath(
-                    ".//w:ins//w:delText[not(ancestor::w:del)]", namespaces=namespaces
-                )
-
-                for elem in invalid_elements:
-                    text_preview = (
-                        repr(elem.text or "")[:50] + "..."
-                        if len(repr(elem.text or "")) > 50
-                        else repr(elem.text or "")
-                    )
-                    errors.append(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Line {elem.sourceline}: <w:delText> within <w:ins>: {text_preview}"
-                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors("insertions")
 
         if errors:
             print(f"FAILED - Found {len(errors)} insertion validation violations:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
                 print("PASSED - No w:delText elements within w:ins elements")
             return True
 
+    @reported_check("paragraph_counts")
+    @incremental_check("*document.xml")
     def compare_paragraph_counts(self):
         original_count = self.count_paragraphs_in_original()
         new_count = self.count_paragraphs_in_unpacked()
@@ -251,50 +177,19 @@ class DOCXSchemaValidator(BaseSchemaValidator):
     def _parse_id_value(self, val: str, base: int = 16) -> int:
         return int(val, base)
 
+    @reported_check("id_constraints")
     def validate_id_constraints(self):
-        errors = []
-        para_id_attr = f"{{{self.W14_NAMESPACE}}}paraId"
-        durable_id_attr = f"{{{self.W16CID_NAMESPACE}}}durableId"
-
-        for xml_file in self.xml_files:
-            try:
-                for elem in lxml.etree.parse(str(xml_file)).iter():
-                    if val := elem.get(para_id_attr):
-                        if self._parse_id_value(val, base=16) >= 0x80000000:
-                            errors.append(
-                                f"  {xml_file.name}:{elem.sourceline}: paraId={val} >= 0x80000000"
-                            )
-
-                    if val := elem.get(durable_id_attr):
-                        if xml_file.name == "numbering.xml":
-                            try:
-                                if self._parse_id_value(val, base=10) >= 0x7FFFFFFF:
-                                    errors.append(
-                                        f"  {xml_file.name}:{elem.sourceline}: "
-                                        f"durableId={val} >= 0x7FFFFFFF"
-                                    )
-                            except ValueError:
-                                errors.append(
-                                    f"  {xml_file.name}:{elem.sourceline}: "
-                                    f"durableId={val} must be decimal in numbering.xml"
-                                )
-                        else:
-                            if self._parse_id_value(val, base=16) >= 0x7FFFFFFF:
-                                errors.append(
-                                    f"  {xml_file.name}:{elem.sourceline}: "
-                                    f"durableId={val} >= 0x7FFFFFFF"
-                                )
-            except Exception:
-                pass
+        errors = self._element_rule_errors("id_constraints")
 
         if errors:
             print(f"FAILED - {len(errors)} ID constraint violations:")
-            for e in errors:
-                print(e)
+            print_errors(errors)
         elif self.verbose:
             print("PASSED - All paraId/durableId values within constraints")
         return not errors
 
+    @reported_check("comment_markers")
+    @incremental_check("*document.xml", "*comments.xml")
     def validate_comment_markers(self):
         errors = []
 
@@ -312,34 +207,28 @@ class DOCXSchemaValidator(BaseSchemaValidator):
             return True
 
         try:
-            doc_root = lxml.etree.parse(str(document_xml)).getroot()
-            namespaces = {"w": self.WORD_2006_NAMESPACE}
-
-            range_starts = {
-                elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
-                for elem in doc_root.xpath(
-                    ".//w:commentRangeStart", namespaces=namespaces
-                )
-            }
-            range_ends = {
-                elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
-                for elem in doc_root.xpath(
-                    ".//w:commentRangeEnd", namespaces=namespaces
-                )
-            }
-            references = {
-                elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
-                for elem in doc_root.xpath(
-                    ".//w:commentReference", namespaces=namespaces
-                )
+            id_attr = f"{{{self.WORD_2006_NAMESPACE}}}id"
+            range_starts, range_ends, references = set(), set(), set()
+            markers = {
+                f"{{{self.WORD_2006_NAMESPACE}}}commentRangeStart": range_starts,
+                f"{{{self.WORD_2006_NAMESPACE}}}commentRangeEnd": range_ends,
+                f"{{{self.WORD_2006_NAMESPACE}}}commentReference": references,
             }
+            for elem in self._iter_elements(document_xml):
+                ids = markers.get(elem.tag)
+                if ids is not None:
+                    ids.add(elem.get(id_attr))
 
             orphaned_ends = range_ends - range_starts
             for comment_id in sorted(
                 orphaned_ends, key=lambda x: int(x) if x and x.isdigit() else 0
             ):
                 errors.append(
-                    f'  document.xml: commentRangeEnd id="{comment_id}" has no matching commentRangeStart'
+                    check_error(
+                        document_xml,
+                        None,
+                        f'commentRangeEnd id="{comment_id}" has no matching commentRangeStart',
+                    )
                 )
 
             orphaned_starts = range_starts - range_ends
@@ -347,16 +236,19 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 orphaned_starts, key=lambda x: int(x) if x and x.isdigit() else 0
             ):
                 errors.append(
-                    f'  document.xml: commentRangeStart id="{comment_id}" has no matching commentRangeEnd'
+                    check_error(
+                        document_xml,
+                        None,
+                        f'commentRangeStart id="{comment_id}" has no matching commentRangeEnd',
+                    )
                 )
 
             comment_ids = set()
-            if comments_xml and comments_xml.exists():
-                comments_root = lxml.etree.parse(str(comments_xml)).getroot()
+            if comments_xml and self.source.is_file(comments_xml):
                 comment_ids = {
-                    elem.get(f"{{{self.WORD_2006_NAMESPACE}}}id")
-                    for elem in comments_root.xpath(
-                        ".//w:comment", namespaces=namespaces
+                    elem.get(id_attr)
+                    for elem in self._iter_elements(
+                        comments_xml, f"{{{self.WORD_2006_NAMESPACE}}}comment"
                     )
                 }
 
@@ -367,80 +259,25 @@ class DOCXSchemaValidator(BaseSchemaValidator):
                 ):
                     if comment_id:  
                         errors.append(
-                            f'  document.xml: marker id="{comment_id}" references non-existent comment'
+                            check_error(
+                                document_xml,
+                                None,
+                                f'marker id="{comment_id}" references non-existent comment',
+                            )
                         )
 
         except (lxml.etree.XMLSyntaxError, Exception) as e:
-            errors.append(f"  Error parsing XML: {e}")
+            errors.append(check_error(None, None, f"Error parsing XML: {e}"))
 
         if errors:
             print(f"FAILED - {len(errors)} comment marker violations:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
                 print("PASSED - All comment markers properly paired")
             return True
 
-    def repair(self) -> int:
-        repairs = super().repair()
-        repairs += self.repair_durableId()
-        return repairs
-
-    def repair_durableId(self) -> int:
-        repairs = 0
-
-        for xml_file in self.xml_files:
-            try:
-                content = xml_file.read_text(encoding="utf-8")
-                dom = defusedxml.minidom.parseString(content)
-                modified = False
-
-                for elem in dom.getElementsByTagName("*"):
-                    if not elem.hasAttribute("w16cid:durableId"):
-                        continue
-
-                    durable_id = elem.getAttribute("w16cid:durableId")
-                    needs_repair = False
-
-                    if xml_file.name == "numbering.xml":
-                        try:
-                            needs_repair = (
-                                self._parse_id_value(durable_id, base=10) >= 0x7FFFFFFF
-                            )
-                        except ValueError:
-                            needs_repair = True
-                    else:
-                        try:
-                            needs_repair = (
-                                self._parse_id_value(durable_id, base=16) >= 0x7FFFFFFF
-                            )
-                        except ValueError:
-                            needs_repair = True
-
-                    if needs_repair:
-                        value = random.randint(1, 0x7FFFFFFE)
-                        if xml_file.name == "numbering.xml":
-                            new_id = str(value)  
-                        else:
-                            new_id = f"{value:08X}"  
-
-                        elem.setAttribute("w16cid:durableId", new_id)
-                        print(
-                            f"  Repaired: {xml_file.name}: durableId {durable_id} → {new_id}"
-                        )
-                        repairs += 1
-                        modified = True
-
-                if modified:
-                    xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
-
-            except Exception:
-                pass
-
-        return repairs
-
 
 if __name__ == "__main__":
     raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,238 @@
+"""
+Parse-once model of the XML parts in an Office document, read either from an
+unpacked directory or straight from the members of a packed file.
+"""
+
+import hashlib
+import io
+import os
+import time
+import zipfile
+from fnmatch import fnmatchcase
+from pathlib import Path, PurePosixPath
+
+import lxml.etree
+
+
+class DirectorySource:
+
+    def __init__(self, root_dir):
+        self.path = Path(root_dir).resolve()
+
+    def rglob(self, pattern):
+        return [
+            PurePosixPath(f.relative_to(self.path).as_posix())
+            for f in self.path.rglob(pattern)
+            if f.is_file()
+        ]
+
+    def glob(self, pattern):
+        return [
+            PurePosixPath(f.relative_to(self.path).as_posix())
+            for f in self.path.glob(pattern)
+            if f.is_file()
+        ]
+
+    def is_file(self, part_name):
+        return (self.path / part_name).is_file()
+
+    def size(self, part_name):
+        return (self.path / part_name).stat().st_size
+
+    def open(self, part_name):
+        return open(self.path / part_name, "rb")
+
+    def read_bytes(self, part_name):
+        return (self.path / part_name).read_bytes()
+
+    def write_bytes(self, part_name, data):
+        (self.path / part_name).write_bytes(data)
+
+    @property
+    def has_pending_writes(self):
+        return False
+
+    def close(self):
+        pass
+
+
+class ZipSource:
+    """Reads parts straight from the members of a .docx/.pptx/.xlsx file.
+
+    Nothing is extracted to disk. Writes (from auto-repair) are kept in memory
+    and shadow the archive member for the rest of the run.
+    """
+
+    def __init__(self, zip_path):
+        self.path = Path(zip_path).resolve()
+        self._zip = zipfile.ZipFile(self.path, "r")
+        self._names = [
+            PurePosixPath(info.filename)
+            for info in self._zip.infolist()
+            if not info.is_dir()
+        ]
+        self._name_set = set(self._names)
+        self._overlay = {}
+
+    def rglob(self, pattern):
+        return [name for name in self._names if fnmatchcase(name.name, pattern)]
+
+    def glob(self, pattern):
+        parent, _, name_pattern = pattern.rpartition("/")
+        parent = PurePosixPath(parent or ".")
+        return [
+            name
+            for name in self._names
+            if name.parent == parent and fnmatchcase(name.name, name_pattern)
+        ]
+
+    def is_file(self, part_name):
+        return PurePosixPath(part_name) in self._name_set
+
+    def size(self, part_name):
+        key = PurePosixPath(part_name).as_posix()
+        if key in self._overlay:
+            return len(self._overlay[key])
+        return self._zip.getinfo(key).file_size
+
+    def open(self, part_name):
+        key = PurePosixPath(part_name).as_posix()
+        if key in self._overlay:
+            return io.BytesIO(self._overlay[key])
+        return self._zip.open(key)
+
+    def read_bytes(self, part_name):
+        with self.open(part_name) as f:
+            return f.read()
+
+    def write_bytes(self, part_name, data):
+        self._overlay[PurePosixPath(part_name).as_posix()] = data
+
+    @property
+    def has_pending_writes(self):
+        return bool(self._overlay)
+
+    def close(self):
+        self._zip.close()
+
+
+def iterparse_clearing(f, events=("start", "end")):
+    """Yields iterparse events, discarding each element once its end event has
+    been handled so memory stays bounded by the depth of the document."""
+    for event, elem in lxml.etree.iterparse(f, events=("start", "end")):
+        if event in events:
+            yield event, elem
+        if event == "end":
+            elem.clear()
+            while elem.getprevious() is not None:
+                del elem.getparent()[0]
+
+
+def open_package_source(path):
+    """Opens a source for an unpacked directory or a packed file. Anything
+    else is taken to be an open source already and returned as it is."""
+    if not isinstance(path, (str, os.PathLike)):
+        return path
+    path = Path(path)
+    if path.is_dir():
+        return DirectorySource(path)
+    return ZipSource(path)
+
+
+class ParsedPackage:
+    """Parses each XML part at most once and shares the tree with every check.
+
+    Trees handed out by parse() are shared between checks and must be treated
+    as read-only; a check that needs to modify a tree must work on a copy.
+    Parse failures are cached too, so every check sees the same exception.
+    """
+
+    def __init__(self, source):
+        self.source = source
+        self.parse_count = 0
+        self.parse_time = 0.0
+        self.request_count = 0
+        self.stream_count = 0
+        self.bytes_parsed = 0
+        self._inspected = set()
+        self._trees = {}
+        self._digests = {}
+
+    def parse(self, part_name):
+        key = PurePosixPath(part_name)
+        self.request_count += 1
+        self._inspected.add(key)
+
+        cached = self._trees.get(key)
+        if cached is None:
+            start = time.perf_counter()
+            try:
+                with self.source.open(key) as f:
+                    cached = lxml.etree.parse(f)
+                self.bytes_parsed += self.source.size(key)
+            except Exception as e:
+                cached = e
+            self.parse_time += time.perf_counter() - start
+            self.parse_count += 1
+            self._trees[key] = cached
+
+        if isinstance(cached, Exception):
+            raise cached
+        return cached
+
+    def getroot(self, part_name):
+        return self.parse(part_name).getroot()
+
+    def stream(self, part_name, events=("start", "end")):
+        """Yields (event, element) for a part without keeping its tree.
+
+        Elements are only valid until the consumer asks for the next event.
+        """
+        key = PurePosixPath(part_name)
+        self.stream_count += 1
+        self._inspected.add(key)
+        with self.source.open(key) as f:
+            self.bytes_parsed += self.source.size(key)
+            yield from iterparse_clearing(f, events)
+
+    def digest(self, part_name):
+        key = PurePosixPath(part_name)
+        if key not in self._digests:
+            if self.source.is_file(key):
+                self._digests[key] = hashlib.sha256(
+                    self.source.read_bytes(key)
+                ).hexdigest()
+            else:
+                self._digests[key] = None
+        return self._digests[key]
+
+    def adopt(self, part_name, tree):
+        """Caches a tree parsed elsewhere from the part's current content."""
+        self._trees.setdefault(PurePosixPath(part_name), tree)
+
+    def take_inspected(self):
+        """Returns the parts requested as trees or streams since the last
+        call, and starts a new count."""
+        inspected, self._inspected = self._inspected, set()
+        return inspected
+
+    def invalidate(self, part_name=None):
+        if part_name is None:
+            self._trees.clear()
+            self._digests.clear()
+        else:
+            self._trees.pop(PurePosixPath(part_name), None)
+            self._digests.pop(PurePosixPath(part_name), None)
+
+    def summary(self):
+        summary = (
+            f"Parsed {self.parse_count} XML part(s) in {self.parse_time:.3f}s "
+            f"({self.request_count} tree request(s))"
+        )
+        if self.stream_count:
+            summary += f", {self.stream_count} streamed pass(es)"
+        return summary
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
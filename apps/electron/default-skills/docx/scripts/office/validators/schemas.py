@@ -0,0 +1,69 @@
+"""
+Process-wide registry of compiled XSD schemas.
+"""
+
+from pathlib import Path
+
+import lxml.etree
+
+
+class SchemaRegistry:
+    """Compiles each XSD at most once per process, keyed by schema path.
+
+    Compilation failures are cached as well so a broken or missing schema is
+    reported consistently without being re-read for every part.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self._schemas = {}
+
+    def get(self, schema_path):
+        key = Path(schema_path).resolve()
+
+        cached = self._schemas.get(key)
+        if cached is None:
+            self.misses += 1
+            try:
+                cached = self._compile(key)
+            except Exception as e:
+                cached = e
+            self._schemas[key] = cached
+        else:
+            self.hits += 1
+
+        if isinstance(cached, Exception):
+            raise cached
+        return cached
+
+    def warm_up(self, schema_paths):
+        for schema_path in sorted({Path(p).resolve() for p in schema_paths}):
+            if schema_path not in self._schemas:
+                try:
+                    self.get(schema_path)
+                except Exception:
+                    pass
+
+    def clear(self):
+        self._schemas.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def summary(self):
+        return f"Schema cache: {self.hits} hit(s), {self.misses} miss(es)"
+
+    def _compile(self, schema_path):
+        with open(schema_path, "rb") as xsd_file:
+            parser = lxml.etree.XMLParser()
+            xsd_doc = lxml.etree.parse(
+                xsd_file, parser=parser, base_url=str(schema_path)
+            )
+        return lxml.etree.XMLSchema(xsd_doc)
+
+
+SCHEMA_REGISTRY = SchemaRegistry()
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
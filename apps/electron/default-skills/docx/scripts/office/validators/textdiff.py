@@ -0,0 +1,324 @@
+"""
+In-process text diff for redlining failures: paragraphs are aligned by hash,
+then only the paragraphs that changed are diffed character by character.
+Both levels use Myers' O(ND) algorithm.
+"""
+
+from collections import deque
+
+# Unchanged text kept on each side of a change; longer runs are elided.
+CONTEXT_CHARS = 30
+
+# Unchanged runs this short between two changes are folded into them, so a
+# reworded word reads as one replacement rather than as scattered letters.
+MIN_EQUAL_CHARS = 3
+
+# Past this many edits the diff gives up on aligning a range and reports it
+# as replaced as a whole, which bounds time and memory on unrelated texts.
+MAX_EDITS = 500
+
+MAX_REPORTED_PARAGRAPHS = 50
+
+# How far stream_paragraph_changes reads ahead on each side looking for a
+# paragraph both sides share again before it gives up on realigning.
+MAX_RESYNC_PARAGRAPHS = 1000
+
+_END = object()
+
+
+def diff_opcodes(a, b, max_edits=MAX_EDITS):
+    """Returns difflib-style (tag, i1, i2, j1, j2) opcodes turning sequence a
+    into sequence b, or None when more than max_edits edits are needed.
+
+    Tags are "equal", "delete", "insert" and "replace".
+    """
+    n, m = len(a), len(b)
+    prefix = 0
+    while prefix < n and prefix < m and a[prefix] == b[prefix]:
+        prefix += 1
+    suffix = 0
+    while (
+        suffix < n - prefix
+        and suffix < m - prefix
+        and a[n - 1 - suffix] == b[m - 1 - suffix]
+    ):
+        suffix += 1
+
+    steps = _myers_steps(a[prefix : n - suffix], b[prefix : m - suffix], max_edits)
+    if steps is None:
+        return None
+
+    opcodes = []
+    if prefix:
+        opcodes.append(("equal", 0, prefix, 0, prefix))
+    i, j = prefix, prefix
+    for tag, count in steps:
+        if tag == "equal":
+            opcodes.append(("equal", i, i + count, j, j + count))
+            i += count
+            j += count
+        elif tag == "delete":
+            _append_change(opcodes, i, i + count, j, j)
+            i += count
+        else:
+            _append_change(opcodes, i, i, j, j + count)
+            j += count
+    if suffix:
+        opcodes.append(("equal", i, n, j, m))
+    return opcodes
+
+
+def _append_change(opcodes, i1, i2, j1, j2):
+    if opcodes and opcodes[-1][0] != "equal":
+        _, p1, _, q1, _ = opcodes.pop()
+        i1, j1 = p1, q1
+    if i1 == i2:
+        tag = "insert"
+    elif j1 == j2:
+        tag = "delete"
+    else:
+        tag = "replace"
+    opcodes.append((tag, i1, i2, j1, j2))
+
+
+def _myers_steps(a, b, max_edits):
+    """Shortest edit script from a to b as (tag, count) runs, where tag is
+    "equal", "delete" or "insert"."""
+    n, m = len(a), len(b)
+    if not n or not m:
+        return [("delete", n)] if n else [("insert", m)] if m else []
+
+    frontier = {1: 0}
+    trace = []
+    for d in range(min(n + m, max_edits) + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and frontier[k - 1] < frontier[k + 1]):
+                x = frontier[k + 1]
+            else:
+                x = frontier[k - 1] + 1
+            y = x - k
+            while x < n and y < m and a[x] == b[y]:
+                x += 1
+                y += 1
+            frontier[k] = x
+            if x >= n and y >= m:
+                trace.append(dict(frontier))
+                return _backtrack(trace, n, m)
+        trace.append(dict(frontier))
+    return None
+
+
+def _backtrack(trace, n, m):
+    steps = []
+    x, y = n, m
+    for d in range(len(trace) - 1, 0, -1):
+        frontier = trace[d - 1]
+        k = x - y
+        if k == -d or (k != d and frontier[k - 1] < frontier[k + 1]):
+            previous_k = k + 1
+        else:
+            previous_k = k - 1
+        previous_x = frontier[previous_k]
+        previous_y = previous_x - previous_k
+
+        if previous_k == k + 1:
+            _push(steps, "equal", x - previous_x)
+            _push(steps, "insert", 1)
+        else:
+            _push(steps, "equal", x - previous_x - 1)
+            _push(steps, "delete", 1)
+        x, y = previous_x, previous_y
+    _push(steps, "equal", x)
+    steps.reverse()
+    return steps
+
+
+def _push(steps, tag, count):
+    if count <= 0:
+        return
+    if steps and steps[-1][0] == tag:
+        steps[-1] = (tag, steps[-1][1] + count)
+    else:
+        steps.append((tag, count))
+
+
+def paragraph_changes(original, modified, original_start=0, modified_start=0):
+    """Yields (original_index, modified_index, original_text, modified_text)
+    for every paragraph that differs. Paragraphs are aligned by hash; an
+    index is None for a paragraph only present on the other side. Indexes are
+    counted from original_start and modified_start."""
+    opcodes = diff_opcodes(
+        [hash(p) for p in original], [hash(p) for p in modified]
+    )
+    if opcodes is None:
+        opcodes = [("replace", 0, len(original), 0, len(modified))]
+
+    for tag, i1, i2, j1, j2 in opcodes:
+        if tag == "equal":
+            continue
+        paired = min(i2 - i1, j2 - j1)
+        for i, j in zip(range(i1, i1 + paired), range(j1, j1 + paired)):
+            yield original_start + i, modified_start + j, original[i], modified[j]
+        for i in range(i1 + paired, i2):
+            yield original_start + i, None, original[i], ""
+        for j in range(j1 + paired, j2):
+            yield None, modified_start + j, "", modified[j]
+
+
+def stream_paragraph_changes(original, modified, max_resync=MAX_RESYNC_PARAGRAPHS):
+    """Like paragraph_changes, but over two iterables of paragraphs read in
+    lockstep, so only the paragraphs around a change are held in memory.
+
+    At the first mismatch both sides are read ahead until a paragraph on one
+    side matches, by hash, one already read on the other; everything before
+    that pair is the changed region and is aligned with paragraph_changes.
+    When no such pair turns up within max_resync paragraphs per side, the
+    region read so far is reported as is and comparison resumes after it.
+    """
+    sides = (_Lookahead(original), _Lookahead(modified))
+    original_index = modified_index = 0
+    while True:
+        before, after = sides[0].next(), sides[1].next()
+        if before is _END and after is _END:
+            return
+        if before == after:
+            original_index += 1
+            modified_index += 1
+            continue
+
+        regions = ([], [])
+        seen = ({}, {})
+        for side, paragraph in enumerate((before, after)):
+            if paragraph is not _END:
+                regions[side].append(paragraph)
+                seen[side].setdefault(paragraph, 0)
+        sync = _resync(sides, regions, seen, max_resync)
+        if sync is None:
+            sync = (len(regions[0]), len(regions[1]))
+        for side, end in enumerate(sync):
+            sides[side].push_back(regions[side][end:])
+
+        yield from paragraph_changes(
+            regions[0][: sync[0]],
+            regions[1][: sync[1]],
+            original_index,
+            modified_index,
+        )
+        original_index += sync[0]
+        modified_index += sync[1]
+
+
+def _resync(sides, regions, seen, max_resync):
+    while len(regions[0]) < max_resync or len(regions[1]) < max_resync:
+        exhausted = True
+        for side in (0, 1):
+            if len(regions[side]) >= max_resync:
+                continue
+            paragraph = sides[side].next()
+            if paragraph is _END:
+                continue
+            exhausted = False
+            position = len(regions[side])
+            regions[side].append(paragraph)
+            seen[side].setdefault(paragraph, position)
+            match = seen[1 - side].get(paragraph)
+            if match is not None:
+                return (position, match) if side == 0 else (match, position)
+        if exhausted:
+            return None
+    return None
+
+
+class _Lookahead:
+
+    def __init__(self, iterable):
+        self._iterator = iter(iterable)
+        self._pending = deque()
+
+    def next(self):
+        if self._pending:
+            return self._pending.popleft()
+        return next(self._iterator, _END)
+
+    def push_back(self, items):
+        self._pending.extendleft(reversed(items))
+
+
+def format_paragraph_diff(original, modified, label="Paragraph"):
+    """Describes how the modified paragraphs differ from the original ones,
+    one line per changed paragraph, in git word-diff notation
+    ([-removed-]{+added+}). Returns an empty string when they are equal."""
+    return format_paragraph_changes(paragraph_changes(original, modified), label)
+
+
+def format_paragraph_changes(changes, label="Paragraph"):
+    """Formats the (original_index, modified_index, original_text,
+    modified_text) tuples from paragraph_changes or stream_paragraph_changes
+    as format_paragraph_diff does."""
+    lines = []
+    changes = iter(changes)
+    for count, (i, j, before, after) in enumerate(changes):
+        if count == MAX_REPORTED_PARAGRAPHS:
+            remaining = 1 + sum(1 for _ in changes)
+            lines.append(f"... and {remaining} more changed paragraph(s)")
+            break
+
+        if j is None:
+            lines.append(f"{label} {i} deleted: [-{before}-]")
+            continue
+        if i is None:
+            lines.append(f"{label} {j} of the modified text inserted: {{+{after}+}}")
+            continue
+
+        opcodes = diff_opcodes(before, after)
+        if opcodes is None:
+            opcodes = [("replace", 0, len(before), 0, len(after))]
+        opcodes = _fold_short_equalities(opcodes)
+        offsets = [str(i1) for tag, i1, _, _, _ in opcodes if tag != "equal"]
+        location = f"{label} {i}" if i == j else f"{label} {i} (now {j})"
+        lines.append(
+            f"{location}, offset{'s' if len(offsets) > 1 else ''} "
+            f"{', '.join(offsets)}: {_render(before, after, opcodes)}"
+        )
+    return "\n".join(lines)
+
+
+def _fold_short_equalities(opcodes):
+    folded = []
+    for index, opcode in enumerate(opcodes):
+        tag, i1, i2, j1, j2 = opcode
+        inner = 0 < index < len(opcodes) - 1
+        if tag == "equal" and not (inner and i2 - i1 < MIN_EQUAL_CHARS):
+            folded.append(opcode)
+        elif folded and folded[-1][0] != "equal":
+            _, p1, _, q1, _ = folded.pop()
+            folded.append(("replace", p1, i2, q1, j2))
+        else:
+            folded.append(opcode)
+    return folded
+
+
+def _render(before, after, opcodes):
+    parts = []
+    last = len(opcodes) - 1
+    for index, (tag, i1, i2, j1, j2) in enumerate(opcodes):
+        if tag == "equal":
+            parts.append(_elide(before[i1:i2], index == 0, index == last))
+            continue
+        if i2 > i1:
+            parts.append(f"[-{before[i1:i2]}-]")
+        if j2 > j1:
+            parts.append(f"{{+{after[j1:j2]}+}}")
+    return "".join(parts)
+
+
+def _elide(text, first, last):
+    keep_head = 0 if first else CONTEXT_CHARS
+    keep_tail = 0 if last else CONTEXT_CHARS
+    if len(text) <= keep_head + keep_tail + 3:
+        return text
+    return text[:keep_head] + "..." + text[len(text) - keep_tail :]
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
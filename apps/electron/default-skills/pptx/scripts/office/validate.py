@@ -2,11 +2,49 @@
 Command line tool to validate Office document XML files against XSD schemas and tracked changes.
 
 Usage:
-    python validate.py <path> [--original <original_file>] [--auto-repair] [--author NAME]
+    python validate.py <path> [--original <original_file>] [--auto-repair] [--author NAME] [--jobs N]
+                       [--no-incremental] [--streaming] [--format text|json]
+                       [--checks NAMES] [--skip-checks NAMES] [--fail-fast]
 
 The first argument can be either:
 - An unpacked directory containing the Office document XML files
-- A packed Office file (.docx/.pptx/.xlsx) which will be unpacked to a temp directory
+- A packed Office file (.docx/.pptx/.xlsx), whose parts are read directly from the zip
+  (nothing is extracted; auto-repairs are applied in memory only)
+
+XSD errors already present in the original file are cached per part under
+$OFFICE_VALIDATOR_CACHE_DIR (default: ~/.cache/office-validators), keyed by the
+original file's SHA-256, so repeated runs against the same original are cheap.
+
+Each run also records a manifest of per-part content hashes and check results
+in the same cache directory. The next run over the same path only re-checks
+parts whose content changed, and re-runs package-wide checks only when a part
+they read changed. Use --no-incremental to validate everything from scratch.
+
+--streaming keeps memory bounded for very large parts (e.g. a multi-hundred MB
+word/document.xml): parts over 8 MB are checked with a streaming parser for
+well-formedness, unique IDs, paraId/durableId limits, whitespace preservation,
+w:del/w:ins content, relationship IDs and comment markers. Such parts are not
+XSD-validated or auto-repaired. The tracked-change comparison against
+--original then reads both document.xml files one paragraph at a time and
+keeps only the paragraphs around a difference in memory.
+
+Spreadsheets (.xlsx) are also checked for shared string indices, style
+indices, calcChain.xml entries without a formula, and duplicate sheet or
+defined names. Worksheets and sharedStrings.xml over 8 MB are always
+streamed, with or without --streaming, so large exports never load as trees.
+
+--format json prints a single JSON report on stdout instead of the usual text,
+which moves to stderr. The report lists every check that ran with its status,
+wall time, parts inspected, bytes parsed and errors (file, line, code,
+message), plus a breakdown of the run's time into setup, repair, validate,
+parse and manifest phases.
+
+--checks and --skip-checks take comma-separated check names (the "name" of
+each check in the JSON report, e.g. xml,xsd,redlining) or profiles. The
+"quick" profile runs only the structural checks (well-formedness, namespaces,
+IDs, relationships and content types) and leaves out XSD validation and the
+tracked-change checks, for fast feedback while editing; run the full set
+before delivery. --fail-fast stops at the first failing check.
 
 Auto-repair fixes:
 - paraId/durableId values that exceed OOXML limits
@@ -14,12 +52,20 @@ Auto-repair fixes:
 """
 
 import argparse
+import json
 import sys
-import tempfile
-import zipfile
 from pathlib import Path
 
-from validators import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
+from validators import (
+    BaseSchemaValidator,
+    CheckSelection,
+    DOCXSchemaValidator,
+    PPTXSchemaValidator,
+    RedliningValidator,
+    ValidationReport,
+    XLSXSchemaValidator,
+)
+from validators.report import report_phase
 
 
 def main():
@@ -50,8 +96,59 @@ def main():
         default="Claude",
         help="Author name for redlining validation (default: Claude)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Worker processes for XSD validation (default: 1, 0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--no-incremental",
+        action="store_true",
+        help="Ignore the manifest of the previous run and re-check every part",
+    )
+    parser.add_argument(
+        "--streaming",
+        action="store_true",
+        help="Stream very large parts instead of building full trees (bounded memory)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="Output format (default: text). json prints a structured report with per-check timings",
+    )
+    parser.add_argument(
+        "--checks",
+        metavar="NAMES",
+        help="Only run these comma-separated checks or profiles (e.g. quick, or xml,xsd)",
+    )
+    parser.add_argument(
+        "--skip-checks",
+        metavar="NAMES",
+        help="Skip these comma-separated checks or profiles",
+    )
+    parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Stop at the first failing check",
+    )
     args = parser.parse_args()
 
+    try:
+        checks = CheckSelection.from_names(
+            args.checks, args.skip_checks, fail_fast=args.fail_fast
+        )
+    except ValueError as e:
+        parser.error(str(e))
+
+    output = sys.stdout
+    report = None
+    if args.format == "json":
+        report = ValidationReport()
+        sys.stdout = sys.stderr
+
     path = Path(args.path)
     assert path.exists(), f"Error: {path} does not exist"
 
@@ -69,42 +166,121 @@ def main():
     )
 
     if path.is_file() and path.suffix.lower() in [".docx", ".pptx", ".xlsx"]:
-        temp_dir = tempfile.mkdtemp()
-        with zipfile.ZipFile(path, "r") as zf:
-            zf.extractall(temp_dir)
-        unpacked_dir = Path(temp_dir)
+        unpacked_dir = path
     else:
         assert path.is_dir(), f"Error: {path} is not a directory or Office file"
         unpacked_dir = path
 
+    with report_phase(report, "setup"):
+        validators = _create_validators(
+            file_extension, unpacked_dir, original_file, args, report, checks
+        )
+    if validators is None:
+        print(f"Error: Validation not supported for file type {file_extension}")
+        sys.exit(1)
+
+    with report_phase(report, "repair"):
+        if args.auto_repair:
+            total_repairs = sum(v.repair() for v in validators)
+            if total_repairs:
+                print(f"Auto-repaired {total_repairs} issue(s)")
+
+    with report_phase(report, "validate"):
+        success = all(v.validate() for v in validators)
+
+    with report_phase(report, "manifest"):
+        for v in validators:
+            if isinstance(v, BaseSchemaValidator):
+                if args.verbose:
+                    print(v.package.summary())
+                    if v.manifest is not None:
+                        print(v.manifest.summary())
+                v.save_manifest()
+
+    if checks.skipped:
+        reason = (
+            f"after {checks.failed} failed (--fail-fast)"
+            if checks.fail_fast and checks.failed
+            else "not selected"
+        )
+        print(f"Skipped {len(checks.skipped)} check(s), {reason}: {', '.join(checks.skipped)}")
+
+    if success:
+        print("All validations PASSED!")
+
+    if report:
+        report.add_timing(
+            "parse",
+            sum(
+                v.package.parse_time
+                for v in validators
+                if isinstance(v, BaseSchemaValidator)
+            ),
+        )
+        json.dump(report.to_dict(success), output, indent=2)
+        output.write("\n")
+
+    sys.exit(0 if success else 1)
+
+
+def _create_validators(
+    file_extension, unpacked_dir, original_file, args, report, checks
+):
     match file_extension:
         case ".docx":
             validators = [
-                DOCXSchemaValidator(unpacked_dir, original_file, verbose=args.verbose),
+                DOCXSchemaValidator(
+                    unpacked_dir,
+                    original_file,
+                    verbose=args.verbose,
+                    jobs=args.jobs,
+                    incremental=not args.no_incremental,
+                    streaming=args.streaming,
+                    report=report,
+                    checks=checks,
+                ),
             ]
             if original_file:
                 validators.append(
-                    RedliningValidator(unpacked_dir, original_file, verbose=args.verbose, author=args.author)  
+                    RedliningValidator(
+                        unpacked_dir,
+                        original_file,
+                        verbose=args.verbose,
+                        author=args.author,
+                        report=report,
+                        checks=checks,
+                        streaming=args.streaming,
+                    )
                 )
+            return validators
         case ".pptx":
-            validators = [
-                PPTXSchemaValidator(unpacked_dir, original_file, verbose=args.verbose),
+            return [
+                PPTXSchemaValidator(
+                    unpacked_dir,
+                    original_file,
+                    verbose=args.verbose,
+                    jobs=args.jobs,
+                    incremental=not args.no_incremental,
+                    streaming=args.streaming,
+                    report=report,
+                    checks=checks,
+                ),
+            ]
+        case ".xlsx":
+            return [
+                XLSXSchemaValidator(
+                    unpacked_dir,
+                    original_file,
+                    verbose=args.verbose,
+                    jobs=args.jobs,
+                    incremental=not args.no_incremental,
+                    streaming=args.streaming,
+                    report=report,
+                    checks=checks,
+                ),
             ]
         case _:
-            print(f"Error: Validation not supported for file type {file_extension}")
-            sys.exit(1)
-
-    if args.auto_repair:
-        total_repairs = sum(v.repair() for v in validators)
-        if total_repairs:
-            print(f"Auto-repaired {total_repairs} issue(s)")
-
-    success = all(v.validate() for v in validators)
-
-    if success:
-        print("All validations PASSED!")
-
-    sys.exit(0 if success else 1)
+            return None
 
 
 if __name__ == "__main__":
@@ -2,9 +2,16 @@
 Validator for PowerPoint presentation XML files against XSD schemas.
 """
 
-import re
-
 from .base import BaseSchemaValidator
+from .manifest import incremental_check
+from .report import (
+    check_error,
+    format_error,
+    print_errors,
+    report_errors,
+    reported_check,
+)
+from .rules import UniqueIdRule, UuidIdRule
 
 
 class PPTXSchemaValidator(BaseSchemaValidator):
@@ -22,6 +29,8 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         "tablestyleid": "tablestyles",
     }
 
+    ELEMENT_RULES = (UniqueIdRule, UuidIdRule)
+
     def validate(self):
         if not self.validate_xml():
             return False
@@ -59,38 +68,13 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         return all_valid
 
+    @reported_check("uuid_ids")
     def validate_uuid_ids(self):
-        import lxml.etree
-
-        errors = []
-        uuid_pattern = re.compile(
-            r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
-        )
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-
-                for elem in root.iter():
-                    for attr, value in elem.attrib.items():
-                        attr_name = attr.split("}")[-1].lower()
-                        if attr_name == "id" or attr_name.endswith("id"):
-                            if self._looks_like_uuid(value):
-                                if not uuid_pattern.match(value):
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: ID '{value}' appears to be a UUID but contains invalid hex characters"
-                                    )
-
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+        errors = self._element_rule_errors("uuid_ids")
 
         if errors:
             print(f"FAILED - Found {len(errors)} UUID ID validation errors:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
@@ -101,12 +85,14 @@ class PPTXSchemaValidator(BaseSchemaValidator):
         clean_value = value.strip("{}()").replace("-", "")
         return len(clean_value) == 32 and all(c.isalnum() for c in clean_value)
 
+    @reported_check("slide_layout_ids")
+    @incremental_check("ppt/slideMasters/*")
     def validate_slide_layout_ids(self):
         import lxml.etree
 
         errors = []
 
-        slide_masters = list(self.unpacked_dir.glob("ppt/slideMasters/*.xml"))
+        slide_masters = list(self.source.glob("ppt/slideMasters/*.xml"))
 
         if not slide_masters:
             if self.verbose:
@@ -115,18 +101,19 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for slide_master in slide_masters:
             try:
-                root = lxml.etree.parse(str(slide_master)).getroot()
+                root = self.package.getroot(slide_master)
 
                 rels_file = slide_master.parent / "_rels" / f"{slide_master.name}.rels"
 
-                if not rels_file.exists():
+                if not self.source.is_file(rels_file):
                     errors.append(
-                        f"  {slide_master.relative_to(self.unpacked_dir)}: "
-                        f"Missing relationships file: {rels_file.relative_to(self.unpacked_dir)}"
+                        check_error(
+                            slide_master, None, f"Missing relationships file: {rels_file}"
+                        )
                     )
                     continue
 
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self.package.getroot(rels_file)
 
                 valid_layout_rids = set()
                 for rel in rels_root.findall(
@@ -146,20 +133,20 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
                     if r_id and r_id not in valid_layout_rids:
                         errors.append(
-                            f"  {slide_master.relative_to(self.unpacked_dir)}: "
-                            f"Line {sld_layout_id.sourceline}: sldLayoutId with id='{layout_id}' "
-                            f"references r:id='{r_id}' which is not found in slide layout relationships"
+                            check_error(
+                                slide_master,
+                                sld_layout_id.sourceline,
+                                f"sldLayoutId with id='{layout_id}' "
+                                f"references r:id='{r_id}' which is not found in slide layout relationships",
+                            )
                         )
 
             except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {slide_master.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+                errors.append(check_error(slide_master, None, f"Error: {e}"))
 
         if errors:
             print(f"FAILED - Found {len(errors)} slide layout ID validation errors:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             print(
                 "Remove invalid references or add missing slide layouts to the relationships file."
             )
@@ -169,15 +156,15 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                 print("PASSED - All slide layout IDs reference valid slide layouts")
             return True
 
+    @reported_check("duplicate_slide_layouts")
+    @incremental_check("ppt/slides/_rels/*")
     def validate_no_duplicate_slide_layouts(self):
-        import lxml.etree
-
         errors = []
-        slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
+        slide_rels_files = list(self.source.glob("ppt/slides/_rels/*.xml.rels"))
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
+                root = self.package.getroot(rels_file)
 
                 layout_rels = [
                     rel
@@ -189,31 +176,34 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
                 if len(layout_rels) > 1:
                     errors.append(
-                        f"  {rels_file.relative_to(self.unpacked_dir)}: has {len(layout_rels)} slideLayout references"
+                        check_error(
+                            rels_file,
+                            None,
+                            f"has {len(layout_rels)} slideLayout references",
+                        )
                     )
 
             except Exception as e:
-                errors.append(
-                    f"  {rels_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+                errors.append(check_error(rels_file, None, f"Error: {e}"))
 
         if errors:
             print("FAILED - Found slides with duplicate slideLayout references:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
                 print("PASSED - All slides have exactly one slideLayout reference")
             return True
 
+    @reported_check("notes_slide_references")
+    @incremental_check("ppt/slides/_rels/*")
     def validate_notes_slide_references(self):
         import lxml.etree
 
         errors = []
         notes_slide_references = {}  
 
-        slide_rels_files = list(self.unpacked_dir.glob("ppt/slides/_rels/*.xml.rels"))
+        slide_rels_files = list(self.source.glob("ppt/slides/_rels/*.xml.rels"))
 
         if not slide_rels_files:
             if self.verbose:
@@ -222,7 +212,7 @@ class PPTXSchemaValidator(BaseSchemaValidator):
 
         for rels_file in slide_rels_files:
             try:
-                root = lxml.etree.parse(str(rels_file)).getroot()
+                root = self.package.getroot(rels_file)
 
                 for rel in root.findall(
                     f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
@@ -244,25 +234,31 @@ class PPTXSchemaValidator(BaseSchemaValidator):
                             )
 
             except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {rels_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+                errors.append((check_error(rels_file, None, f"Error: {e}"), []))
 
         for target, references in notes_slide_references.items():
             if len(references) > 1:
                 slide_names = [ref[0] for ref in references]
                 errors.append(
-                    f"  Notes slide '{target}' is referenced by multiple slides: {', '.join(slide_names)}"
+                    (
+                        check_error(
+                            None,
+                            None,
+                            f"Notes slide '{target}' is referenced by multiple slides: {', '.join(slide_names)}",
+                        ),
+                        [rels_file for _, rels_file in references],
+                    )
                 )
-                for slide_name, rels_file in references:
-                    errors.append(f"    - {rels_file.relative_to(self.unpacked_dir)}")
 
         if errors:
             print(
-                f"FAILED - Found {len([e for e in errors if not e.startswith('    ')])} notes slide reference validation errors:"
+                f"FAILED - Found {len(errors)} notes slide reference validation errors:"
             )
-            for error in errors:
-                print(error)
+            for error, rels_files in errors:
+                print(format_error(error))
+                for rels_file in rels_files:
+                    print(f"    - {rels_file}")
+            report_errors([error for error, _ in errors])
             print("Each slide may optionally have its own slide file.")
             return False
         else:
@@ -0,0 +1,220 @@
+"""
+Machine-readable record of a validation run: per-check status, timing and
+errors, plus a breakdown of where the run spent its time.
+"""
+
+import contextlib
+import functools
+import io
+import time
+
+from .checks import CHECK_NAMES
+
+REPORT_VERSION = 1
+
+# Error lists of the checks running now, innermost last (see collect_errors).
+_collectors = []
+
+# Returned by a check that cannot run here (e.g. the skill ships no schemas).
+# It is reported as skipped and does not fail the run.
+CHECK_SKIPPED = object()
+
+
+def reported_check(name):
+    """Registers a check under name and records it in the validator's report,
+    when it has one.
+
+    Checks the validator's CheckSelection (self.checks) leaves out are
+    skipped and pass, as are checks that return CHECK_SKIPPED. The check
+    still prints as before; the errors it hands over with print_errors() or
+    report_errors() are recorded with name as their error code.
+    """
+    CHECK_NAMES.add(name)
+
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self):
+            checks = self.checks
+            if checks is not None and not checks.should_run(name):
+                if self.report is not None:
+                    self.report.skip_check(self, name)
+                return True
+
+            if self.report is None:
+                passed = method(self)
+            else:
+                passed = self.report.run_check(
+                    self, name, functools.partial(method, self)
+                )
+            if passed is CHECK_SKIPPED:
+                passed = True
+            if checks is not None:
+                checks.record(name, passed)
+            return passed
+
+        return wrapper
+
+    return decorate
+
+
+def check_error(file, line, message):
+    """An error found by a check: the part it is in (or None), the line in
+    that part (or None) and what is wrong. Kept as a plain dict so that it can
+    be stored in the manifest and returned from worker processes."""
+    return {
+        "file": None if file is None else str(file),
+        "line": line,
+        "message": message,
+    }
+
+
+def format_error(error):
+    """The line printed for a check_error()."""
+    location = ""
+    if error["file"] is not None:
+        location += f"{error['file']}: "
+    if error["line"] is not None:
+        location += f"Line {error['line']}: "
+    return f"  {location}{error['message']}"
+
+
+def print_errors(errors):
+    """Prints errors one per line and hands them to the running check."""
+    for error in errors:
+        print(format_error(error))
+    report_errors(errors)
+
+
+def report_errors(errors):
+    """Hands errors to the running check without printing them, for checks
+    that print their own summary of them."""
+    for collected in _collectors:
+        collected.extend(errors)
+
+
+@contextlib.contextmanager
+def collect_errors():
+    """Collects the errors handed over while the block runs, including those
+    of checks nested in it, into the list it yields."""
+    errors = []
+    _collectors.append(errors)
+    try:
+        yield errors
+    finally:
+        _collectors.pop()
+
+
+def report_phase(report, name):
+    """Times a phase of the run into report, or does nothing without one."""
+    return report.phase(name) if report is not None else contextlib.nullcontext()
+
+
+class ValidationReport:
+    """Collects check results from one or more validators.
+
+    Parts and bytes are counted from the validator's ParsedPackage, so parts
+    parsed in --jobs worker processes or read outside the package (such as
+    the original file) are not included.
+    """
+
+    def __init__(self):
+        self.checks = []
+        self.timings = {}
+        self._active = None
+        self._start = time.perf_counter()
+
+    def run_check(self, validator, name, run):
+        if self._active is not None:
+            return run()
+
+        package = getattr(validator, "package", None)
+        if package is not None:
+            package.take_inspected()
+            bytes_before = package.bytes_parsed
+
+        output = io.StringIO()
+        self._active = name
+        start = time.perf_counter()
+        try:
+            with collect_errors() as errors, contextlib.redirect_stdout(output):
+                passed = run()
+        finally:
+            elapsed = time.perf_counter() - start
+            self._active = None
+            print(output.getvalue(), end="")
+
+        if passed is CHECK_SKIPPED:
+            status = "skipped"
+        elif passed is None:
+            status = "info"
+        else:
+            status = "passed" if passed else "failed"
+
+        self.checks.append(
+            {
+                "validator": type(validator).__name__,
+                "name": name,
+                "status": status,
+                "wall_time": round(elapsed, 6),
+                "parts_inspected": (
+                    len(package.take_inspected()) if package is not None else None
+                ),
+                "bytes_parsed": (
+                    package.bytes_parsed - bytes_before if package is not None else None
+                ),
+                "errors": (
+                    [
+                        _error(error["file"], error["line"], name, error["message"])
+                        for error in errors
+                    ]
+                    if status == "failed"
+                    else []
+                ),
+            }
+        )
+        return passed
+
+    def skip_check(self, validator, name):
+        if self._active is not None:
+            return
+        self.checks.append(
+            {
+                "validator": type(validator).__name__,
+                "name": name,
+                "status": "skipped",
+                "wall_time": 0.0,
+                "parts_inspected": 0,
+                "bytes_parsed": 0,
+                "errors": [],
+            }
+        )
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_timing(name, time.perf_counter() - start)
+
+    def add_timing(self, name, seconds):
+        self.timings[name] = round(self.timings.get(name, 0.0) + seconds, 6)
+
+    def to_dict(self, success):
+        timings = dict(self.timings)
+        timings["checks"] = round(sum(c["wall_time"] for c in self.checks), 6)
+        timings["total"] = round(time.perf_counter() - self._start, 6)
+        return {
+            "version": REPORT_VERSION,
+            "success": success,
+            "checks": self.checks,
+            "timings": timings,
+        }
+
+
+def _error(file, line, code, message):
+    return {"file": file, "line": line, "code": code, "message": message}
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -0,0 +1,657 @@
+"""
+Single-walk rule engine for element-level validation checks.
+"""
+
+import re
+
+from .report import check_error
+
+ALL_ELEMENTS = "*"
+
+MC_NAMESPACE = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+WORD_2006_NAMESPACE = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W14_NAMESPACE = "http://schemas.microsoft.com/office/word/2010/wordml"
+W16CID_NAMESPACE = "http://schemas.microsoft.com/office/word/2016/wordml/cid"
+XML_NAMESPACE = "http://www.w3.org/XML/1998/namespace"
+SPREADSHEET_NAMESPACE = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+
+
+def _local_name(clark_name):
+    return clark_name.rsplit("}", 1)[-1].lower()
+
+
+def _preview(text):
+    return repr(text)[:50] + "..." if len(repr(text)) > 50 else repr(text)
+
+
+class ElementRule:
+    """A check that is fed elements by RuleEngine instead of walking parts itself.
+
+    Rules register interest through start_tags, end_tags (Clark names, or
+    ALL_ELEMENTS) and attributes (Clark names). Text content is only
+    guaranteed to be complete in end handlers. A rule registered for
+    ALL_ELEMENTS can narrow that with accepts_start()/accepts_end(), which the
+    engine asks once per distinct tag and caches. Errors are collected in
+    errors as check_error() records.
+
+    part_result() and replay() let the engine reuse what a rule recorded for
+    an unchanged part instead of walking it again. The default records the
+    errors the part produced; rules with cross-part state override both.
+    Rules whose result for a part also depends on other parts name them in
+    dependencies(), so a change to any of them invalidates the result.
+    """
+
+    name = None
+    start_tags = ()
+    end_tags = ()
+    attributes = ()
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.errors = []
+        self.part = None
+        self._part_start = 0
+
+    def applies_to(self, relative_path):
+        return True
+
+    def dependencies(self, relative_path):
+        return ()
+
+    def accepts_start(self, tag):
+        return True
+
+    def accepts_end(self, tag):
+        return True
+
+    def begin_part(self, relative_path):
+        self.part = relative_path
+        self._part_start = len(self.errors)
+
+    def start(self, elem):
+        pass
+
+    def end(self, elem):
+        pass
+
+    def attribute(self, elem, attr_name, value):
+        pass
+
+    def finish_part(self, relative_path):
+        pass
+
+    def finish(self):
+        pass
+
+    def part_error(self, relative_path, error):
+        self.errors.append(check_error(relative_path, None, f"Error: {error}"))
+
+    def part_result(self):
+        return self.errors[self._part_start :]
+
+    def replay(self, relative_path, result):
+        self.errors.extend(result)
+
+    def _error(self, elem, message):
+        self.errors.append(check_error(self.part, elem.sourceline, message))
+
+
+class RuleEngine:
+    """Dispatches one start/end walk per part to every interested rule.
+
+    A rule whose handler raises is reported through part_error() and receives
+    no further events for that part, mirroring a per-file try/except.
+
+    Parts are given as (relative_path, load_events) pairs, where load_events
+    returns start/end events from lxml.etree.iterwalk over a parsed tree or
+    from a streaming iterparse. An error raised by the event source itself
+    (e.g. a syntax error half-way through a streamed part) is reported to every
+    rule still active and recorded in failed_parts.
+
+    With a results store (see ValidationManifest), rules replay what they
+    recorded for parts whose content is unchanged, and a part is only loaded
+    when at least one rule has to walk it.
+    """
+
+    def __init__(self, rules, results=None):
+        self.rules = list(rules)
+        self.results = results
+        self.walked_parts = set()
+        self.failed_parts = {}
+
+    def run(self, parts):
+        for relative_path, load_events in parts:
+            active = [rule for rule in self.rules if rule.applies_to(relative_path)]
+            if self.results is not None:
+                active = [
+                    rule for rule in active if not self._replay(rule, relative_path)
+                ]
+            if not active:
+                continue
+
+            try:
+                events = load_events()
+            except Exception as e:
+                for rule in active:
+                    rule.part_error(relative_path, e)
+                continue
+
+            self.walked_parts.add(relative_path)
+            try:
+                self.walk(relative_path, events, active)
+            except Exception as e:
+                self.failed_parts[relative_path] = e
+                continue
+
+            if self.results is not None:
+                for rule in active:
+                    self.results.put_part_result(
+                        rule.name,
+                        [relative_path, *rule.dependencies(relative_path)],
+                        rule.part_result(),
+                    )
+
+        for rule in self.rules:
+            rule.finish()
+
+    def _replay(self, rule, relative_path):
+        hit, result = self.results.get_part_result(
+            rule.name, [relative_path, *rule.dependencies(relative_path)]
+        )
+        if hit:
+            rule.replay(relative_path, result)
+        return hit
+
+    def walk(self, relative_path, events, rules):
+        rules = list(rules)
+        for rule in rules:
+            rule.begin_part(relative_path)
+
+        start_any, start_by_tag, by_attr, end_any, end_by_tag = self._tables(rules)
+        start_cache, end_cache = {}, {}
+
+        try:
+            for event, elem in events:
+                tag = elem.tag
+                failed = None
+
+                if event == "start":
+                    handlers = start_cache.get(tag)
+                    if handlers is None:
+                        handlers = start_cache[tag] = [
+                            (rule, handler)
+                            for rule, handler in start_any
+                            if rule.accepts_start(tag)
+                        ] + start_by_tag.get(tag, [])
+                    for rule, handler in handlers:
+                        try:
+                            handler(elem)
+                        except Exception as e:
+                            failed = (failed or []) + [(rule, e)]
+                    for attr_name, attr_handlers in by_attr:
+                        value = elem.get(attr_name)
+                        if value is None:
+                            continue
+                        for rule, handler in attr_handlers:
+                            try:
+                                handler(elem, attr_name, value)
+                            except Exception as e:
+                                failed = (failed or []) + [(rule, e)]
+                else:
+                    handlers = end_cache.get(tag)
+                    if handlers is None:
+                        handlers = end_cache[tag] = [
+                            (rule, handler)
+                            for rule, handler in end_any
+                            if rule.accepts_end(tag)
+                        ] + end_by_tag.get(tag, [])
+                    for rule, handler in handlers:
+                        try:
+                            handler(elem)
+                        except Exception as e:
+                            failed = (failed or []) + [(rule, e)]
+
+                if failed:
+                    for rule, error in failed:
+                        if rule in rules:
+                            rule.part_error(relative_path, error)
+                            rules.remove(rule)
+                    start_any, start_by_tag, by_attr, end_any, end_by_tag = (
+                        self._tables(rules)
+                    )
+                    start_cache, end_cache = {}, {}
+        except Exception as e:
+            # Handler errors are caught above, so this came from the event source.
+            for rule in rules:
+                rule.part_error(relative_path, e)
+            raise
+
+        for rule in rules:
+            rule.finish_part(relative_path)
+
+    @staticmethod
+    def _tables(rules):
+        start_any, start_by_tag, end_any, end_by_tag = [], {}, [], {}
+        by_attr = {}
+
+        for rule in rules:
+            for tag in rule.start_tags:
+                if tag == ALL_ELEMENTS:
+                    start_any.append((rule, rule.start))
+                else:
+                    start_by_tag.setdefault(tag, []).append((rule, rule.start))
+            for tag in rule.end_tags:
+                if tag == ALL_ELEMENTS:
+                    end_any.append((rule, rule.end))
+                else:
+                    end_by_tag.setdefault(tag, []).append((rule, rule.end))
+            for attr_name in rule.attributes:
+                by_attr.setdefault(attr_name, []).append((rule, rule.attribute))
+
+        return start_any, start_by_tag, list(by_attr.items()), end_any, end_by_tag
+
+
+class UniqueIdRule(ElementRule):
+    """Checks ID uniqueness in a single descent.
+
+    mc:AlternateContent and EXCLUDED_ID_CONTAINERS subtrees are tracked with
+    depth counters instead of ancestor scans. Each Clark-notation tag or
+    attribute name is lowered to its local name once per run, and only tags
+    that matter reach start()/end() at all.
+    """
+
+    name = "unique_ids"
+    start_tags = (ALL_ELEMENTS,)
+    end_tags = (ALL_ELEMENTS,)
+
+    ALTERNATE_CONTENT = f"{{{MC_NAMESPACE}}}AlternateContent"
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.requirements = validator.UNIQUE_ID_REQUIREMENTS
+        self.excluded_containers = validator.EXCLUDED_ID_CONTAINERS
+        self.global_ids = {}
+        self.file_ids = {}
+        self.mc_depth = 0
+        self.excluded_depth = 0
+        self.events = []
+        self._tags = {}
+        self._attr_names = {}
+
+    def begin_part(self, relative_path):
+        super().begin_part(relative_path)
+        self.file_ids = {}
+        self.mc_depth = 0
+        self.excluded_depth = 0
+        self.events = []
+
+    def accepts_start(self, tag_key):
+        if tag_key == self.ALTERNATE_CONTENT:
+            return True
+        _, excluded, requirement = self._tag_info(tag_key)
+        return excluded or requirement is not None
+
+    def accepts_end(self, tag_key):
+        return tag_key == self.ALTERNATE_CONTENT or self._tag_info(tag_key)[1]
+
+    def start(self, elem):
+        tag_key = elem.tag
+        if tag_key == self.ALTERNATE_CONTENT:
+            self.mc_depth += 1
+            return
+
+        tag, excluded, requirement = self._tags[tag_key]
+
+        if excluded:
+            self.excluded_depth += 1
+        if requirement is None or self.mc_depth:
+            return
+        if self.excluded_depth > excluded:
+            return
+
+        attr_name, scope = requirement
+
+        id_value = None
+        attr_names = self._attr_names
+        for attr, value in elem.attrib.items():
+            attr_local = attr_names.get(attr)
+            if attr_local is None:
+                attr_local = attr_names[attr] = _local_name(attr)
+            if attr_local == attr_name:
+                id_value = value
+                break
+
+        if id_value is None:
+            return
+
+        if scope == "global":
+            self._record(["global", id_value, elem.sourceline, tag])
+        elif scope == "file":
+            ids = self.file_ids.setdefault((tag, attr_name), {})
+            if id_value in ids:
+                self._record(
+                    [
+                        "error",
+                        check_error(
+                            self.part,
+                            elem.sourceline,
+                            f"Duplicate {attr_name}='{id_value}' in <{tag}> "
+                            f"(first occurrence at line {ids[id_value]})",
+                        ),
+                    ]
+                )
+            else:
+                ids[id_value] = elem.sourceline
+
+    def end(self, elem):
+        if elem.tag == self.ALTERNATE_CONTENT:
+            self.mc_depth -= 1
+        else:
+            self.excluded_depth -= 1
+
+    def _tag_info(self, tag_key):
+        info = self._tags.get(tag_key)
+        if info is None:
+            tag = _local_name(tag_key)
+            info = self._tags[tag_key] = (
+                tag,
+                tag in self.excluded_containers,
+                self.requirements.get(tag),
+            )
+        return info
+
+    def part_error(self, relative_path, error):
+        self._record(["error", check_error(relative_path, None, f"Error: {error}")])
+
+    def part_result(self):
+        return list(self.events)
+
+    def replay(self, relative_path, result):
+        for event in result:
+            self._apply(relative_path, event)
+
+    def _record(self, event):
+        self.events.append(event)
+        self._apply(self.part, event)
+
+    def _apply(self, relative_path, event):
+        if event[0] == "error":
+            self.errors.append(event[1])
+            return
+
+        _, id_value, line, tag = event
+        if id_value in self.global_ids:
+            prev_file, prev_line, prev_tag = self.global_ids[id_value]
+            self.errors.append(
+                check_error(
+                    relative_path,
+                    line,
+                    f"Global ID '{id_value}' in <{tag}> "
+                    f"already used in {prev_file} at line {prev_line} in <{prev_tag}>",
+                )
+            )
+        else:
+            self.global_ids[id_value] = (relative_path, line, tag)
+
+
+class IdConstraintRule(ElementRule):
+
+    name = "id_constraints"
+    attributes = (
+        f"{{{W14_NAMESPACE}}}paraId",
+        f"{{{W16CID_NAMESPACE}}}durableId",
+    )
+
+    def attribute(self, elem, attr_name, value):
+        if not value:
+            return
+
+        parse_id_value = self.validator._parse_id_value
+
+        if attr_name == self.attributes[0]:
+            if parse_id_value(value, base=16) >= 0x80000000:
+                self._error(elem, f"paraId={value} >= 0x80000000")
+        elif self.part.name == "numbering.xml":
+            try:
+                if parse_id_value(value, base=10) >= 0x7FFFFFFF:
+                    self._error(elem, f"durableId={value} >= 0x7FFFFFFF")
+            except ValueError:
+                self._error(elem, f"durableId={value} must be decimal in numbering.xml")
+        elif parse_id_value(value, base=16) >= 0x7FFFFFFF:
+            self._error(elem, f"durableId={value} >= 0x7FFFFFFF")
+
+    def part_error(self, relative_path, error):
+        pass
+
+
+class UuidIdRule(ElementRule):
+
+    name = "uuid_ids"
+    start_tags = (ALL_ELEMENTS,)
+
+    UUID_PATTERN = re.compile(
+        r"^[\{\(]?[0-9A-Fa-f]{8}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{4}-?[0-9A-Fa-f]{12}[\}\)]?$"
+    )
+
+    def start(self, elem):
+        for attr, value in elem.attrib.items():
+            attr_name = attr.split("}")[-1].lower()
+            if attr_name == "id" or attr_name.endswith("id"):
+                if self.validator._looks_like_uuid(value):
+                    if not self.UUID_PATTERN.match(value):
+                        self._error(
+                            elem,
+                            f"ID '{value}' appears to be a UUID but contains invalid hex characters",
+                        )
+
+
+class DocumentRule(ElementRule):
+
+    def applies_to(self, relative_path):
+        return relative_path.name == "document.xml"
+
+
+class WhitespacePreservationRule(DocumentRule):
+
+    name = "whitespace_preservation"
+    end_tags = (f"{{{WORD_2006_NAMESPACE}}}t",)
+
+    WHITESPACE_EDGE = re.compile(r"^[ \t\n\r]|[ \t\n\r]$")
+
+    def end(self, elem):
+        text = elem.text
+        if not text or not self.WHITESPACE_EDGE.search(text):
+            return
+
+        if elem.get(f"{{{XML_NAMESPACE}}}space") != "preserve":
+            self._error(
+                elem,
+                f"w:t element with whitespace missing xml:space='preserve': {_preview(text)}",
+            )
+
+
+class DeletionRule(DocumentRule):
+
+    name = "deletions"
+    start_tags = (f"{{{WORD_2006_NAMESPACE}}}del",)
+    end_tags = (
+        f"{{{WORD_2006_NAMESPACE}}}del",
+        f"{{{WORD_2006_NAMESPACE}}}t",
+        f"{{{WORD_2006_NAMESPACE}}}instrText",
+    )
+
+    def __init__(self, validator):
+        super().__init__(validator)
+        self.del_depth = 0
+        self.text_errors = []
+        self.instr_errors = []
+
+    def begin_part(self, relative_path):
+        super().begin_part(relative_path)
+        self.del_depth = 0
+
+    def start(self, elem):
+        self.del_depth += 1
+
+    def end(self, elem):
+        tag = elem.tag
+        if tag == self.start_tags[0]:
+            self.del_depth -= 1
+        elif not self.del_depth:
+            return
+        elif tag == self.end_tags[1]:
+            if elem.text:
+                self.text_errors.append(
+                    check_error(
+                        self.part,
+                        elem.sourceline,
+                        f"<w:t> found within <w:del>: {_preview(elem.text)}",
+                    )
+                )
+        else:
+            self.instr_errors.append(
+                check_error(
+                    self.part,
+                    elem.sourceline,
+                    f"<w:instrText> found within <w:del> (use <w:delInstrText>): {_preview(elem.text or '')}",
+                )
+            )
+
+    def finish_part(self, relative_path):
+        self.errors.extend(self.text_errors + self.instr_errors)
+        self.text_errors, self.instr_errors = [], []
+
+    def part_error(self, relative_path, error):
+        self.finish_part(relative_path)
+        super().part_error(relative_path, error)
+
+
+class InsertionRule(DocumentRule):
+
+    name = "insertions"
+    start_tags = (
+        f"{{{WORD_2006_NAMESPACE}}}ins",
+        f"{{{WORD_2006_NAMESPACE}}}del",
+    )
+    end_tags = start_tags + (f"{{{WORD_2006_NAMESPACE}}}delText",)
+
+    def begin_part(self, relative_path):
+        super().begin_part(relative_path)
+        self.depth = {tag: 0 for tag in self.start_tags}
+
+    def start(self, elem):
+        self.depth[elem.tag] += 1
+
+    def end(self, elem):
+        if elem.tag in self.depth:
+            self.depth[elem.tag] -= 1
+            return
+
+        ins_tag, del_tag = self.start_tags
+        if self.depth[ins_tag] and not self.depth[del_tag]:
+            self._error(elem, f"<w:delText> within <w:ins>: {_preview(elem.text or '')}")
+
+
+class WorksheetRule(ElementRule):
+
+    def applies_to(self, relative_path):
+        return self.validator._is_worksheet(relative_path)
+
+    def dependencies(self, relative_path):
+        return self.validator._workbook_dependencies(self.related_part)
+
+
+class SharedStringIndexRule(WorksheetRule):
+
+    name = "shared_string_indices"
+    end_tags = (f"{{{SPREADSHEET_NAMESPACE}}}v",)
+    related_part = "sharedStrings"
+
+    CELL = f"{{{SPREADSHEET_NAMESPACE}}}c"
+
+    def begin_part(self, relative_path):
+        super().begin_part(relative_path)
+        self.shared_strings, self.count = self.validator._shared_string_count()
+
+    def end(self, elem):
+        cell = elem.getparent()
+        if cell is None or cell.tag != self.CELL or cell.get("t") != "s":
+            return
+        if self.count is None:
+            return
+
+        value = (elem.text or "").strip()
+        if value.isdigit() and int(value) < self.count:
+            return
+
+        if self.shared_strings is None:
+            problem = "but the workbook has no shared strings part"
+        else:
+            problem = f"but {self.shared_strings} has {self.count} entries"
+        self._error(
+            elem,
+            f"Cell {cell.get('r', '?')} references shared string {value!r}, {problem}",
+        )
+
+
+class StyleIndexRule(WorksheetRule):
+
+    name = "style_indices"
+    start_tags = (
+        f"{{{SPREADSHEET_NAMESPACE}}}c",
+        f"{{{SPREADSHEET_NAMESPACE}}}row",
+        f"{{{SPREADSHEET_NAMESPACE}}}col",
+    )
+    related_part = "styles"
+
+    STYLE_ATTRIBUTES = dict(zip(start_tags, ("s", "s", "style")))
+
+    def begin_part(self, relative_path):
+        super().begin_part(relative_path)
+        self.styles, self.count = self.validator._cell_style_count()
+
+    def start(self, elem):
+        attr_name = self.STYLE_ATTRIBUTES[elem.tag]
+        value = elem.get(attr_name)
+        if value is None or self.count is None:
+            return
+        # Style 0 is the default and is accepted even without a cellXfs entry.
+        if value.isdigit() and int(value) < max(self.count, 1):
+            return
+
+        self._error(
+            elem,
+            f"<{_local_name(elem.tag)}> {attr_name}={value!r} is outside the "
+            f"{self.count} cell format(s) in {self.styles or 'the workbook styles'}",
+        )
+
+
+class CalcChainRule(WorksheetRule):
+
+    name = "calc_chain"
+    end_tags = (f"{{{SPREADSHEET_NAMESPACE}}}f",)
+    related_part = "calcChain"
+
+    def begin_part(self, relative_path):
+        super().begin_part(relative_path)
+        self.calc_chain, cells = self.validator._calc_chain_cells()
+        self.pending = dict(cells.get(relative_path, {}))
+
+    def end(self, elem):
+        if self.pending:
+            self.pending.pop(elem.getparent().get("r"), None)
+
+    def finish_part(self, relative_path):
+        for ref, line in self.pending.items():
+            self.errors.append(
+                check_error(
+                    self.calc_chain,
+                    line,
+                    f"Entry for {relative_path} cell {ref} has no formula in the sheet",
+                )
+            )
+        self.pending = {}
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
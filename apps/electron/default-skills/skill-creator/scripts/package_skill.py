@@ -8,6 +8,11 @@ Usage:
 Example:
     python utils/package_skill.py skills/public/my-skill
     python utils/package_skill.py skills/public/my-skill ./dist
+
+Already-compressed media (images, video, audio, archives, Office files) is
+stored as it is; everything else is deflated. Files are added in sorted order
+with a fixed timestamp, so packaging an unchanged skill gives a byte-identical
+.skill file.
 """
 
 import sys
@@ -15,14 +20,39 @@ import zipfile
 from pathlib import Path
 from quick_validate import validate_skill
 
+# Formats that are already compressed; deflating them again saves next to nothing
+STORED_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".webp",
+    ".mp4", ".m4v", ".mov", ".webm", ".mp3", ".m4a", ".ogg",
+    ".zip", ".gz", ".tgz", ".bz2", ".xz", ".skill",
+    ".docx", ".xlsx", ".pptx", ".woff", ".woff2",
+})
+
+# Same timestamp and permissions for every entry, so the output depends only on the files
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_EXTERNAL_ATTR = 0o100644 << 16
+
+
+def _zip_info(arcname):
+    """Build the entry for one file, stored or deflated by its extension."""
+    info = zipfile.ZipInfo(arcname.as_posix(), ZIP_DATE_TIME)
+    info.create_system = 3
+    info.external_attr = ZIP_EXTERNAL_ATTR
+    if arcname.suffix.lower() in STORED_EXTENSIONS:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
 
-def package_skill(skill_path, output_dir=None):
+def package_skill(skill_path, output_dir=None, compress_level=None):
     """
     Package a skill folder into a .skill file.
 
     Args:
         skill_path: Path to the skill folder
         output_dir: Optional output directory for the .skill file (defaults to current directory)
+        compress_level: Deflate level 0-9 for files that are not already compressed (defaults to zlib's)
 
     Returns:
         Path to the created .skill file, or None if error
@@ -66,12 +96,17 @@ def package_skill(skill_path, output_dir=None):
     # Create the .skill file (zip format)
     try:
         with zipfile.ZipFile(skill_filename, 'w', zipfile.ZIP_DEFLATED) as zipf:
-            # Walk through the skill directory
-            for file_path in skill_path.rglob('*'):
-                if file_path.is_file():
+            # Walk through the skill directory in a fixed order, skipping the
+            # .skill file itself when it is written inside the folder
+            for file_path in sorted(skill_path.rglob('*')):
+                if file_path.is_file() and file_path != skill_filename:
                     # Calculate the relative path within the zip
                     arcname = file_path.relative_to(skill_path.parent)
-                    zipf.write(file_path, arcname)
+                    zipf.writestr(
+                        _zip_info(arcname),
+                        file_path.read_bytes(),
+                        compresslevel=compress_level,
+                    )
                     print(f"  Added: {arcname}")
 
         print(f"\n✅ Successfully packaged skill to: {skill_filename}")
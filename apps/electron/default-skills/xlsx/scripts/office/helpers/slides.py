@@ -0,0 +1,143 @@
+"""Add a slide to the parts of a PPTX package.
+
+The source is either a slide (e.g. slide2.xml), which is duplicated without its
+notes, or a layout (e.g. slideLayout2.xml), from which an empty slide is
+created. The slide is registered in [Content_Types].xml and
+presentation.xml.rels; the caller adds the returned <p:sldId> to
+presentation.xml.
+"""
+
+import re
+
+SLIDES_DIR = "ppt/slides"
+LAYOUTS_DIR = "ppt/slideLayouts"
+
+SLIDE_XML = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<p:sld xmlns:a="http://schemas.openxmlformats.org/drawingml/2006/main" xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships" xmlns:p="http://schemas.openxmlformats.org/presentationml/2006/main">
+  <p:cSld>
+    <p:spTree>
+      <p:nvGrpSpPr>
+        <p:cNvPr id="1" name=""/>
+        <p:cNvGrpSpPr/>
+        <p:nvPr/>
+      </p:nvGrpSpPr>
+      <p:grpSpPr>
+        <a:xfrm>
+          <a:off x="0" y="0"/>
+          <a:ext cx="0" cy="0"/>
+          <a:chOff x="0" y="0"/>
+          <a:chExt cx="0" cy="0"/>
+        </a:xfrm>
+      </p:grpSpPr>
+    </p:spTree>
+  </p:cSld>
+  <p:clrMapOvr>
+    <a:masterClrMapping/>
+  </p:clrMapOvr>
+</p:sld>'''
+
+SLIDE_RELS_XML = '''<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+  <Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/slideLayout" Target="../slideLayouts/{layout_file}"/>
+</Relationships>'''
+
+
+def add_slide(package, source: str) -> tuple[str, str]:
+    """Returns (new slide file name, message), or ("", error message)."""
+    if parse_source(source)[0] == "layout":
+        return create_slide_from_layout(package, source)
+    return duplicate_slide(package, source)
+
+
+def parse_source(source: str) -> tuple[str, str | None]:
+    if source.startswith("slideLayout") and source.endswith(".xml"):
+        return ("layout", source)
+
+    return ("slide", None)
+
+
+def get_next_slide_number(package) -> int:
+    existing = [int(m.group(1)) for name in package.glob(f"{SLIDES_DIR}/slide*.xml")
+                if (m := re.match(r"slide(\d+)\.xml", name.rpartition("/")[2]))]
+    return max(existing) + 1 if existing else 1
+
+
+def create_slide_from_layout(package, layout_file: str) -> tuple[str, str]:
+    layout_part = f"{LAYOUTS_DIR}/{layout_file}"
+    if not package.has_part(layout_part):
+        return "", f"Error: {package.path / layout_part} not found"
+
+    dest = f"slide{get_next_slide_number(package)}.xml"
+    package.write_text(f"{SLIDES_DIR}/{dest}", SLIDE_XML)
+    package.write_text(
+        f"{SLIDES_DIR}/_rels/{dest}.rels",
+        SLIDE_RELS_XML.format(layout_file=layout_file),
+    )
+
+    return dest, _register_slide(package, dest, layout_file)
+
+
+def duplicate_slide(package, source: str) -> tuple[str, str]:
+    source_part = f"{SLIDES_DIR}/{source}"
+    if not package.has_part(source_part):
+        return "", f"Error: {package.path / source_part} not found"
+
+    dest = f"slide{get_next_slide_number(package)}.xml"
+    package.write_bytes(f"{SLIDES_DIR}/{dest}", package.read_bytes(source_part))
+
+    source_rels = f"{SLIDES_DIR}/_rels/{source}.rels"
+    if package.has_part(source_rels):
+        rels_content = re.sub(
+            r'\s*<Relationship[^>]*Type="[^"]*notesSlide"[^>]*/>\s*',
+            "\n",
+            package.read_text(source_rels),
+        )
+        package.write_text(f"{SLIDES_DIR}/_rels/{dest}.rels", rels_content)
+
+    return dest, _register_slide(package, dest, source)
+
+
+def _register_slide(package, dest: str, source: str) -> str:
+    _add_to_content_types(package, dest)
+
+    rid = _add_to_presentation_rels(package, dest)
+
+    next_slide_id = _get_next_slide_id(package)
+
+    return (
+        f"Created {dest} from {source}\n"
+        f'Add to presentation.xml <p:sldIdLst>: <p:sldId id="{next_slide_id}" r:id="{rid}"/>'
+    )
+
+
+def _add_to_content_types(package, dest: str) -> None:
+    content_types = package.read_text("[Content_Types].xml")
+
+    new_override = f'<Override PartName="/ppt/slides/{dest}" ContentType="application/vnd.openxmlformats-officedocument.presentationml.slide+xml"/>'
+
+    if f"/ppt/slides/{dest}" not in content_types:
+        content_types = content_types.replace("</Types>", f"  {new_override}\n</Types>")
+        package.write_text("[Content_Types].xml", content_types)
+
+
+def _add_to_presentation_rels(package, dest: str) -> str:
+    pres_rels_part = "ppt/_rels/presentation.xml.rels"
+    pres_rels = package.read_text(pres_rels_part)
+
+    rids = [int(m) for m in re.findall(r'Id="rId(\d+)"', pres_rels)]
+    next_rid = max(rids) + 1 if rids else 1
+    rid = f"rId{next_rid}"
+
+    new_rel = f'<Relationship Id="{rid}" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/slide" Target="slides/{dest}"/>'
+
+    if f"slides/{dest}" not in pres_rels:
+        pres_rels = pres_rels.replace("</Relationships>", f"  {new_rel}\n</Relationships>")
+        package.write_text(pres_rels_part, pres_rels)
+
+    return rid
+
+
+def _get_next_slide_id(package) -> int:
+    pres_content = package.read_text("ppt/presentation.xml")
+    slide_ids = [int(m) for m in re.findall(r'<p:sldId[^>]*id="(\d+)"', pres_content)]
+    return max(slide_ids) + 1 if slide_ids else 256
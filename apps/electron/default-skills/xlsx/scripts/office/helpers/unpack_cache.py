@@ -0,0 +1,197 @@
+"""Cache of fully processed unpacked trees, keyed by the source archive.
+
+An entry holds the files unpack.py wrote for one archive (after pretty-printing,
+redline simplification, run merging and smart-quote escaping), keyed by the
+archive's SHA-256, the unpack options and the unpack code itself. Later unpacks
+of the same archive materialize the entry instead of processing it again.
+
+Files are copied into and out of the cache as reflinks (copy-on-write clones)
+where the filesystem supports them, and as plain copies otherwise. They are
+never hardlinked, so editing one unpacked tree cannot change the cache or
+another tree unpacked from the same entry. Each entry records the size and
+mtime of its files, and an entry whose files were modified is discarded
+instead of served.
+
+Entries live under $OFFICE_VALIDATOR_CACHE_DIR/unpack (default:
+~/.cache/office-validators/unpack). The cache is capped at
+$OFFICE_UNPACK_CACHE_MAX_MB megabytes (default 1024); the least recently used
+entries are evicted first.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+from pathlib import Path
+
+from validators.baseline import default_cache_dir, file_sha256
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+CACHE_VERSION = 1
+ENTRY_FILE = "entry.json"
+TREE_DIR = "tree"
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+
+# Linux FICLONE ioctl: clone a whole file's extents (btrfs, XFS, overlayfs...).
+_FICLONE = 0x40049409
+
+
+def _code_fingerprint():
+    digest = hashlib.sha256()
+    script_dir = Path(__file__).resolve().parent.parent
+    modules = [script_dir / "unpack.py", *sorted(Path(__file__).parent.glob("*.py"))]
+    for module in modules:
+        digest.update(module.name.encode())
+        digest.update(module.read_bytes())
+    return digest.hexdigest()
+
+
+class UnpackCache:
+
+    def __init__(self, cache_dir=None, max_bytes=None):
+        self.root = (Path(cache_dir) if cache_dir else default_cache_dir()) / "unpack"
+        if max_bytes is None:
+            max_mb = os.environ.get("OFFICE_UNPACK_CACHE_MAX_MB")
+            max_bytes = int(max_mb) * 1024 * 1024 if max_mb else DEFAULT_MAX_BYTES
+        self.max_bytes = max_bytes
+
+    def key(self, input_file, **options):
+        identity = [
+            str(CACHE_VERSION),
+            file_sha256(input_file),
+            Path(input_file).suffix.lower(),
+            _code_fingerprint(),
+            *(f"{name}={options[name]}" for name in sorted(options)),
+        ]
+        return hashlib.sha256("\0".join(identity).encode()).hexdigest()
+
+    def materialize(self, key, output_dir):
+        """Recreates entry key under output_dir and returns its stored details,
+        or None when there is no usable entry."""
+        entry_dir = self.root / key
+        try:
+            entry = json.loads((entry_dir / ENTRY_FILE).read_text(encoding="utf-8"))
+            if entry.get("version") != CACHE_VERSION:
+                return None
+
+            tree = entry_dir / TREE_DIR
+            for name, (size, mtime_ns) in entry["files"].items():
+                stat = (tree / name).stat()
+                if (stat.st_size, stat.st_mtime_ns) != (size, mtime_ns):
+                    self._discard(entry_dir)
+                    return None
+
+            output_dir = Path(output_dir)
+            for name in entry["dirs"]:
+                (output_dir / name).mkdir(parents=True, exist_ok=True)
+            for name in entry["files"]:
+                target = output_dir / name
+                target.parent.mkdir(parents=True, exist_ok=True)
+                _copy(tree / name, target)
+
+            os.utime(entry_dir / ENTRY_FILE)
+            return entry["details"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def store(self, key, output_dir, files, dirs, details):
+        """Adds the given files and directories (paths relative to output_dir)
+        as entry key, then evicts entries over the size cap."""
+        output_dir = Path(output_dir)
+        entry_dir = self.root / key
+        try:
+            size = sum((output_dir / name).stat().st_size for name in files)
+            if size > self.max_bytes or entry_dir.exists():
+                return
+
+            self.root.mkdir(parents=True, exist_ok=True)
+            staging = Path(tempfile.mkdtemp(dir=self.root, prefix=".staging-"))
+            try:
+                tree = staging / TREE_DIR
+                recorded = {}
+                for name in files:
+                    target = tree / name
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    _copy(output_dir / name, target)
+                    stat = target.stat()
+                    recorded[name] = [stat.st_size, stat.st_mtime_ns]
+                for name in dirs:
+                    (tree / name).mkdir(parents=True, exist_ok=True)
+
+                (staging / ENTRY_FILE).write_text(
+                    json.dumps(
+                        {
+                            "version": CACHE_VERSION,
+                            "size": size,
+                            "details": details,
+                            "files": recorded,
+                            "dirs": sorted(dirs),
+                        }
+                    ),
+                    encoding="utf-8",
+                )
+                os.rename(staging, entry_dir)
+            except OSError:
+                shutil.rmtree(staging, ignore_errors=True)
+                return
+
+            self.evict()
+        except OSError:
+            pass
+
+    def evict(self):
+        """Removes least recently used entries until the cache fits its cap."""
+        entries = []
+        for entry_dir in self.root.iterdir():
+            try:
+                entry_file = entry_dir / ENTRY_FILE
+                size = json.loads(entry_file.read_text(encoding="utf-8"))["size"]
+                entries.append((entry_file.stat().st_mtime, size, entry_dir))
+            except (OSError, ValueError, KeyError, TypeError):
+                continue
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, entry_dir in sorted(entries, key=lambda e: e[0]):
+            if total <= self.max_bytes:
+                break
+            self._discard(entry_dir)
+            total -= size
+
+    def _discard(self, entry_dir):
+        # Renamed away first so a concurrent reader never sees half an entry.
+        doomed = entry_dir.with_name(f".evicted-{entry_dir.name}-{os.getpid()}")
+        try:
+            os.rename(entry_dir, doomed)
+        except OSError:
+            return
+        shutil.rmtree(doomed, ignore_errors=True)
+
+
+def _copy(source, target):
+    # An existing target is replaced rather than written through, in case it
+    # is a link to another file.
+    if target.exists() or target.is_symlink():
+        target.unlink()
+    if not _reflink(source, target):
+        shutil.copyfile(source, target)
+
+
+def _reflink(source, target):
+    if fcntl is None:
+        return False
+    try:
+        with open(source, "rb") as src, open(target, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), _FICLONE, src.fileno())
+        return True
+    except OSError:
+        target.unlink(missing_ok=True)
+        return False
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -1,9 +1,33 @@
 """Pack a directory into a DOCX, PPTX, or XLSX file.
 
 Validates with auto-repair, condenses XML formatting, and creates the Office file.
+Each part is read once: XML parts are condensed in memory and written straight
+into the archive, other parts are copied into it as they are. --jobs also
+spreads the condensing over worker processes; the archive is the same either way.
+
+With --original, parts whose content matches a member of the original archive
+(same size and CRC-32, e.g. media, fonts and untouched slides) are copied as
+that member's compressed bytes, without decompressing or recompressing them.
+Only changed parts, and members the original compressed other than as below,
+are compressed again. --reuse-original false turns this off.
+
+Already-compressed media (PNG, JPEG, GIF, MP4, audio, embedded packages, ...) is
+stored rather than deflated again; XML and other parts are deflated at
+--compress-level. Entries are written in a fixed order ([Content_Types].xml, then
+by name) with a fixed timestamp and attributes, so packing the same parts again
+gives a byte-identical file.
+
+pack() is a thin wrapper over office_package.OfficePackage: it opens the
+directory, validates it, and packs it with write_package().
 
 Usage:
     python pack.py <input_directory> <output_file> [--original <file>] [--validate true|false]
+                   [--jobs N] [--incremental true|false] [--reuse-original true|false]
+                   [--compress-level 0-9] [--format text|json]
+
+--format json prints a JSON report on stdout (validation checks with timings and
+errors, the pack message, and setup/repair/validate/condense/zip phase
+times); the usual text output moves to stderr.
 
 Examples:
     python pack.py unpacked/ output.docx --original input.docx
@@ -11,15 +35,55 @@ Examples:
 """
 
 import argparse
-import sys
+import json
+import os
 import shutil
-import tempfile
+import struct
+import sys
 import zipfile
-from pathlib import Path
-
-import defusedxml.minidom
-
-from validators import DOCXSchemaValidator, PPTXSchemaValidator, RedliningValidator
+import zlib
+from pathlib import Path, PurePosixPath
+
+import lxml.etree
+
+from helpers.parallel import map_parts
+from office_package import OfficePackage
+from validators import ValidationReport
+from validators.repairs import parse_for_repair
+from validators.report import report_phase
+
+XML_DECLARATION = b'<?xml version="1.0" encoding="UTF-8"?>'
+
+COPY_CHUNK_SIZE = 1024 * 1024
+
+# ZipInfo.flag_bits: encrypted member, and sizes in a trailing data descriptor.
+_FLAG_ENCRYPTED = 0x1
+_FLAG_DATA_DESCRIPTOR = 0x8
+
+# Undocumented ZipFile attributes that _copy_raw_member() writes through. They
+# are the ones ZipFile.write() itself maintains and are unchanged from Python
+# 3.6 to 3.13; without them members are recompressed instead.
+_RAW_COPY_ATTRIBUTES = ("fp", "filelist", "NameToInfo", "start_dir")
+
+# Parts in formats that are already compressed. Deflating them again costs CPU
+# for a saving of a few bytes, so they are stored. EMF and WMF are not listed:
+# they are uncompressed and deflate well (their compressed forms, EMZ and WMZ,
+# are).
+STORED_EXTENSIONS = frozenset({
+    ".png", ".jpg", ".jpeg", ".jpe", ".jfif", ".gif", ".webp", ".wdp", ".jxr",
+    ".mp4", ".m4v", ".mov", ".wmv", ".avi", ".mpg", ".mpeg", ".webm",
+    ".mp3", ".m4a", ".aac", ".wma", ".ogg", ".oga", ".flac",
+    ".emz", ".wmz", ".zip", ".gz",
+    ".docx", ".docm", ".xlsx", ".xlsm", ".pptx", ".pptm",
+    ".woff", ".woff2",
+})
+
+# Written to every entry, so that the archive depends only on the parts.
+ZIP_DATE_TIME = (1980, 1, 1, 0, 0, 0)
+ZIP_CREATE_SYSTEM = 3  # Unix, for the permissions below
+ZIP_EXTERNAL_ATTR = 0o100644 << 16  # regular file, rw-r--r--
+
+CONTENT_TYPES_PART = "[Content_Types].xml"
 
 def pack(
     input_directory: str,
@@ -27,6 +91,11 @@ def pack(
     original_file: str | None = None,
     validate: bool = True,
     infer_author_func=None,
+    jobs: int = 1,
+    incremental: bool = True,
+    report: ValidationReport | None = None,
+    reuse_original: bool = True,
+    compress_level: int | None = None,
 ) -> tuple[None, str]:
     input_dir = Path(input_directory)
     output_path = Path(output_file)
@@ -38,96 +107,327 @@ def pack(
     if suffix not in {".docx", ".pptx", ".xlsx"}:
         return None, f"Error: {output_file} must be a .docx, .pptx, or .xlsx file"
 
-    if validate and original_file:
-        original_path = Path(original_file)
-        if original_path.exists():
-            success, output = _run_validation(
-                input_dir, original_path, suffix, infer_author_func
+    package = OfficePackage.open(input_dir)
+    try:
+        if validate and original_file:
+            original_path = Path(original_file)
+            if original_path.exists():
+                author = "Claude"
+                if infer_author_func:
+                    try:
+                        author = infer_author_func(input_dir, original_path)
+                    except ValueError as e:
+                        print(
+                            f"Warning: {e} Using default author 'Claude'.",
+                            file=sys.stderr,
+                        )
+                success, output = package.validate(
+                    original_path,
+                    author=author,
+                    jobs=jobs,
+                    incremental=incremental,
+                    report=report,
+                )
+                # Auto-repairs are kept in the directory, as when validating it.
+                package.save()
+                if output:
+                    print(output)
+                if not success:
+                    return None, f"Error: Validation failed for {input_dir}"
+
+        return package.pack(
+            output_file, original_file, jobs, report, reuse_original, compress_level
+        )
+    finally:
+        package.close()
+
+
+def write_package(
+    output_file: str,
+    parts: list,
+    original_file: str | None = None,
+    jobs: int = 1,
+    report: ValidationReport | None = None,
+    compress_level: int | None = None,
+) -> int:
+    """Writes parts into output_file and returns how many were copied unchanged
+    from original_file.
+
+    parts is a list of (arcname, content) pairs. content is a file to read,
+    bytes held in memory, or None for the member of original_file with that
+    name, copied as it is stored. XML parts from files and bytes are condensed.
+    Parts are written in entry order (see _entry_order) and compressed as
+    _zip_info() says; compress_level is the deflate level (zlib's default when
+    None).
+    The archive is written next to output_file and moved into place once
+    complete, so a part that fails to parse leaves any existing output file
+    untouched.
+    """
+    output_path = Path(output_file)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    partial_path = output_path.with_name(f".{output_path.name}.partial")
+    original_zip = _open_original(original_file)
+    parts = sorted(
+        (
+            (PurePosixPath(arcname), content)
+            for arcname, content in parts
+            if not (
+                isinstance(content, Path)
+                and content.resolve() == partial_path.resolve()
             )
-            if output:
-                print(output)
-            if not success:
-                return None, f"Error: Validation failed for {input_dir}"
-
-    with tempfile.TemporaryDirectory() as temp_dir:
-        temp_content_dir = Path(temp_dir) / "content"
-        shutil.copytree(input_dir, temp_content_dir)
-
-        for pattern in ["*.xml", "*.rels"]:
-            for xml_file in temp_content_dir.rglob(pattern):
-                _condense_xml(xml_file)
-
-        output_path.parent.mkdir(parents=True, exist_ok=True)
-        with zipfile.ZipFile(output_path, "w", zipfile.ZIP_DEFLATED) as zf:
-            for f in temp_content_dir.rglob("*"):
-                if f.is_file():
-                    zf.write(f, f.relative_to(temp_content_dir))
-
-    return None, f"Successfully packed {input_dir} to {output_file}"
-
-
-def _run_validation(
-    unpacked_dir: Path,
-    original_file: Path,
-    suffix: str,
-    infer_author_func=None,
-) -> tuple[bool, str | None]:
-    output_lines = []
-    validators = []
-
-    if suffix == ".docx":
-        author = "Claude"
-        if infer_author_func:
-            try:
-                author = infer_author_func(unpacked_dir, original_file)
-            except ValueError as e:
-                print(f"Warning: {e} Using default author 'Claude'.", file=sys.stderr)
-
-        validators = [
-            DOCXSchemaValidator(unpacked_dir, original_file),
-            RedliningValidator(unpacked_dir, original_file, author=author),
-        ]
-    elif suffix == ".pptx":
-        validators = [PPTXSchemaValidator(unpacked_dir, original_file)]
-
-    if not validators:
-        return True, None
-
-    total_repairs = sum(v.repair() for v in validators)
-    if total_repairs:
-        output_lines.append(f"Auto-repaired {total_repairs} issue(s)")
-
-    success = all(v.validate() for v in validators)
-
-    if success:
-        output_lines.append("All validations PASSED!")
+        ),
+        key=lambda part: _entry_order(part[0]),
+    )
+    reused = 0
+    try:
+        condensed = map_parts(
+            _condensed,
+            (
+                (content, arcname)
+                for arcname, content in parts
+                if content is not None and _is_xml_part(arcname)
+            ),
+            jobs,
+        )
+        with zipfile.ZipFile(partial_path, "w", zipfile.ZIP_DEFLATED) as zf:
+            for arcname, content in parts:
+                if content is None:
+                    with report_phase(report, "zip"):
+                        _copy_raw_member(
+                            zf,
+                            original_zip,
+                            original_zip.getinfo(arcname.as_posix()),
+                            compress_level,
+                        )
+                    reused += 1
+                    continue
+
+                part_file = content if isinstance(content, Path) else None
+                data = None if part_file else content
+                if _is_xml_part(arcname):
+                    with report_phase(report, "condense"):
+                        data = next(condensed)
+                reused += _write_part(
+                    zf, arcname, part_file, data, report, original_zip, compress_level
+                )
+        os.replace(partial_path, output_path)
+    finally:
+        partial_path.unlink(missing_ok=True)
+        if original_zip is not None:
+            original_zip.close()
+    return reused
+
+
+def _write_part(
+    zf: zipfile.ZipFile,
+    arcname: PurePosixPath,
+    part_file: Path | None = None,
+    data: bytes | None = None,
+    report: ValidationReport | None = None,
+    original_zip: zipfile.ZipFile | None = None,
+    compress_level: int | None = None,
+) -> bool:
+    """Adds one part to zf, from data when given (condensed XML or a part held
+    in memory) or else from the file as it is. Returns True when it was copied
+    compressed from original_zip because its content is unchanged."""
+    original_info = _original_member(original_zip, arcname)
+
+    with report_phase(report, "zip"):
+        if data is None:
+            if original_info is not None and _file_matches(part_file, original_info):
+                _copy_raw_member(zf, original_zip, original_info, compress_level)
+                return True
+            info = _zip_info(arcname)
+            if info.compress_type != zipfile.ZIP_STORED:
+                # writestr() is the public way to pick the deflate level.
+                zf.writestr(info, part_file.read_bytes(), compresslevel=compress_level)
+                return False
+            # Stored media can be large, so it is streamed.
+            info.file_size = part_file.stat().st_size
+            with open(part_file, "rb") as src, zf.open(info, "w") as dest:
+                shutil.copyfileobj(src, dest, COPY_CHUNK_SIZE)
+            return False
+
+        if original_info is not None and _data_matches(data, original_info):
+            _copy_raw_member(zf, original_zip, original_info, compress_level)
+            return True
+        zf.writestr(_zip_info(arcname), data, compresslevel=compress_level)
+        return False
+
+
+def _zip_info(arcname: PurePosixPath) -> zipfile.ZipInfo:
+    info = zipfile.ZipInfo(arcname.as_posix(), ZIP_DATE_TIME)
+    info.create_system = ZIP_CREATE_SYSTEM
+    info.external_attr = ZIP_EXTERNAL_ATTR
+    if arcname.suffix.lower() in STORED_EXTENSIONS:
+        info.compress_type = zipfile.ZIP_STORED
+    else:
+        info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def _entry_order(arcname: PurePosixPath) -> tuple[bool, str]:
+    # [Content_Types].xml first, as Office writes it, then by name.
+    name = arcname.as_posix()
+    return (name != CONTENT_TYPES_PART, name)
+
+
+def _is_xml_part(arcname: PurePosixPath) -> bool:
+    return arcname.name.endswith((".xml", ".rels"))
+
+
+def _condensed(content: Path | bytes, arcname: PurePosixPath) -> bytes:
+    if isinstance(content, Path):
+        content = content.read_bytes()
+    return _condense_xml(content, arcname)
+
+
+def _open_original(original_file: str | None) -> zipfile.ZipFile | None:
+    if not original_file:
+        return None
+    try:
+        return zipfile.ZipFile(original_file, "r")
+    except (OSError, zipfile.BadZipFile):
+        return None
 
-    return success, "\n".join(output_lines) if output_lines else None
 
+def _original_member(
+    original_zip: zipfile.ZipFile | None, arcname: PurePosixPath
+) -> zipfile.ZipInfo | None:
+    if original_zip is None:
+        return None
+    try:
+        info = original_zip.getinfo(arcname.as_posix())
+    except KeyError:
+        return None
+    if info.flag_bits & _FLAG_ENCRYPTED:
+        return None
+    # A member compressed other than _zip_info() says is written again, so
+    # that --reuse-original does not change how a part is stored.
+    if info.compress_type != _zip_info(arcname).compress_type:
+        return None
+    return info
+
+
+def _data_matches(data: bytes, info: zipfile.ZipInfo) -> bool:
+    """Returns True when data has the size and CRC-32 recorded for info.
+
+    These are the values the central directory already holds, so the original
+    member is never decompressed to compare it. The trade-off is that a changed
+    part of the same size whose CRC-32 happens to collide would be taken as
+    unchanged, and the original bytes written in its place.
+    """
+    return len(data) == info.file_size and zlib.crc32(data) == info.CRC
+
+
+def _file_matches(part_file: Path, info: zipfile.ZipInfo) -> bool:
+    """Like _data_matches(), reading part_file in chunks."""
+    # The size check rules out most changed parts without reading them.
+    if part_file.stat().st_size != info.file_size:
+        return False
+    crc = 0
+    with open(part_file, "rb") as f:
+        while chunk := f.read(COPY_CHUNK_SIZE):
+            crc = zlib.crc32(chunk, crc)
+    return crc == info.CRC
+
+
+def _copy_raw_member(
+    zf: zipfile.ZipFile,
+    original_zip: zipfile.ZipFile,
+    info: zipfile.ZipInfo,
+    compress_level: int | None = None,
+) -> None:
+    """Appends a member of original_zip to zf as its stored compressed bytes.
+
+    zipfile has no public API for this, so the local header is written and
+    the entry registered through _RAW_COPY_ATTRIBUTES, the way ZipFile.write()
+    does internally. When the member is compressed other than _zip_info()
+    says, or on a zipfile without those attributes, it is decompressed and
+    written again as _zip_info() says, at compress_level.
+    """
+    zip_info = _zip_info(PurePosixPath(info.filename))
+    if info.compress_type != zip_info.compress_type or not all(
+        hasattr(zip_file, name)
+        for zip_file in (zf, original_zip)
+        for name in _RAW_COPY_ATTRIBUTES
+    ):
+        zf.writestr(
+            zip_info,
+            original_zip.read(info),
+            compresslevel=compress_level,
+        )
+        return
+
+    source = original_zip.fp
+    source.seek(info.header_offset)
+    header = source.read(zipfile.sizeFileHeader)
+    name_length, extra_length = struct.unpack("<HH", header[26:30])
+    source.seek(
+        info.header_offset + zipfile.sizeFileHeader + name_length + extra_length
+    )
 
-def _condense_xml(xml_file: Path) -> None:
+    copied = zipfile.ZipInfo(info.filename, ZIP_DATE_TIME)
+    copied.compress_type = info.compress_type
+    copied.flag_bits = info.flag_bits & ~_FLAG_DATA_DESCRIPTOR
+    copied.create_system = ZIP_CREATE_SYSTEM
+    copied.external_attr = ZIP_EXTERNAL_ATTR
+    copied.CRC = info.CRC
+    copied.compress_size = info.compress_size
+    copied.file_size = info.file_size
+    copied.header_offset = zf.fp.tell()
+
+    zf.fp.write(copied.FileHeader())
+    remaining = info.compress_size
+    while remaining:
+        chunk = source.read(min(remaining, COPY_CHUNK_SIZE))
+        if not chunk:
+            raise zipfile.BadZipFile(f"Truncated member {info.filename} in original")
+        zf.fp.write(chunk)
+        remaining -= len(chunk)
+
+    # Mode "w" has already set ZipFile's modified flag, so closing zf writes
+    # the central directory with this entry in it.
+    zf.filelist.append(copied)
+    zf.NameToInfo[copied.filename] = copied
+    zf.start_dir = zf.fp.tell()
+
+
+def _condense_xml(data: bytes, xml_file: PurePosixPath) -> bytes:
+    """Drops whitespace-only text and comments between elements, except inside
+    text elements (any prefixed <...:t>), and returns the part as UTF-8."""
     try:
-        with open(xml_file, encoding="utf-8") as f:
-            dom = defusedxml.minidom.parse(f)
+        tree = parse_for_repair(data)
 
-        for element in dom.getElementsByTagName("*"):
-            if element.tagName.endswith(":t"):
+        for element in tree.getroot().iter(lxml.etree.Element):
+            if element.prefix is not None and lxml.etree.QName(element).localname == "t":
                 continue
 
-            for child in list(element.childNodes):
-                if (
-                    child.nodeType == child.TEXT_NODE
-                    and child.nodeValue
-                    and child.nodeValue.strip() == ""
-                ) or child.nodeType == child.COMMENT_NODE:
-                    element.removeChild(child)
+            if element.text is not None and not element.text.strip():
+                element.text = None
+            for child in list(element):
+                if child.tail is not None and not child.tail.strip():
+                    child.tail = None
+                if child.tag is lxml.etree.Comment:
+                    _remove_keeping_tail(child)
 
-        xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
+        return XML_DECLARATION + lxml.etree.tostring(tree, encoding="UTF-8")
     except Exception as e:
         print(f"ERROR: Failed to parse {xml_file.name}: {e}", file=sys.stderr)
         raise
 
 
+def _remove_keeping_tail(node) -> None:
+    parent = node.getparent()
+    if node.tail:
+        previous = node.getprevious()
+        if previous is not None:
+            previous.tail = (previous.tail or "") + node.tail
+        else:
+            parent.text = (parent.text or "") + node.tail
+    parent.remove(node)
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Pack a directory into a DOCX, PPTX, or XLSX file"
@@ -145,15 +445,66 @@ if __name__ == "__main__":
         metavar="true|false",
         help="Run validation with auto-repair (default: true)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Worker processes for XSD validation and condensing XML (default: 1, 0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--incremental",
+        type=lambda x: x.lower() == "true",
+        default=True,
+        metavar="true|false",
+        help="Only re-check parts changed since the last validation (default: true)",
+    )
+    parser.add_argument(
+        "--reuse-original",
+        type=lambda x: x.lower() == "true",
+        default=True,
+        metavar="true|false",
+        help="Copy parts unchanged from --original without recompressing them (default: true)",
+    )
+    parser.add_argument(
+        "--compress-level",
+        type=int,
+        choices=range(10),
+        metavar="0-9",
+        help="Deflate level for XML and other compressible parts; media is stored (default: 6)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=["text", "json"],
+        default="text",
+        help="Output format (default: text). json prints a structured report with per-check timings",
+    )
     args = parser.parse_args()
 
+    output = sys.stdout
+    report = None
+    if args.format == "json":
+        report = ValidationReport()
+        sys.stdout = sys.stderr
+
     _, message = pack(
         args.input_directory,
         args.output_file,
         original_file=args.original,
         validate=args.validate,
+        jobs=args.jobs,
+        incremental=args.incremental,
+        report=report,
+        reuse_original=args.reuse_original,
+        compress_level=args.compress_level,
     )
     print(message)
 
+    if report:
+        result = report.to_dict("Error" not in message)
+        result["message"] = message
+        json.dump(result, output, indent=2)
+        output.write("\n")
+
     if "Error" in message:
         sys.exit(1)
@@ -4,6 +4,15 @@ Extracts the ZIP archive, pretty-prints XML files, and optionally:
 - Merges adjacent runs with identical formatting (DOCX only)
 - Simplifies adjacent tracked changes from same author (DOCX only)
 
+Each member is read once and written once: XML parts go through every
+transform in memory, other parts are streamed straight to disk. With --jobs,
+XML parts are transformed in a pool of worker processes; the output is the
+same as without it.
+
+Processed trees are cached by the SHA-256 of the input file and the unpack
+options (see helpers/unpack_cache.py), so unpacking the same file again only
+copies the cached tree into place. Use --cache false to bypass it.
+
 Usage:
     python unpack.py <office_file> <output_dir> [options]
 
@@ -11,17 +20,23 @@ Examples:
     python unpack.py document.docx unpacked/
     python unpack.py presentation.pptx unpacked/
     python unpack.py document.docx unpacked/ --merge-runs false
+    python unpack.py presentation.pptx unpacked/ --jobs 0
+    python unpack.py document.docx unpacked/ --cache false
 """
 
 import argparse
+import os
+import shutil
 import sys
 import zipfile
 from pathlib import Path
 
 import defusedxml.minidom
 
-from helpers.merge_runs import merge_runs as do_merge_runs
-from helpers.simplify_redlines import simplify_redlines as do_simplify_redlines
+from helpers.merge_runs import merge_document_runs
+from helpers.parallel import map_parts
+from helpers.simplify_redlines import simplify_document_redlines
+from helpers.unpack_cache import UnpackCache
 
 SMART_QUOTE_REPLACEMENTS = {
     "\u201c": "&#x201C;",  
@@ -36,6 +51,8 @@ def unpack(
     output_directory: str,
     merge_runs: bool = True,
     simplify_redlines: bool = True,
+    jobs: int = 1,
+    cache: bool = True,
 ) -> tuple[None, str]:
     input_path = Path(input_file)
     output_path = Path(output_directory)
@@ -50,28 +67,70 @@ def unpack(
     try:
         output_path.mkdir(parents=True, exist_ok=True)
 
+        unpack_cache = cache_key = None
+        if cache:
+            unpack_cache = UnpackCache()
+            cache_key = unpack_cache.key(
+                input_path,
+                merge_runs=merge_runs,
+                simplify_redlines=simplify_redlines,
+            )
+            details = unpack_cache.materialize(cache_key, output_path)
+            if details is not None:
+                return None, f"Unpacked {input_file}{details} (from cache)"
+
+        xml_parts = []
+        written_files, written_dirs = [], []
         with zipfile.ZipFile(input_path, "r") as zf:
-            zf.extractall(output_path)
+            for info in zf.infolist():
+                target = _member_path(output_path, info.filename)
+                relative = target.relative_to(output_path).as_posix()
+                if info.is_dir():
+                    target.mkdir(parents=True, exist_ok=True)
+                    written_dirs.append(relative)
+                    continue
+                target.parent.mkdir(parents=True, exist_ok=True)
+                written_files.append(relative)
+
+                if info.filename.endswith((".xml", ".rels")):
+                    xml_parts.append((target, info.filename, zf.read(info)))
+                    continue
+                with zf.open(info) as source, open(target, "wb") as dest:
+                    shutil.copyfileobj(source, dest)
 
-        xml_files = list(output_path.rglob("*.xml")) + list(output_path.rglob("*.rels"))
-        for xml_file in xml_files:
-            _pretty_print_xml(xml_file)
+        is_docx = suffix == ".docx"
+        xml_count = len(xml_parts)
+        simplify_count = merge_count = 0
+        transforms = (
+            (
+                content,
+                is_docx and filename == "word/document.xml",
+                simplify_redlines,
+                merge_runs,
+            )
+            for _, filename, content in xml_parts
+        )
+        results = map_parts(_transform_xml_part, transforms, jobs)
+        for (target, _, _), (content, simplified, merged) in zip(xml_parts, results):
+            target.write_bytes(content)
+            simplify_count += simplified
+            merge_count += merged
 
-        message = f"Unpacked {input_file} ({len(xml_files)} XML files)"
+        details = f" ({xml_count} XML files)"
 
         if suffix == ".docx":
             if simplify_redlines:
-                simplify_count, _ = do_simplify_redlines(str(output_path))
-                message += f", simplified {simplify_count} tracked changes"
+                details += f", simplified {simplify_count} tracked changes"
 
             if merge_runs:
-                merge_count, _ = do_merge_runs(str(output_path))
-                message += f", merged {merge_count} runs"
+                details += f", merged {merge_count} runs"
 
-        for xml_file in xml_files:
-            _escape_smart_quotes(xml_file)
+        if unpack_cache is not None:
+            unpack_cache.store(
+                cache_key, output_path, written_files, written_dirs, details
+            )
 
-        return None, message
+        return None, f"Unpacked {input_file}{details}"
 
     except zipfile.BadZipFile:
         return None, f"Error: {input_file} is not a valid Office file"
@@ -79,23 +138,93 @@ def unpack(
         return None, f"Error unpacking: {e}"
 
 
-def _pretty_print_xml(xml_file: Path) -> None:
+def _member_path(output_path: Path, member_name: str) -> Path:
+    # Sanitized the way ZipFile.extract() does: no absolute paths, drive
+    # letters or ".." components can place a file outside output_path.
+    arcname = member_name.replace("/", os.path.sep)
+    if os.path.altsep:
+        arcname = arcname.replace(os.path.altsep, os.path.sep)
+    arcname = os.path.splitdrive(arcname)[1]
+    parts = [
+        part
+        for part in arcname.split(os.path.sep)
+        if part not in ("", os.path.curdir, os.path.pardir)
+    ]
+    return output_path.joinpath(*parts)
+
+
+def _transform_xml_part(
+    content: bytes, is_document: bool, simplify_redlines: bool, merge_runs: bool
+) -> tuple[bytes, int, int]:
+    content = _pretty_print_xml(content)
+    simplify_count = merge_count = 0
+    if is_document:
+        content, simplify_count, merge_count = _transform_document(
+            content, simplify_redlines, merge_runs
+        )
+    return _escape_smart_quotes(content), simplify_count, merge_count
+
+
+def _pretty_print_xml(content: bytes) -> bytes:
     try:
-        content = xml_file.read_text(encoding="utf-8")
-        dom = defusedxml.minidom.parseString(content)
-        xml_file.write_bytes(dom.toprettyxml(indent="  ", encoding="utf-8"))
+        dom = defusedxml.minidom.parseString(_decode(content))
+        return dom.toprettyxml(indent="  ", encoding="utf-8")
     except Exception:
-        pass  
+        return content
+
+
+def _transform_document(
+    content: bytes, simplify_redlines: bool, merge_runs: bool
+) -> tuple[bytes, int, int]:
+    """Simplifies redlines and merges runs in document.xml with one parse.
 
+    A transform that fails is skipped, leaving the document as the previous
+    step left it.
+    """
+    def parsed():
+        return defusedxml.minidom.parseString(_decode(content))
 
-def _escape_smart_quotes(xml_file: Path) -> None:
+    simplify_count = merge_count = 0
+    simplified = merged = False
     try:
-        content = xml_file.read_text(encoding="utf-8")
-        for char, entity in SMART_QUOTE_REPLACEMENTS.items():
-            content = content.replace(char, entity)
-        xml_file.write_text(content, encoding="utf-8")
+        dom = parsed()
     except Exception:
-        pass
+        return content, 0, 0
+
+    if simplify_redlines:
+        try:
+            simplify_count = simplify_document_redlines(dom)
+            simplified = True
+        except Exception:
+            dom = parsed()
+
+    if merge_runs:
+        try:
+            merge_count = merge_document_runs(dom)
+            merged = True
+        except Exception:
+            dom = parsed()
+            if simplified:
+                simplify_document_redlines(dom)
+
+    if not (simplified or merged):
+        return content, 0, 0
+    return dom.toxml(encoding="UTF-8"), simplify_count, merge_count
+
+
+def _escape_smart_quotes(content: bytes) -> bytes:
+    try:
+        text = _decode(content)
+    except UnicodeDecodeError:
+        return content
+    for char, entity in SMART_QUOTE_REPLACEMENTS.items():
+        text = text.replace(char, entity)
+    return text.encode("utf-8")
+
+
+def _decode(content: bytes) -> str:
+    # Same text the parts used to be read back as with Path.read_text().
+    return content.decode("utf-8").replace("\r\n", "\n").replace("\r", "\n")
 
 
 if __name__ == "__main__":
@@ -118,6 +247,20 @@ if __name__ == "__main__":
         metavar="true|false",
         help="Merge adjacent tracked changes from same author (DOCX only, default: true)",
     )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Worker processes for transforming XML parts (default: 1, 0 = one per CPU)",
+    )
+    parser.add_argument(
+        "--cache",
+        type=lambda x: x.lower() == "true",
+        default=True,
+        metavar="true|false",
+        help="Reuse and store processed trees in the unpack cache (default: true)",
+    )
     args = parser.parse_args()
 
     _, message = unpack(
@@ -125,6 +268,8 @@ if __name__ == "__main__":
         args.output_directory,
         merge_runs=args.merge_runs,
         simplify_redlines=args.simplify_redlines,
+        jobs=args.jobs,
+        cache=args.cache,
     )
     print(message)
 
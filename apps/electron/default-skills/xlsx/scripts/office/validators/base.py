@@ -2,12 +2,47 @@
 Base validator with common validation logic for document files.
 """
 
+import copy
+import io
+import os
+import posixpath
 import re
-from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from pathlib import Path, PurePosixPath
 
-import defusedxml.minidom
 import lxml.etree
 
+from .baseline import BaselineErrorCache, schemas_fingerprint
+from .manifest import ValidationManifest, incremental_check
+from .package import ParsedPackage, open_package_source
+from .repairs import (
+    RepairEngine,
+    WhitespacePreservationRepair,
+    parse_for_repair,
+    serialize_repaired,
+)
+from .report import (
+    CHECK_SKIPPED,
+    check_error,
+    print_errors,
+    report_errors,
+    reported_check,
+)
+from .rules import RuleEngine, UniqueIdRule
+from .schemas import SCHEMA_REGISTRY
+
+TEMPLATE_TAG_PATTERN = re.compile(r"\{\{[^}]*\}\}")
+
+# Elements carrying a relationship ID, selected in C rather than by testing
+# every element of a large part from Python.
+RELATIONSHIP_ID_ELEMENTS = lxml.etree.XPath(
+    "//*[@r:id or @r:embed or @r:link]",
+    namespaces={
+        "r": "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+    },
+)
+
 
 class BaseSchemaValidator:
 
@@ -40,6 +75,10 @@ class BaseSchemaValidator:
 
     ELEMENT_RELATIONSHIP_TYPES = {}
 
+    ELEMENT_RULES = (UniqueIdRule,)
+
+    REPAIRS = (WhitespacePreservationRepair,)
+
     SCHEMA_MAPPINGS = {
         "word": "ISO-IEC29500-4_2016/wml.xsd",  
         "ppt": "ISO-IEC29500-4_2016/pml.xsd",  
@@ -73,6 +112,8 @@ class BaseSchemaValidator:
 
     MAIN_CONTENT_FOLDERS = {"word", "ppt", "xl"}
 
+    STREAMING_THRESHOLD = 8 * 1024 * 1024
+
     OOXML_NAMESPACES = {
         "http://schemas.openxmlformats.org/officeDocument/2006/math",
         "http://schemas.openxmlformats.org/officeDocument/2006/relationships",
@@ -91,16 +132,48 @@ class BaseSchemaValidator:
         "http://www.w3.org/XML/1998/namespace",
     }
 
-    def __init__(self, unpacked_dir, original_file=None, verbose=False):
-        self.unpacked_dir = Path(unpacked_dir).resolve()
+    def __init__(
+        self,
+        unpacked_dir,
+        original_file=None,
+        verbose=False,
+        jobs=1,
+        incremental=False,
+        streaming=False,
+        report=None,
+        checks=None,
+    ):
+        self.source = open_package_source(unpacked_dir)
+        self.unpacked_dir = self.source.path
         self.original_file = Path(original_file) if original_file else None
         self.verbose = verbose
+        self.jobs = jobs or os.cpu_count() or 1
+        self.streaming = streaming
+        self.report = report
+        self.checks = checks
 
         self.schemas_dir = Path(__file__).parent.parent / "schemas"
+        self.package = ParsedPackage(self.source)
+        self._rule_errors = None
+        self._rule_engine = None
+        self.baseline = (
+            BaselineErrorCache(
+                self.original_file,
+                self._validate_original_part,
+                identity=[type(self).__name__, schemas_fingerprint(self.schemas_dir)],
+            )
+            if self.original_file
+            else None
+        )
+        self.manifest = (
+            ValidationManifest(self.package, self._manifest_identity())
+            if incremental
+            else None
+        )
 
         patterns = ["*.xml", "*.rels"]
         self.xml_files = [
-            f for pattern in patterns for f in self.unpacked_dir.rglob(pattern)
+            f for pattern in patterns for f in self.source.rglob(pattern)
         ]
 
         if not self.xml_files:
@@ -109,201 +182,222 @@ class BaseSchemaValidator:
     def validate(self):
         raise NotImplementedError("Subclasses must implement the validate method")
 
-    def repair(self) -> int:
-        return self.repair_whitespace_preservation()
+    def save_manifest(self):
+        if self.manifest is not None:
+            self.manifest.save()
+
+    def _manifest_identity(self):
+        try:
+            original_digest = self.baseline.digest() if self.baseline else ""
+        except OSError:
+            original_digest = "unreadable"
+        return [
+            type(self).__name__,
+            str(self.unpacked_dir),
+            original_digest,
+            str(self.verbose),
+            str(self.streaming),
+            schemas_fingerprint(self.schemas_dir),
+        ]
 
-    def repair_whitespace_preservation(self) -> int:
-        repairs = 0
+    def _part_result(self, kind, part_names, compute):
+        if self.manifest is None:
+            return compute()
+        return self.manifest.part_result(kind, part_names, compute)
 
+    def repair(self) -> int:
         for xml_file in self.xml_files:
-            try:
-                content = xml_file.read_text(encoding="utf-8")
-                dom = defusedxml.minidom.parseString(content)
-                modified = False
-
-                for elem in dom.getElementsByTagName("*"):
-                    if elem.tagName.endswith(":t") and elem.firstChild:
-                        text = elem.firstChild.nodeValue
-                        if text and (text.startswith((' ', '\t')) or text.endswith((' ', '\t'))):
-                            if elem.getAttribute("xml:space") != "preserve":
-                                elem.setAttribute("xml:space", "preserve")
-                                text_preview = repr(text[:30]) + "..." if len(text) > 30 else repr(text)
-                                print(f"  Repaired: {xml_file.name}: Added xml:space='preserve' to {elem.tagName}: {text_preview}")
-                                repairs += 1
-                                modified = True
-
-                if modified:
-                    xml_file.write_bytes(dom.toxml(encoding="UTF-8"))
-
-            except Exception:
-                pass
+            if self._streams(xml_file):
+                print(f"  Skipped repair: {xml_file} is too large to repair in memory")
+
+        engine = RepairEngine([repair_class(self) for repair_class in self.REPAIRS])
+        return sum(
+            self._repair_part(engine, xml_file)
+            for xml_file in self.xml_files
+            if not self._streams(xml_file)
+        )
 
+    def _repair_part(self, engine, xml_file):
+        try:
+            data = self.source.read_bytes(xml_file)
+            tree = parse_for_repair(data)
+            repairs = engine.repair_part(xml_file, tree)
+        except Exception:
+            return 0
+
+        if not repairs:
+            # Same content and no DTD, so validation can use this tree as is.
+            if tree.docinfo.internalDTD is None:
+                self.package.adopt(xml_file, tree)
+            return 0
+
+        self.source.write_bytes(xml_file, serialize_repaired(tree, data))
+        self.package.invalidate(xml_file)
+        self._rule_errors = None
         return repairs
 
+    @reported_check("xml")
     def validate_xml(self):
         errors = []
 
         for xml_file in self.xml_files:
-            try:
-                lxml.etree.parse(str(xml_file))
-            except lxml.etree.XMLSyntaxError as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"Line {e.lineno}: {e.msg}"
-                )
-            except Exception as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                    f"Unexpected error: {str(e)}"
+            errors.extend(
+                self._part_result(
+                    "xml", [xml_file], partial(self._xml_errors, xml_file)
                 )
+            )
 
         if errors:
             print(f"FAILED - Found {len(errors)} XML violations:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
                 print("PASSED - All XML files are well-formed")
             return True
 
+    def _xml_errors(self, xml_file):
+        try:
+            if self._streams(xml_file):
+                self._check_streamed_part(xml_file)
+            else:
+                self.package.parse(xml_file)
+        except lxml.etree.XMLSyntaxError as e:
+            return [check_error(xml_file, e.lineno, e.msg)]
+        except Exception as e:
+            return [check_error(xml_file, None, f"Unexpected error: {str(e)}")]
+        return []
+
+    @reported_check("namespaces")
     def validate_namespaces(self):
         errors = []
 
         for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                declared = set(root.nsmap.keys()) - {None}  
-
-                for attr_val in [
-                    v for k, v in root.attrib.items() if k.endswith("Ignorable")
-                ]:
-                    undeclared = set(attr_val.split()) - declared
-                    errors.extend(
-                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                        f"Namespace '{ns}' in Ignorable but not declared"
-                        for ns in undeclared
-                    )
-            except lxml.etree.XMLSyntaxError:
-                continue
+            errors.extend(
+                self._part_result(
+                    "namespaces", [xml_file], partial(self._namespace_errors, xml_file)
+                )
+            )
 
         if errors:
             print(f"FAILED - {len(errors)} namespace issues:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         if self.verbose:
             print("PASSED - All namespace prefixes properly declared")
         return True
 
-    def validate_unique_ids(self):
-        errors = []
-        global_ids = {}  
-
-        for xml_file in self.xml_files:
-            try:
-                root = lxml.etree.parse(str(xml_file)).getroot()
-                file_ids = {}  
+    def _namespace_errors(self, xml_file):
+        try:
+            root = self._root_element(xml_file)
+        except lxml.etree.XMLSyntaxError:
+            return []
 
-                mc_elements = root.xpath(
-                    ".//mc:AlternateContent", namespaces={"mc": self.MC_NAMESPACE}
+        declared = set(root.nsmap.keys()) - {None}  
+        errors = []
+        for attr_val in [
+            v for k, v in root.attrib.items() if k.endswith("Ignorable")
+        ]:
+            undeclared = set(attr_val.split()) - declared
+            errors.extend(
+                check_error(
+                    xml_file, None, f"Namespace '{ns}' in Ignorable but not declared"
                 )
-                for elem in mc_elements:
-                    elem.getparent().remove(elem)
-
-                for elem in root.iter():
-                    tag = (
-                        elem.tag.split("}")[-1].lower()
-                        if "}" in elem.tag
-                        else elem.tag.lower()
-                    )
-
-                    if tag in self.UNIQUE_ID_REQUIREMENTS:
-                        in_excluded_container = any(
-                            ancestor.tag.split("}")[-1].lower() in self.EXCLUDED_ID_CONTAINERS
-                            for ancestor in elem.iterancestors()
-                        )
-                        if in_excluded_container:
-                            continue
-
-                        attr_name, scope = self.UNIQUE_ID_REQUIREMENTS[tag]
-
-                        id_value = None
-                        for attr, value in elem.attrib.items():
-                            attr_local = (
-                                attr.split("}")[-1].lower()
-                                if "}" in attr
-                                else attr.lower()
-                            )
-                            if attr_local == attr_name:
-                                id_value = value
-                                break
-
-                        if id_value is not None:
-                            if scope == "global":
-                                if id_value in global_ids:
-                                    prev_file, prev_line, prev_tag = global_ids[
-                                        id_value
-                                    ]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Global ID '{id_value}' in <{tag}> "
-                                        f"already used in {prev_file} at line {prev_line} in <{prev_tag}>"
-                                    )
-                                else:
-                                    global_ids[id_value] = (
-                                        xml_file.relative_to(self.unpacked_dir),
-                                        elem.sourceline,
-                                        tag,
-                                    )
-                            elif scope == "file":
-                                key = (tag, attr_name)
-                                if key not in file_ids:
-                                    file_ids[key] = {}
-
-                                if id_value in file_ids[key]:
-                                    prev_line = file_ids[key][id_value]
-                                    errors.append(
-                                        f"  {xml_file.relative_to(self.unpacked_dir)}: "
-                                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
-                                        f"(first occurrence at line {prev_line})"
-                                    )
-                                else:
-                                    file_ids[key][id_value] = elem.sourceline
+                for ns in undeclared
+            )
+        return errors
 
-            except (lxml.etree.XMLSyntaxError, Exception) as e:
-                errors.append(
-                    f"  {xml_file.relative_to(self.unpacked_dir)}: Error: {e}"
-                )
+    @reported_check("unique_ids")
+    def validate_unique_ids(self):
+        errors = self._element_rule_errors("unique_ids")
 
         if errors:
             print(f"FAILED - Found {len(errors)} ID uniqueness violations:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
                 print("PASSED - All required IDs are unique")
             return True
 
+    def _element_rule_errors(self, rule_name):
+        return self._run_element_rules()[rule_name]
+
+    def _run_element_rules(self):
+        if self._rule_errors is None:
+            rules = [
+                rule_class(self)
+                for rule_class in self.ELEMENT_RULES
+                if self.checks is None or self.checks.selects(rule_class.name)
+            ]
+            self._rule_engine = RuleEngine(rules, results=self.manifest)
+            self._rule_engine.run(
+                (xml_file, partial(self._part_events, xml_file))
+                for xml_file in self.xml_files
+            )
+            self._rule_errors = {rule.name: rule.errors for rule in rules}
+        return self._rule_errors
+
+    def _streams(self, xml_file):
+        if not self.streaming:
+            return False
+        try:
+            return self.source.size(xml_file) >= self.STREAMING_THRESHOLD
+        except (OSError, KeyError):
+            return False
+
+    def _part_events(self, xml_file):
+        if self._streams(xml_file):
+            return self.package.stream(xml_file)
+        return lxml.etree.iterwalk(
+            self.package.getroot(xml_file), events=("start", "end")
+        )
+
+    def _iter_elements(self, xml_file, tag=None):
+        if not self._streams(xml_file):
+            yield from self.package.getroot(xml_file).iter(tag)
+            return
+
+        for _, elem in self.package.stream(xml_file, events=("start",)):
+            if tag is None or elem.tag == tag:
+                yield elem
+
+    def _root_element(self, xml_file):
+        if not self._streams(xml_file):
+            return self.package.getroot(xml_file)
+
+        for _, elem in self.package.stream(xml_file, events=("start",)):
+            return elem
+
+    def _check_streamed_part(self, xml_file):
+        # Well-formedness of a streamed part falls out of the element-rule pass;
+        # only parts that pass did not walk (all results reused) need their own.
+        self._run_element_rules()
+        engine = self._rule_engine
+        if xml_file in engine.failed_parts:
+            raise engine.failed_parts[xml_file]
+        if xml_file not in engine.walked_parts:
+            for _ in self.package.stream(xml_file, events=()):
+                pass
+
+    @reported_check("file_references")
+    @incremental_check("*.rels")
     def validate_file_references(self):
         errors = []
 
-        rels_files = list(self.unpacked_dir.rglob("*.rels"))
+        rels_files = self.source.rglob("*.rels")
 
         if not rels_files:
             if self.verbose:
                 print("PASSED - No .rels files found")
             return True
 
-        all_files = []
-        for file_path in self.unpacked_dir.rglob("*"):
-            if (
-                file_path.is_file()
-                and file_path.name != "[Content_Types].xml"
-                and not file_path.name.endswith(".rels")
-            ):  
-                all_files.append(file_path.resolve())
+        all_files = [
+            file_path
+            for file_path in self.source.rglob("*")
+            if file_path.name != "[Content_Types].xml"
+            and not file_path.name.endswith(".rels")
+        ]
 
         all_referenced_files = set()
 
@@ -314,7 +408,7 @@ class BaseSchemaValidator:
 
         for rels_file in rels_files:
             try:
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
+                rels_root = self.package.getroot(rels_file)
 
                 rels_dir = rels_file.parent
 
@@ -326,20 +420,21 @@ class BaseSchemaValidator:
                     namespaces={"ns": self.PACKAGE_RELATIONSHIPS_NAMESPACE},
                 ):
                     target = rel.get("Target")
+                    if rel.get("TargetMode") == "External":
+                        continue
                     if target and not target.startswith(
                         ("http", "mailto:")
                     ):  
                         if target.startswith("/"):
-                            target_path = self.unpacked_dir / target.lstrip("/")
+                            target_path = _normalize_part_name("", target.lstrip("/"))
                         elif rels_file.name == ".rels":
-                            target_path = self.unpacked_dir / target
+                            target_path = _normalize_part_name("", target)
                         else:
                             base_dir = rels_dir.parent
-                            target_path = base_dir / target
+                            target_path = _normalize_part_name(base_dir, target)
 
                         try:
-                            target_path = target_path.resolve()
-                            if target_path.exists() and target_path.is_file():
+                            if self.source.is_file(target_path):
                                 referenced_files.add(target_path)
                                 all_referenced_files.add(target_path)
                             else:
@@ -347,28 +442,25 @@ class BaseSchemaValidator:
                         except (OSError, ValueError):
                             broken_refs.append((target, rel.sourceline))
 
-                if broken_refs:
-                    rel_path = rels_file.relative_to(self.unpacked_dir)
-                    for broken_ref, line_num in broken_refs:
-                        errors.append(
-                            f"  {rel_path}: Line {line_num}: Broken reference to {broken_ref}"
+                for broken_ref, line_num in broken_refs:
+                    errors.append(
+                        check_error(
+                            rels_file, line_num, f"Broken reference to {broken_ref}"
                         )
+                    )
 
             except Exception as e:
-                rel_path = rels_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error parsing {rel_path}: {e}")
+                errors.append(check_error(rels_file, None, f"Error parsing: {e}"))
 
         unreferenced_files = set(all_files) - all_referenced_files
 
         if unreferenced_files:
             for unref_file in sorted(unreferenced_files):
-                unref_rel_path = unref_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Unreferenced file: {unref_rel_path}")
+                errors.append(check_error(unref_file, None, "Unreferenced file"))
 
         if errors:
             print(f"FAILED - Found {len(errors)} relationship validation errors:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             print(
                 "CRITICAL: These errors will cause the document to appear corrupt. "
                 + "Broken references MUST be fixed, "
@@ -382,9 +474,8 @@ class BaseSchemaValidator:
                 )
             return True
 
+    @reported_check("relationship_ids")
     def validate_all_relationship_ids(self):
-        import lxml.etree
-
         errors = []
 
         for xml_file in self.xml_files:
@@ -394,77 +485,97 @@ class BaseSchemaValidator:
             rels_dir = xml_file.parent / "_rels"
             rels_file = rels_dir / f"{xml_file.name}.rels"
 
-            if not rels_file.exists():
+            if not self.source.is_file(rels_file):
                 continue
 
-            try:
-                rels_root = lxml.etree.parse(str(rels_file)).getroot()
-                rid_to_type = {}
+            errors.extend(
+                self._part_result(
+                    "relationship_ids",
+                    [xml_file, rels_file],
+                    partial(self._relationship_id_errors, xml_file, rels_file),
+                )
+            )
 
-                for rel in rels_root.findall(
-                    f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
-                ):
-                    rid = rel.get("Id")
-                    rel_type = rel.get("Type", "")
-                    if rid:
-                        if rid in rid_to_type:
-                            rels_rel_path = rels_file.relative_to(self.unpacked_dir)
-                            errors.append(
-                                f"  {rels_rel_path}: Line {rel.sourceline}: "
-                                f"Duplicate relationship ID '{rid}' (IDs must be unique)"
+        if errors:
+            print(f"FAILED - Found {len(errors)} relationship ID reference errors:")
+            print_errors(errors)
+            print("\nThese ID mismatches will cause the document to appear corrupt!")
+            return False
+        else:
+            if self.verbose:
+                print("PASSED - All relationship ID references are valid")
+            return True
+
+    def _relationship_id_errors(self, xml_file, rels_file):
+        errors = []
+
+        try:
+            rels_root = self.package.getroot(rels_file)
+            rid_to_type = {}
+
+            for rel in rels_root.findall(
+                f".//{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
+            ):
+                rid = rel.get("Id")
+                rel_type = rel.get("Type", "")
+                if rid:
+                    if rid in rid_to_type:
+                        errors.append(
+                            check_error(
+                                rels_file,
+                                rel.sourceline,
+                                f"Duplicate relationship ID '{rid}' (IDs must be unique)",
                             )
-                        type_name = (
-                            rel_type.split("/")[-1] if "/" in rel_type else rel_type
-                        )
-                        rid_to_type[rid] = type_name
-
-                xml_root = lxml.etree.parse(str(xml_file)).getroot()
-
-                r_ns = self.OFFICE_RELATIONSHIPS_NAMESPACE
-                rid_attrs_to_check = ["id", "embed", "link"]
-                for elem in xml_root.iter():
-                    for attr_name in rid_attrs_to_check:
-                        rid_attr = elem.get(f"{{{r_ns}}}{attr_name}")
-                        if not rid_attr:
-                            continue
-                        xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                        elem_name = (
-                            elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
                         )
+                    type_name = (
+                        rel_type.split("/")[-1] if "/" in rel_type else rel_type
+                    )
+                    rid_to_type[rid] = type_name
 
-                        if rid_attr not in rid_to_type:
-                            errors.append(
-                                f"  {xml_rel_path}: Line {elem.sourceline}: "
+            r_ns = self.OFFICE_RELATIONSHIPS_NAMESPACE
+            rid_attrs_to_check = ["id", "embed", "link"]
+            if self._streams(xml_file):
+                elements = self._iter_elements(xml_file)
+            else:
+                elements = RELATIONSHIP_ID_ELEMENTS(self.package.getroot(xml_file))
+            for elem in elements:
+                for attr_name in rid_attrs_to_check:
+                    rid_attr = elem.get(f"{{{r_ns}}}{attr_name}")
+                    if not rid_attr:
+                        continue
+                    elem_name = (
+                        elem.tag.split("}")[-1] if "}" in elem.tag else elem.tag
+                    )
+
+                    if rid_attr not in rid_to_type:
+                        errors.append(
+                            check_error(
+                                xml_file,
+                                elem.sourceline,
                                 f"<{elem_name}> r:{attr_name} references non-existent relationship '{rid_attr}' "
-                                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})"
-                            )
-                        elif attr_name == "id" and self.ELEMENT_RELATIONSHIP_TYPES:
-                            expected_type = self._get_expected_relationship_type(
-                                elem_name
+                                f"(valid IDs: {', '.join(sorted(rid_to_type.keys())[:5])}{'...' if len(rid_to_type) > 5 else ''})",
                             )
-                            if expected_type:
-                                actual_type = rid_to_type[rid_attr]
-                                if expected_type not in actual_type.lower():
-                                    errors.append(
-                                        f"  {xml_rel_path}: Line {elem.sourceline}: "
+                        )
+                    elif attr_name == "id" and self.ELEMENT_RELATIONSHIP_TYPES:
+                        expected_type = self._get_expected_relationship_type(
+                            elem_name
+                        )
+                        if expected_type:
+                            actual_type = rid_to_type[rid_attr]
+                            if expected_type not in actual_type.lower():
+                                errors.append(
+                                    check_error(
+                                        xml_file,
+                                        elem.sourceline,
                                         f"<{elem_name}> references '{rid_attr}' which points to '{actual_type}' "
-                                        f"but should point to a '{expected_type}' relationship"
+                                        f"but should point to a '{expected_type}' relationship",
                                     )
+                                )
 
-            except Exception as e:
-                xml_rel_path = xml_file.relative_to(self.unpacked_dir)
-                errors.append(f"  Error processing {xml_rel_path}: {e}")
+        except Exception as e:
+            errors.append(check_error(xml_file, None, f"Error processing: {e}"))
 
-        if errors:
-            print(f"FAILED - Found {len(errors)} relationship ID reference errors:")
-            for error in errors:
-                print(error)
-            print("\nThese ID mismatches will cause the document to appear corrupt!")
-            return False
-        else:
-            if self.verbose:
-                print("PASSED - All relationship ID references are valid")
-            return True
+        return errors
 
     def _get_expected_relationship_type(self, element_name):
         elem_lower = element_name.lower()
@@ -489,16 +600,18 @@ class BaseSchemaValidator:
 
         return None
 
+    @reported_check("content_types")
     def validate_content_types(self):
         errors = []
 
-        content_types_file = self.unpacked_dir / "[Content_Types].xml"
-        if not content_types_file.exists():
+        content_types_file = PurePosixPath("[Content_Types].xml")
+        if not self.source.is_file(content_types_file):
             print("FAILED - [Content_Types].xml file not found")
+            report_errors([check_error(content_types_file, None, "File not found")])
             return False
 
         try:
-            root = lxml.etree.parse(str(content_types_file)).getroot()
+            root = self.package.getroot(content_types_file)
             declared_parts = set()
             declared_extensions = set()
 
@@ -538,13 +651,10 @@ class BaseSchemaValidator:
                 "emf": "image/x-emf",
             }
 
-            all_files = list(self.unpacked_dir.rglob("*"))
-            all_files = [f for f in all_files if f.is_file()]
+            all_files = self.source.rglob("*")
 
             for xml_file in self.xml_files:
-                path_str = str(xml_file.relative_to(self.unpacked_dir)).replace(
-                    "\\", "/"
-                )
+                path_str = xml_file.as_posix()
 
                 if any(
                     skip in path_str
@@ -552,17 +662,20 @@ class BaseSchemaValidator:
                 ):
                     continue
 
-                try:
-                    root_tag = lxml.etree.parse(str(xml_file)).getroot().tag
-                    root_name = root_tag.split("}")[-1] if "}" in root_tag else root_tag
+                root_name = self._part_result(
+                    "root_name", [xml_file], partial(self._root_name, xml_file)
+                )
+                if root_name is None:
+                    continue  
 
-                    if root_name in declarable_roots and path_str not in declared_parts:
-                        errors.append(
-                            f"  {path_str}: File with <{root_name}> root not declared in [Content_Types].xml"
+                if root_name in declarable_roots and path_str not in declared_parts:
+                    errors.append(
+                        check_error(
+                            path_str,
+                            None,
+                            f"File with <{root_name}> root not declared in [Content_Types].xml",
                         )
-
-                except Exception:
-                    continue  
+                    )
 
             for file_path in all_files:
                 if file_path.suffix.lower() in {".xml", ".rels"}:
@@ -575,18 +688,20 @@ class BaseSchemaValidator:
                 extension = file_path.suffix.lstrip(".").lower()
                 if extension and extension not in declared_extensions:
                     if extension in media_extensions:
-                        relative_path = file_path.relative_to(self.unpacked_dir)
                         errors.append(
-                            f'  {relative_path}: File with extension \'{extension}\' not declared in [Content_Types].xml - should add: <Default Extension="{extension}" ContentType="{media_extensions[extension]}"/>'
+                            check_error(
+                                file_path,
+                                None,
+                                f'File with extension \'{extension}\' not declared in [Content_Types].xml - should add: <Default Extension="{extension}" ContentType="{media_extensions[extension]}"/>',
+                            )
                         )
 
         except Exception as e:
-            errors.append(f"  Error parsing [Content_Types].xml: {e}")
+            errors.append(check_error(content_types_file, None, f"Error parsing: {e}"))
 
         if errors:
             print(f"FAILED - Found {len(errors)} content type declaration errors:")
-            for error in errors:
-                print(error)
+            print_errors(errors)
             return False
         else:
             if self.verbose:
@@ -595,58 +710,76 @@ class BaseSchemaValidator:
                 )
             return True
 
+    def _root_name(self, xml_file):
+        try:
+            root_tag = self._root_element(xml_file).tag
+        except Exception:
+            return None
+        return root_tag.split("}")[-1] if "}" in root_tag else root_tag
+
     def validate_file_against_xsd(self, xml_file, verbose=False):
-        xml_file = Path(xml_file).resolve()
-        unpacked_dir = self.unpacked_dir.resolve()
+        xml_file = self._part_name(xml_file)
 
-        is_valid, current_errors = self._validate_single_file_xsd(
-            xml_file, unpacked_dir
-        )
+        is_valid, current_errors = self._validate_single_file_xsd(xml_file)
 
         if is_valid is None:
-            return None, set()  
+            return None, []
         elif is_valid:
-            return True, set()  
+            return True, []
 
         original_errors = self._get_original_file_errors(xml_file)
 
         assert current_errors is not None
-        new_errors = current_errors - original_errors
-
-        new_errors = {
-            e for e in new_errors
-            if not any(pattern in e for pattern in self.IGNORED_VALIDATION_ERRORS)
-        }
+        new_errors = sorted(
+            (
+                check_error(xml_file, line, message)
+                for message, line in current_errors.items()
+                if message not in original_errors
+                and not any(
+                    pattern in message for pattern in self.IGNORED_VALIDATION_ERRORS
+                )
+            ),
+            key=lambda error: (error["line"] or 0, error["message"]),
+        )
 
         if new_errors:
             if verbose:
-                relative_path = xml_file.relative_to(unpacked_dir)
-                print(f"FAILED - {relative_path}: {len(new_errors)} new error(s)")
-                for error in list(new_errors)[:3]:
-                    truncated = error[:250] + "..." if len(error) > 250 else error
-                    print(f"  - {truncated}")
+                print(f"FAILED - {xml_file}: {len(new_errors)} new error(s)")
+                for error in new_errors[:3]:
+                    print(f"  - {_xsd_error_summary(error)}")
             return False, new_errors
         else:
             if verbose:
                 print(
                     f"PASSED - No new errors (original had {len(current_errors)} errors)"
                 )
-            return True, set()
+            return True, []
 
+    @reported_check("xsd")
     def validate_against_xsd(self):
+        if not self.schemas_dir.is_dir():
+            print(
+                f"WARNING - Skipped XSD validation: no schemas in {self.schemas_dir}"
+            )
+            return CHECK_SKIPPED
+
         new_errors = []
+        summary = []
         original_error_count = 0
         valid_count = 0
         skipped_count = 0
+        streamed_count = 0
 
-        for xml_file in self.xml_files:
-            relative_path = str(xml_file.relative_to(self.unpacked_dir))
-            is_valid, new_file_errors = self.validate_file_against_xsd(
-                xml_file, verbose=False
-            )
+        for xml_file, (is_valid, new_file_errors) in zip(
+            self.xml_files, self._validate_files_against_xsd()
+        ):
+            relative_path = str(xml_file)
 
             if is_valid is None:
-                skipped_count += 1
+                if self._streams(xml_file):
+                    streamed_count += 1
+                else:
+                    skipped_count += 1
                 continue
             elif is_valid and not new_file_errors:
                 valid_count += 1
@@ -656,32 +789,102 @@ class BaseSchemaValidator:
                 valid_count += 1
                 continue
 
-            new_errors.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
-            for error in list(new_file_errors)[:3]:  
-                new_errors.append(
-                    f"    - {error[:250]}..." if len(error) > 250 else f"    - {error}"
-                )
+            new_errors.extend(new_file_errors)
+            summary.append(f"  {relative_path}: {len(new_file_errors)} new error(s)")
+            for error in new_file_errors[:3]:
+                summary.append(f"    - {_xsd_error_summary(error)}")
 
         if self.verbose:
             print(f"Validated {len(self.xml_files)} files:")
             print(f"  - Valid: {valid_count}")
             print(f"  - Skipped (no schema): {skipped_count}")
+            if streamed_count:
+                print(f"  - Skipped (streamed, too large for XSD): {streamed_count}")
             if original_error_count:
                 print(f"  - With original errors (ignored): {original_error_count}")
             print(
-                f"  - With NEW errors: {len(new_errors) > 0 and len([e for e in new_errors if not e.startswith('    ')]) or 0}"
+                f"  - With NEW errors: {len({error['file'] for error in new_errors})}"
             )
+            if self.jobs > 1:
+                print(f"  - Worker processes: {self.jobs}")
+            else:
+                print(f"  - {SCHEMA_REGISTRY.summary()}")
+                if self.baseline:
+                    print(f"  - {self.baseline.summary()}")
+
+        if self.baseline:
+            self.baseline.save()
 
         if new_errors:
             print("\nFAILED - Found NEW validation errors:")
-            for error in new_errors:
-                print(error)
+            for line in summary:
+                print(line)
+            report_errors(new_errors)
             return False
         else:
             if self.verbose:
                 print("\nPASSED - No new XSD validation errors introduced")
             return True
 
+    def _validate_files_against_xsd(self):
+        if self.manifest is None:
+            return self._validate_parts_against_xsd(self.xml_files)
+
+        results = {}
+        for xml_file in self.xml_files:
+            hit, result = self.manifest.get_part_result("xsd", [xml_file])
+            if hit:
+                results[xml_file] = tuple(result)
+
+        pending = [f for f in self.xml_files if f not in results]
+        for xml_file, (is_valid, new_errors) in zip(
+            pending, self._validate_parts_against_xsd(pending)
+        ):
+            self.manifest.put_part_result("xsd", [xml_file], [is_valid, new_errors])
+            results[xml_file] = (is_valid, new_errors)
+
+        return [results[xml_file] for xml_file in self.xml_files]
+
+    def _validate_parts_against_xsd(self, xml_files):
+        if (
+            self.jobs <= 1
+            or len(xml_files) < 2
+            or self.source.has_pending_writes
+        ):
+            return [
+                self.validate_file_against_xsd(xml_file, verbose=False)
+                for xml_file in xml_files
+            ]
+
+        results = []
+        workers = min(self.jobs, len(xml_files))
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_xsd_worker,
+            initargs=(
+                type(self),
+                self.unpacked_dir,
+                self.original_file,
+                self.streaming,
+            ),
+        ) as executor:
+            for is_valid, new_errors, baseline_entries in executor.map(
+                _validate_file_against_xsd_in_worker,
+                xml_files,
+                chunksize=max(1, len(xml_files) // (workers * 4)),
+            ):
+                if self.baseline:
+                    self.baseline.update(baseline_entries)
+                results.append((is_valid, new_errors))
+        return results
+
+    def warm_up_schemas(self):
+        SCHEMA_REGISTRY.warm_up(
+            schema_path
+            for xml_file in self.xml_files
+            if (schema_path := self._get_schema_path(xml_file))
+        )
+
     def _get_schema_path(self, xml_file):
         if xml_file.name in self.SCHEMA_MAPPINGS:
             return self.schemas_dir / self.SCHEMA_MAPPINGS[xml_file.name]
@@ -700,147 +903,133 @@ class BaseSchemaValidator:
 
         return None
 
-    def _clean_ignorable_namespaces(self, xml_doc):
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
+    def _part_name(self, xml_file):
+        xml_file = Path(xml_file)
+        if xml_file.is_absolute():
+            xml_file = xml_file.resolve().relative_to(self.unpacked_dir)
+        return PurePosixPath(xml_file.as_posix())
+
+    def _validate_single_file_xsd(self, xml_file):
+        if self._streams(xml_file):
+            return None, None
+        # The cached tree is shared with other checks; XSD preprocessing edits
+        # a private copy.
+        return self._validate_part_xsd(
+            xml_file, lambda: copy.deepcopy(self.package.parse(xml_file))
+        )
 
-        for elem in xml_copy.iter():
-            attrs_to_remove = []
+    def _validate_original_part(self, part_name, data):
+        _, errors = self._validate_part_xsd(
+            PurePosixPath(part_name), lambda: lxml.etree.parse(io.BytesIO(data))
+        )
+        return set(errors or ())
 
-            for attr in elem.attrib:
-                if "{" in attr:
-                    ns = attr.split("}")[0][1:]
-                    if ns not in self.OOXML_NAMESPACES:
-                        attrs_to_remove.append(attr)
+    def _validate_part_xsd(self, relative_path, load_xml_doc):
+        """Returns (is_valid, errors), errors mapping each distinct message to
+        the first line it was reported at. (None, None) without a schema."""
+        schema_path = self._get_schema_path(relative_path)
+        if not schema_path:
+            return None, None  
 
-            for attr in attrs_to_remove:
-                del elem.attrib[attr]
+        try:
+            schema = SCHEMA_REGISTRY.get(schema_path)
 
-        self._remove_ignorable_elements(xml_copy)
+            xml_doc = self._prepare_for_xsd(load_xml_doc(), relative_path)
 
-        return lxml.etree.ElementTree(xml_copy)
+            if schema.validate(xml_doc):
+                return True, {}
+            else:
+                errors = {}
+                for error in schema.error_log:
+                    errors.setdefault(error.message, error.line or None)
+                return False, errors
+
+        except Exception as e:
+            return False, {str(e): None}
+
+    def _get_original_file_errors(self, xml_file):
+        if self.baseline is None:
+            return set()
+
+        return self.baseline.get(self._part_name(xml_file).as_posix())
+
+    def _prepare_for_xsd(self, xml_doc, relative_path):
+        """Strips template tags from text, mc:Ignorable from the root and, in
+        main content parts, non-OOXML attributes and elements. Edits the tree
+        in place in a single pass."""
+        main_content = bool(
+            relative_path.parts and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
+        )
+        foreign_names = {}
+
+        def is_foreign(name):
+            foreign = foreign_names.get(name)
+            if foreign is None:
+                foreign = foreign_names[name] = (
+                    name.startswith("{")
+                    and name[1 : name.index("}")] not in self.OOXML_NAMESPACES
+                )
+            return foreign
 
-    def _remove_ignorable_elements(self, root):
+        root = xml_doc.getroot()
         elements_to_remove = []
 
-        for elem in list(root):
-            if not hasattr(elem, "tag") or callable(elem.tag):
+        for elem in root.iter():
+            tag = elem.tag
+            if not isinstance(tag, str):
                 continue
 
-            tag_str = str(elem.tag)
-            if tag_str.startswith("{"):
-                ns = tag_str.split("}")[0][1:]
-                if ns not in self.OOXML_NAMESPACES:
-                    elements_to_remove.append(elem)
-                    continue
+            if not (tag.endswith("}t") or tag == "t"):
+                text = elem.text
+                if text and "{{" in text:
+                    elem.text = TEMPLATE_TAG_PATTERN.sub("", text)
+                tail = elem.tail
+                if tail and "{{" in tail:
+                    elem.tail = TEMPLATE_TAG_PATTERN.sub("", tail)
 
-            self._remove_ignorable_elements(elem)
+            if main_content:
+                if is_foreign(tag) and elem is not root:
+                    elements_to_remove.append(elem)
+                for name in elem.keys():
+                    if is_foreign(name):
+                        del elem.attrib[name]
 
         for elem in elements_to_remove:
-            root.remove(elem)
-
-    def _preprocess_for_mc_ignorable(self, xml_doc):
-        root = xml_doc.getroot()
+            elem.getparent().remove(elem)
 
         if f"{{{self.MC_NAMESPACE}}}Ignorable" in root.attrib:
             del root.attrib[f"{{{self.MC_NAMESPACE}}}Ignorable"]
 
         return xml_doc
 
-    def _validate_single_file_xsd(self, xml_file, base_path):
-        schema_path = self._get_schema_path(xml_file)
-        if not schema_path:
-            return None, None  
-
-        try:
-            with open(schema_path, "rb") as xsd_file:
-                parser = lxml.etree.XMLParser()
-                xsd_doc = lxml.etree.parse(
-                    xsd_file, parser=parser, base_url=str(schema_path)
-                )
-                schema = lxml.etree.XMLSchema(xsd_doc)
-
-            with open(xml_file, "r") as f:
-                xml_doc = lxml.etree.parse(f)
-
-            xml_doc, _ = self._remove_template_tags_from_text_nodes(xml_doc)
-            xml_doc = self._preprocess_for_mc_ignorable(xml_doc)
-
-            relative_path = xml_file.relative_to(base_path)
-            if (
-                relative_path.parts
-                and relative_path.parts[0] in self.MAIN_CONTENT_FOLDERS
-            ):
-                xml_doc = self._clean_ignorable_namespaces(xml_doc)
-
-            if schema.validate(xml_doc):
-                return True, set()
-            else:
-                errors = set()
-                for error in schema.error_log:
-                    errors.add(error.message)
-                return False, errors
 
-        except Exception as e:
-            return False, {str(e)}
-
-    def _get_original_file_errors(self, xml_file):
-        if self.original_file is None:
-            return set()
-
-        import tempfile
-        import zipfile
-
-        xml_file = Path(xml_file).resolve()
-        unpacked_dir = self.unpacked_dir.resolve()
-        relative_path = xml_file.relative_to(unpacked_dir)
+_worker_validator = None
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
 
-            with zipfile.ZipFile(self.original_file, "r") as zip_ref:
-                zip_ref.extractall(temp_path)
+def _init_xsd_worker(validator_class, unpacked_dir, original_file, streaming):
+    global _worker_validator
+    _worker_validator = validator_class(
+        unpacked_dir, original_file, streaming=streaming
+    )
 
-            original_xml_file = temp_path / relative_path
 
-            if not original_xml_file.exists():
-                return set()
+def _validate_file_against_xsd_in_worker(xml_file):
+    is_valid, new_errors = _worker_validator.validate_file_against_xsd(xml_file)
+    baseline = _worker_validator.baseline
+    return is_valid, new_errors, baseline.take_new_entries() if baseline else {}
 
-            is_valid, errors = self._validate_single_file_xsd(
-                original_xml_file, temp_path
-            )
-            return errors if errors else set()
-
-    def _remove_template_tags_from_text_nodes(self, xml_doc):
-        warnings = []
-        template_pattern = re.compile(r"\{\{[^}]*\}\}")
-
-        xml_string = lxml.etree.tostring(xml_doc, encoding="unicode")
-        xml_copy = lxml.etree.fromstring(xml_string)
-
-        def process_text_content(text, content_type):
-            if not text:
-                return text
-            matches = list(template_pattern.finditer(text))
-            if matches:
-                for match in matches:
-                    warnings.append(
-                        f"Found template tag in {content_type}: {match.group()}"
-                    )
-                return template_pattern.sub("", text)
-            return text
 
-        for elem in xml_copy.iter():
-            if not hasattr(elem, "tag") or callable(elem.tag):
-                continue
-            tag_str = str(elem.tag)
-            if tag_str.endswith("}t") or tag_str == "t":
-                continue
+def _xsd_error_summary(error):
+    message = error["message"]
+    if len(message) > 250:
+        message = message[:250] + "..."
+    if error["line"] is None:
+        return message
+    return f"Line {error['line']}: {message}"
 
-            elem.text = process_text_content(elem.text, "text content")
-            elem.tail = process_text_content(elem.tail, "tail content")
 
-        return lxml.etree.ElementTree(xml_copy), warnings
+def _normalize_part_name(base_dir, target):
+    return PurePosixPath(posixpath.normpath(posixpath.join(str(base_dir), target)))
 
 
 if __name__ == "__main__":
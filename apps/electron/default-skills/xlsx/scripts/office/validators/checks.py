@@ -0,0 +1,81 @@
+"""
+Selection of the checks a validation run performs: --checks, --skip-checks,
+named profiles and --fail-fast.
+"""
+
+# Every name passed to reported_check(), filled in as validator modules load.
+CHECK_NAMES = set()
+
+CHECK_PROFILES = {
+    # Structural sanity for an edit loop: everything except XSD validation,
+    # tracked-change content and redlining, which dominate a full run.
+    "quick": (
+        "xml",
+        "namespaces",
+        "unique_ids",
+        "id_constraints",
+        "uuid_ids",
+        "slide_layout_ids",
+        "workbook_names",
+        "file_references",
+        "relationship_ids",
+        "content_types",
+    ),
+}
+
+
+class CheckSelection:
+    """Decides which checks run, shared by all validators of one run.
+
+    include is None to run every check. With fail_fast, every check after the
+    first failing one is skipped, across validators. Skipped checks pass.
+    """
+
+    def __init__(self, include=None, exclude=(), fail_fast=False):
+        self.include = set(include) if include is not None else None
+        self.exclude = set(exclude)
+        self.fail_fast = fail_fast
+        self.failed = None
+        self.skipped = []
+
+    @classmethod
+    def from_names(cls, checks=None, skip_checks=None, fail_fast=False):
+        """Builds a selection from comma-separated check and profile names,
+        raising ValueError for names that are neither."""
+        include = _expand(checks) if checks else None
+        exclude = _expand(skip_checks) if skip_checks else ()
+        return cls(include, exclude, fail_fast)
+
+    def selects(self, name):
+        if name in self.exclude:
+            return False
+        return self.include is None or name in self.include
+
+    def should_run(self, name):
+        run = self.selects(name) and not (self.fail_fast and self.failed)
+        if not run and name not in self.skipped:
+            self.skipped.append(name)
+        return run
+
+    def record(self, name, passed):
+        if passed is False and self.failed is None:
+            self.failed = name
+
+
+def _expand(names):
+    expanded = set()
+    for name in (n.strip() for n in names.split(",")):
+        if not name:
+            continue
+        if name in CHECK_PROFILES:
+            expanded.update(CHECK_PROFILES[name])
+        elif name in CHECK_NAMES:
+            expanded.add(name)
+        else:
+            known = ", ".join(sorted(CHECK_NAMES | CHECK_PROFILES.keys()))
+            raise ValueError(f"Unknown check {name!r} (known: {known})")
+    return expanded
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
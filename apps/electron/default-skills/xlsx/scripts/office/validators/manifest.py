@@ -0,0 +1,230 @@
+"""
+Content-hash manifest for incremental validation of a package that is
+re-validated after small edits.
+"""
+
+import contextlib
+import functools
+import hashlib
+import io
+import json
+import os
+import tempfile
+from fnmatch import fnmatchcase
+from pathlib import Path, PurePosixPath
+
+from .baseline import code_fingerprint, default_cache_dir
+from .report import collect_errors, report_errors
+
+MANIFEST_VERSION = 3
+
+
+def incremental_check(*dependencies):
+    """Replays a package-wide check, its output and the errors it reported,
+    when none of the parts it reads changed.
+
+    dependencies are glob patterns over part names. The names of all parts in
+    the package are always part of the fingerprint, so adding or removing any
+    file re-runs every decorated check.
+    """
+
+    def decorate(method):
+        @functools.wraps(method)
+        def wrapper(self):
+            if self.manifest is None:
+                return method(self)
+            return self.manifest.run_check(
+                method.__name__, dependencies, functools.partial(method, self)
+            )
+
+        return wrapper
+
+    return decorate
+
+
+class ValidationManifest:
+    """Per-part content hashes plus the check results recorded against them.
+
+    Per-part results are stored under the fingerprint of the part(s) they were
+    computed from and are reused while that fingerprint is unchanged. Results
+    are only trusted for the same validator, package location, original file,
+    output mode, schemas and validator code, all of which make up the manifest
+    identity.
+
+    Only parts that a result or check is fingerprinted on are hashed. The
+    others (media, fonts, embeddings) are recorded by name only.
+    """
+
+    def __init__(self, package, identity, cache_dir=None):
+        self.package = package
+        self.cache_dir = Path(cache_dir) if cache_dir else default_cache_dir()
+        self.reused_results = 0
+        self.computed_results = 0
+        self.replayed_checks = 0
+        self._identity = [str(MANIFEST_VERSION), code_fingerprint(), *identity]
+        self._manifest_file = None
+        self._data = None
+        self._previous_parts = {}
+        self._all_parts = None
+        self._hashed = set()
+        self._dirty = False
+
+    def get_part_result(self, kind, part_names):
+        entry = self._load()["results"].get(kind, {}).get(self._key(part_names))
+        if entry is not None and entry[0] == self.fingerprint(part_names):
+            self.reused_results += 1
+            return True, entry[1]
+        return False, None
+
+    def put_part_result(self, kind, part_names, result):
+        self.computed_results += 1
+        results = self._load()["results"].setdefault(kind, {})
+        results[self._key(part_names)] = [self.fingerprint(part_names), result]
+        self._dirty = True
+
+    def part_result(self, kind, part_names, compute):
+        hit, result = self.get_part_result(kind, part_names)
+        if not hit:
+            result = compute()
+            self.put_part_result(kind, part_names, result)
+        return result
+
+    def run_check(self, name, dependencies, run):
+        checks = self._load()["checks"]
+        fingerprint = self.fingerprint(
+            [
+                part_name
+                for part_name in self.all_parts()
+                if any(fnmatchcase(part_name.as_posix(), p) for p in dependencies)
+            ],
+            include_listing=True,
+        )
+
+        cached = checks.get(name)
+        if cached is not None and cached["fingerprint"] == fingerprint:
+            self.replayed_checks += 1
+            print(cached["output"], end="")
+            report_errors(cached["errors"])
+            return cached["passed"]
+
+        output = io.StringIO()
+        try:
+            with collect_errors() as errors, contextlib.redirect_stdout(output):
+                passed = run()
+        finally:
+            print(output.getvalue(), end="")
+
+        checks[name] = {
+            "fingerprint": fingerprint,
+            "passed": passed,
+            "output": output.getvalue(),
+            "errors": errors,
+        }
+        self._dirty = True
+        return passed
+
+    def fingerprint(self, part_names, include_listing=False):
+        digest = hashlib.sha256()
+        if include_listing:
+            for part_name in self.all_parts():
+                digest.update(f"{part_name}\n".encode())
+            digest.update(b"\0")
+        for part_name in part_names:
+            self._hashed.add(PurePosixPath(part_name))
+            digest.update(
+                f"{part_name}\0{self.package.digest(part_name) or '-'}\0".encode()
+            )
+        return digest.hexdigest()
+
+    def all_parts(self):
+        if self._all_parts is None:
+            self._all_parts = sorted(self.package.source.rglob("*"))
+        return self._all_parts
+
+    def changed_parts(self):
+        self._load()
+        previous, current = self._previous_parts, self._current_parts()
+        # A part recorded without a hash on either side only counts as
+        # changed when it was added or removed.
+        return sorted(
+            name
+            for name in previous.keys() | current.keys()
+            if name not in previous
+            or name not in current
+            or (
+                None not in (previous[name], current[name])
+                and previous[name] != current[name]
+            )
+        )
+
+    def save(self):
+        data = self._load()
+        current = self._current_parts()
+        if not self._dirty and data["parts"] == current:
+            return
+
+        data["parts"] = current
+        for kind, results in data["results"].items():
+            data["results"][kind] = {
+                key: entry
+                for key, entry in results.items()
+                if all(name in current for name in key.split("\n"))
+            }
+
+        try:
+            self._manifest_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, temp_name = tempfile.mkstemp(
+                dir=self._manifest_file.parent, suffix=".tmp"
+            )
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(temp_name, self._manifest_file)
+            self._dirty = False
+        except OSError:
+            pass
+
+    def summary(self):
+        return (
+            f"Manifest: {len(self.changed_parts())} changed part(s), "
+            f"{self.reused_results} part result(s) reused, "
+            f"{self.computed_results} recomputed, "
+            f"{self.replayed_checks} check(s) replayed"
+        )
+
+    def _load(self):
+        if self._data is not None:
+            return self._data
+
+        self._data = {
+            "version": MANIFEST_VERSION,
+            "parts": {},
+            "checks": {},
+            "results": {},
+        }
+        identity = hashlib.sha256("\0".join(self._identity).encode()).hexdigest()
+        self._manifest_file = self.cache_dir / "manifest" / f"{identity}.json"
+        try:
+            data = json.loads(self._manifest_file.read_text(encoding="utf-8"))
+            if data.get("version") == MANIFEST_VERSION:
+                self._data = data
+        except (OSError, ValueError):
+            pass
+
+        self._previous_parts = dict(self._data["parts"])
+        return self._data
+
+    def _current_parts(self):
+        return {
+            part_name.as_posix(): (
+                self.package.digest(part_name) if part_name in self._hashed else None
+            )
+            for part_name in self.all_parts()
+        }
+
+    @staticmethod
+    def _key(part_names):
+        return "\n".join(str(part_name) for part_name in part_names)
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
@@ -2,19 +2,48 @@
 Validator for tracked changes in Word documents.
 """
 
-import subprocess
-import tempfile
+import itertools
+import os
 import zipfile
 from pathlib import Path
 
+import lxml.etree
+
+from .base import BaseSchemaValidator
+from .package import iterparse_clearing, open_package_source
+from .report import check_error, report_errors, reported_check
+from .textdiff import (
+    format_paragraph_changes,
+    paragraph_changes,
+    stream_paragraph_changes,
+)
+
 
 class RedliningValidator:
 
-    def __init__(self, unpacked_dir, original_docx, verbose=False, author="Claude"):
-        self.unpacked_dir = Path(unpacked_dir)
+    STREAMING_THRESHOLD = BaseSchemaValidator.STREAMING_THRESHOLD
+
+    def __init__(
+        self,
+        unpacked_dir,
+        original_docx,
+        verbose=False,
+        author="Claude",
+        report=None,
+        checks=None,
+        streaming=False,
+    ):
+        self.unpacked_dir = (
+            Path(unpacked_dir)
+            if isinstance(unpacked_dir, (str, os.PathLike))
+            else unpacked_dir
+        )
         self.original_docx = Path(original_docx)
         self.verbose = verbose
         self.author = author
+        self.streaming = streaming
+        self.report = report
+        self.checks = checks
         self.namespaces = {
             "w": "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
         }
@@ -22,88 +51,140 @@ class RedliningValidator:
     def repair(self) -> int:
         return 0
 
+    @reported_check("redlining")
     def validate(self):
-        modified_file = self.unpacked_dir / "word" / "document.xml"
-        if not modified_file.exists():
-            print(f"FAILED - Modified document.xml not found at {modified_file}")
-            return False
-
+        source = open_package_source(self.unpacked_dir)
         try:
-            import xml.etree.ElementTree as ET
-
-            tree = ET.parse(modified_file)
-            root = tree.getroot()
-
-            del_elements = root.findall(".//w:del", self.namespaces)
-            ins_elements = root.findall(".//w:ins", self.namespaces)
-
-            author_del_elements = [
-                elem
-                for elem in del_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == self.author
-            ]
-            author_ins_elements = [
-                elem
-                for elem in ins_elements
-                if elem.get(f"{{{self.namespaces['w']}}}author") == self.author
-            ]
-
-            if not author_del_elements and not author_ins_elements:
+            return self._validate(source)
+        finally:
+            source.close()
+
+    def _validate(self, source):
+        modified_part = "word/document.xml"
+        if not source.is_file(modified_part):
+            return self._fail(
+                f"Modified document.xml not found at {source.path / modified_part}",
+                modified_part,
+            )
+
+        streaming = self._streams(source, modified_part)
+        try:
+            if not self._has_author_changes(source, modified_part, streaming):
                 if self.verbose:
                     print(f"PASSED - No tracked changes by {self.author} found.")
                 return True
-
         except Exception:
             pass
 
-        with tempfile.TemporaryDirectory() as temp_dir:
-            temp_path = Path(temp_dir)
-
-            try:
-                with zipfile.ZipFile(self.original_docx, "r") as zip_ref:
-                    zip_ref.extractall(temp_path)
-            except Exception as e:
-                print(f"FAILED - Error unpacking original docx: {e}")
-                return False
-
-            original_file = temp_path / "word" / "document.xml"
-            if not original_file.exists():
-                print(
-                    f"FAILED - Original document.xml not found in {self.original_docx}"
+        try:
+            original_zip = zipfile.ZipFile(self.original_docx, "r")
+        except Exception as e:
+            return self._fail(f"Error unpacking original docx: {e}")
+
+        with original_zip:
+            if "word/document.xml" not in original_zip.namelist():
+                return self._fail(
+                    f"Original document.xml not found in {self.original_docx}"
                 )
-                return False
+
+            if streaming:
+                return self._compare_streamed(source, modified_part, original_zip)
 
             try:
                 import xml.etree.ElementTree as ET
 
-                modified_tree = ET.parse(modified_file)
-                modified_root = modified_tree.getroot()
-                original_tree = ET.parse(original_file)
-                original_root = original_tree.getroot()
+                with source.open(modified_part) as f:
+                    modified_root = ET.parse(f).getroot()
+                with original_zip.open("word/document.xml") as f:
+                    original_root = ET.parse(f).getroot()
             except ET.ParseError as e:
-                print(f"FAILED - Error parsing XML files: {e}")
-                return False
+                return self._fail(f"Error parsing XML files: {e}")
+
+        self._remove_author_tracked_changes(original_root)
+        self._remove_author_tracked_changes(modified_root)
+
+        modified_paragraphs = self._extract_paragraphs(modified_root)
+        original_paragraphs = self._extract_paragraphs(original_root)
 
-            self._remove_author_tracked_changes(original_root)
-            self._remove_author_tracked_changes(modified_root)
+        if modified_paragraphs != original_paragraphs:
+            return self._fail_with_diff(
+                modified_part,
+                paragraph_changes(original_paragraphs, modified_paragraphs),
+            )
 
-            modified_text = self._extract_text_content(modified_root)
-            original_text = self._extract_text_content(original_root)
+        if self.verbose:
+            print(f"PASSED - All changes by {self.author} are properly tracked")
+        return True
 
-            if modified_text != original_text:
-                error_message = self._generate_detailed_diff(
-                    original_text, modified_text
+    def _compare_streamed(self, source, modified_part, original_zip):
+        # Reads both documents one top-level paragraph at a time and keeps
+        # only the paragraphs around a difference, instead of both trees.
+        try:
+            with source.open(modified_part) as modified, original_zip.open(
+                "word/document.xml"
+            ) as original:
+                changes = stream_paragraph_changes(
+                    self._stream_paragraphs(original),
+                    self._stream_paragraphs(modified),
                 )
-                print(error_message)
-                return False
+                first_change = next(changes, None)
+                if first_change is not None:
+                    return self._fail_with_diff(
+                        modified_part, itertools.chain([first_change], changes)
+                    )
+        except lxml.etree.XMLSyntaxError as e:
+            return self._fail(f"Error parsing XML files: {e}")
+
+        if self.verbose:
+            print(f"PASSED - All changes by {self.author} are properly tracked")
+        return True
+
+    def _streams(self, source, part_name):
+        if not self.streaming:
+            return False
+        try:
+            return source.size(part_name) >= self.STREAMING_THRESHOLD
+        except (OSError, KeyError):
+            return False
 
-            if self.verbose:
-                print(f"PASSED - All changes by {self.author} are properly tracked")
-            return True
+    def _has_author_changes(self, source, part_name, streaming):
+        author_attr = f"{{{self.namespaces['w']}}}author"
+        change_tags = {
+            f"{{{self.namespaces['w']}}}del",
+            f"{{{self.namespaces['w']}}}ins",
+        }
 
-    def _generate_detailed_diff(self, original_text, modified_text):
+        if streaming:
+            with source.open(part_name) as f:
+                return any(
+                    elem.tag in change_tags and elem.get(author_attr) == self.author
+                    for _, elem in iterparse_clearing(f, ("start",))
+                )
+
+        import xml.etree.ElementTree as ET
+
+        with source.open(part_name) as f:
+            root = ET.parse(f).getroot()
+        return any(
+            elem.tag in change_tags and elem.get(author_attr) == self.author
+            for elem in root.iter()
+        )
+
+    def _fail(self, message, part=None):
+        print(f"FAILED - {message}")
+        report_errors([check_error(part, None, message)])
+        return False
+
+    def _fail_with_diff(self, part, changes):
+        self._fail(
+            f"Document text doesn't match after removing {self.author}'s tracked changes",
+            part,
+        )
+        print(self._generate_detailed_diff(changes))
+        return False
+
+    def _generate_detailed_diff(self, changes):
         error_parts = [
-            f"FAILED - Document text doesn't match after removing {self.author}'s tracked changes",
             "",
             "Likely causes:",
             "  1. Modified text inside another author's <w:ins> or <w:del> tags",
@@ -116,117 +197,46 @@ class RedliningValidator:
             "",
         ]
 
-        git_diff = self._get_git_word_diff(original_text, modified_text)
-        if git_diff:
-            error_parts.extend(["Differences:", "============", git_diff])
-        else:
-            error_parts.append("Unable to generate word diff (git not available)")
+        error_parts.extend(
+            [
+                "Differences (paragraphs count non-empty paragraphs from 0, "
+                "offsets are characters into the original paragraph):",
+                "============",
+                format_paragraph_changes(changes),
+            ]
+        )
 
         return "\n".join(error_parts)
 
-    def _get_git_word_diff(self, original_text, modified_text):
-        try:
-            with tempfile.TemporaryDirectory() as temp_dir:
-                temp_path = Path(temp_dir)
-
-                original_file = temp_path / "original.txt"
-                modified_file = temp_path / "modified.txt"
-
-                original_file.write_text(original_text, encoding="utf-8")
-                modified_file.write_text(modified_text, encoding="utf-8")
-
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "--word-diff-regex=.",  
-                        "-U0",  
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
-
-                if result.stdout.strip():
-                    lines = result.stdout.split("\n")
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-
-                    if content_lines:
-                        return "\n".join(content_lines)
-
-                result = subprocess.run(
-                    [
-                        "git",
-                        "diff",
-                        "--word-diff=plain",
-                        "-U0",  
-                        "--no-index",
-                        str(original_file),
-                        str(modified_file),
-                    ],
-                    capture_output=True,
-                    text=True,
-                )
-
-                if result.stdout.strip():
-                    lines = result.stdout.split("\n")
-                    content_lines = []
-                    in_content = False
-                    for line in lines:
-                        if line.startswith("@@"):
-                            in_content = True
-                            continue
-                        if in_content and line.strip():
-                            content_lines.append(line)
-                    return "\n".join(content_lines)
-
-        except (subprocess.CalledProcessError, FileNotFoundError, Exception):
-            pass
-
-        return None
-
-    def _remove_author_tracked_changes(self, root):
+    def _remove_author_tracked_changes(self, root, in_deletion=False):
         ins_tag = f"{{{self.namespaces['w']}}}ins"
         del_tag = f"{{{self.namespaces['w']}}}del"
         author_attr = f"{{{self.namespaces['w']}}}author"
-
-        for parent in root.iter():
-            to_remove = []
-            for child in parent:
-                if child.tag == ins_tag and child.get(author_attr) == self.author:
-                    to_remove.append(child)
-            for elem in to_remove:
-                parent.remove(elem)
-
         deltext_tag = f"{{{self.namespaces['w']}}}delText"
         t_tag = f"{{{self.namespaces['w']}}}t"
 
-        for parent in root.iter():
-            to_process = []
+        # Builds the new child list of each element in one pass: the author's
+        # insertions are dropped and their deletions are replaced by their
+        # (restored) content, instead of editing child lists while iterating.
+        def kept_children(parent, in_deletion):
+            kept = []
             for child in parent:
-                if child.tag == del_tag and child.get(author_attr) == self.author:
-                    to_process.append((child, list(parent).index(child)))
-
-            for del_elem, del_index in reversed(to_process):
-                for elem in del_elem.iter():
-                    if elem.tag == deltext_tag:
-                        elem.tag = t_tag
-
-                for child in reversed(list(del_elem)):
-                    parent.insert(del_index, child)
-                parent.remove(del_elem)
-
-    def _extract_text_content(self, root):
+                if child.get(author_attr) == self.author:
+                    if child.tag == ins_tag:
+                        continue
+                    if child.tag == del_tag:
+                        kept.extend(kept_children(child, True))
+                        continue
+                if in_deletion and child.tag == deltext_tag:
+                    child.tag = t_tag
+                if len(child):
+                    child[:] = kept_children(child, in_deletion)
+                kept.append(child)
+            return kept
+
+        root[:] = kept_children(root, in_deletion)
+
+    def _extract_paragraphs(self, root):
         p_tag = f"{{{self.namespaces['w']}}}p"
         t_tag = f"{{{self.namespaces['w']}}}t"
 
@@ -240,7 +250,51 @@ class RedliningValidator:
             if paragraph_text:
                 paragraphs.append(paragraph_text)
 
-        return "\n".join(paragraphs)
+        return paragraphs
+
+    def _stream_paragraphs(self, f):
+        """Yields what _extract_paragraphs returns for the whole document, one
+        top-level paragraph subtree in memory at a time."""
+        p_tag = f"{{{self.namespaces['w']}}}p"
+        t_tag = f"{{{self.namespaces['w']}}}t"
+        ins_tag = f"{{{self.namespaces['w']}}}ins"
+        del_tag = f"{{{self.namespaces['w']}}}del"
+        author_attr = f"{{{self.namespaces['w']}}}author"
+        # The author's <w:ins>/<w:del> elements open around the current one.
+        enclosing = {ins_tag: 0, del_tag: 0}
+        paragraph_depth = 0
+
+        for event, elem in lxml.etree.iterparse(
+            f, events=("start", "end"), tag=(p_tag, ins_tag, del_tag)
+        ):
+            step = 1 if event == "start" else -1
+            if elem.tag == p_tag:
+                paragraph_depth += step
+            elif elem.get(author_attr) == self.author:
+                enclosing[elem.tag] += step
+            if event == "start" or paragraph_depth:
+                continue
+
+            if elem.tag == p_tag and not enclosing[ins_tag]:
+                in_deletion = enclosing[del_tag] > 0
+                if in_deletion or any(
+                    change.get(author_attr) == self.author
+                    for change in elem.iter(ins_tag, del_tag)
+                ):
+                    self._remove_author_tracked_changes(elem, in_deletion)
+                for p_elem in elem.iter(p_tag):
+                    paragraph_text = "".join(
+                        t_elem.text for t_elem in p_elem.iter(t_tag) if t_elem.text
+                    )
+                    if paragraph_text:
+                        yield paragraph_text
+
+            # Everything before this element, here and in its ancestors
+            # (earlier table cells and rows), has been read already.
+            elem.clear()
+            for node in itertools.chain([elem], elem.iterancestors()):
+                while node.getprevious() is not None:
+                    del node.getparent()[0]
 
 
 if __name__ == "__main__":
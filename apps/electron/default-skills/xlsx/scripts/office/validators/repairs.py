@@ -0,0 +1,154 @@
+"""
+Single-pass engine for auto-repairs that edit a part's lxml tree in place.
+"""
+
+import io
+import random
+import re
+
+import lxml.etree
+
+from .rules import ALL_ELEMENTS, W16CID_NAMESPACE, XML_NAMESPACE
+
+# Repaired parts are written back, so entities are never expanded into them
+# and nothing is fetched over the network.
+REPAIR_PARSER = lxml.etree.XMLParser(resolve_entities=False, no_network=True)
+
+
+def parse_for_repair(data):
+    """Parses a part for repair, refusing entity declarations like
+    defusedxml does."""
+    tree = lxml.etree.parse(io.BytesIO(data), REPAIR_PARSER)
+    dtd = tree.docinfo.internalDTD
+    if dtd is not None and any(True for _ in dtd.iterentities()):
+        raise ValueError("Entity declarations are not allowed")
+    return tree
+
+
+def serialize_repaired(tree, data):
+    """Serializes a repaired tree behind the part's original XML declaration,
+    so everything but the repaired nodes (including line numbers) is kept."""
+    declaration = re.match(rb"<\?xml[^>]*\?>\s*", data)
+    if declaration is None:
+        return lxml.etree.tostring(tree, xml_declaration=True, encoding="UTF-8")
+    return declaration.group(0) + lxml.etree.tostring(
+        tree, xml_declaration=False, encoding=tree.docinfo.encoding or "UTF-8"
+    )
+
+
+class ElementRepair:
+    """An auto-repair that is fed elements by RepairEngine.
+
+    Repairs register interest through tags (Clark names, or ALL_ELEMENTS),
+    which accepts() can narrow per tag. repair() edits the element in place,
+    prints one line per fix and returns the number of fixes.
+    """
+
+    tags = ()
+
+    def __init__(self, validator):
+        self.validator = validator
+        self.part = None
+
+    def applies_to(self, relative_path):
+        return True
+
+    def accepts(self, tag):
+        return True
+
+    def begin_part(self, relative_path):
+        self.part = relative_path
+
+    def repair(self, elem):
+        return 0
+
+
+class RepairEngine:
+    """Runs every repair over a part's tree in one traversal."""
+
+    def __init__(self, repairs):
+        self.repairs = repairs
+
+    def repair_part(self, relative_path, tree):
+        repairs = [r for r in self.repairs if r.applies_to(relative_path)]
+        if not repairs:
+            return 0
+
+        by_tag = {}
+        for repair in repairs:
+            repair.begin_part(relative_path)
+            for tag in repair.tags:
+                by_tag.setdefault(tag, []).append(repair)
+        any_tag = by_tag.get(ALL_ELEMENTS, [])
+
+        handlers = {}
+        fixes = 0
+        for elem in tree.getroot().iter():
+            tag = elem.tag
+            if not isinstance(tag, str):
+                continue
+            selected = handlers.get(tag)
+            if selected is None:
+                selected = handlers[tag] = [
+                    r for r in any_tag if r.accepts(tag)
+                ] + by_tag.get(tag, [])
+            for repair in selected:
+                fixes += repair.repair(elem)
+        return fixes
+
+
+class WhitespacePreservationRepair(ElementRepair):
+
+    tags = (ALL_ELEMENTS,)
+
+    def accepts(self, tag):
+        return tag.endswith("}t")
+
+    def repair(self, elem):
+        text = elem.text
+        if elem.prefix is None or not text:
+            return 0
+        if not (text.startswith((" ", "\t")) or text.endswith((" ", "\t"))):
+            return 0
+        if elem.get(f"{{{XML_NAMESPACE}}}space") == "preserve":
+            return 0
+
+        elem.set(f"{{{XML_NAMESPACE}}}space", "preserve")
+        text_preview = repr(text[:30]) + "..." if len(text) > 30 else repr(text)
+        print(
+            f"  Repaired: {self.part.name}: Added xml:space='preserve' to "
+            f"{elem.prefix}:t: {text_preview}"
+        )
+        return 1
+
+
+class DurableIdRepair(ElementRepair):
+
+    tags = (ALL_ELEMENTS,)
+    attribute = f"{{{W16CID_NAMESPACE}}}durableId"
+
+    def repair(self, elem):
+        durable_id = elem.get(self.attribute)
+        if durable_id is None:
+            return 0
+
+        decimal = self.part.name == "numbering.xml"
+        try:
+            value = self.validator._parse_id_value(
+                durable_id, base=10 if decimal else 16
+            )
+            needs_repair = value >= 0x7FFFFFFF
+        except ValueError:
+            needs_repair = True
+        if not needs_repair:
+            return 0
+
+        value = random.randint(1, 0x7FFFFFFE)
+        new_id = str(value) if decimal else f"{value:08X}"
+        elem.set(self.attribute, new_id)
+        print(f"  Repaired: {self.part.name}: durableId {durable_id} → {new_id}")
+        return 1
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
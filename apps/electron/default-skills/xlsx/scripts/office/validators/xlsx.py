@@ -0,0 +1,389 @@
+"""
+Validator for Excel workbook XML files against XSD schemas.
+"""
+
+from pathlib import PurePosixPath
+
+from .base import BaseSchemaValidator, _normalize_part_name
+from .manifest import incremental_check
+from .report import check_error, print_errors, reported_check
+from .rules import (
+    SPREADSHEET_NAMESPACE,
+    CalcChainRule,
+    SharedStringIndexRule,
+    StyleIndexRule,
+    UniqueIdRule,
+)
+
+
+class XLSXSchemaValidator(BaseSchemaValidator):
+
+    ELEMENT_RELATIONSHIP_TYPES = {
+        "sheet": "sheet",
+        "drawing": "drawing",
+        "legacydrawing": "vmldrawing",
+        "legacydrawinghf": "vmldrawing",
+        "hyperlink": "hyperlink",
+        "tablepart": "table",
+        "pivotcache": "pivotcachedefinition",
+        "externalreference": "externallink",
+        "pagesetup": "printersettings",
+    }
+
+    ELEMENT_RULES = (UniqueIdRule, SharedStringIndexRule, StyleIndexRule, CalcChainRule)
+
+    DEFAULT_WORKBOOK = PurePosixPath("xl/workbook.xml")
+
+    def __init__(self, *args, **kwargs):
+        self._workbook_info = None
+        self._shared_strings = None
+        self._cell_styles = None
+        self._calc_chain = None
+        super().__init__(*args, **kwargs)
+
+    def validate(self):
+        if not self.validate_xml():
+            return False
+
+        all_valid = True
+        if not self.validate_namespaces():
+            all_valid = False
+
+        if not self.validate_unique_ids():
+            all_valid = False
+
+        if not self.validate_file_references():
+            all_valid = False
+
+        if not self.validate_content_types():
+            all_valid = False
+
+        if not self.validate_against_xsd():
+            all_valid = False
+
+        if not self.validate_all_relationship_ids():
+            all_valid = False
+
+        if not self.validate_workbook_names():
+            all_valid = False
+
+        if not self.validate_shared_string_indices():
+            all_valid = False
+
+        if not self.validate_style_indices():
+            all_valid = False
+
+        if not self.validate_calc_chain():
+            all_valid = False
+
+        return all_valid
+
+    @reported_check("workbook_names")
+    @incremental_check("*workbook.xml")
+    def validate_workbook_names(self):
+        workbook = self._workbook()["part"]
+        errors = []
+
+        try:
+            root = self.package.getroot(workbook)
+        except Exception as e:
+            errors.append(check_error(workbook, None, f"Error parsing: {e}"))
+            root = None
+
+        if root is not None:
+            sheets = root.findall(
+                f"{{{SPREADSHEET_NAMESPACE}}}sheets/{{{SPREADSHEET_NAMESPACE}}}sheet"
+            )
+            sheet_names = {}
+            for sheet in sheets:
+                name = sheet.get("name", "")
+                key = name.lower()
+                if key in sheet_names:
+                    errors.append(
+                        check_error(
+                            workbook,
+                            sheet.sourceline,
+                            f"Duplicate sheet name {name!r} (first occurrence at "
+                            f"line {sheet_names[key]}, sheet names are case-insensitive)",
+                        )
+                    )
+                else:
+                    sheet_names[key] = sheet.sourceline
+
+            defined_names = {}
+            for defined_name in root.iter(f"{{{SPREADSHEET_NAMESPACE}}}definedName"):
+                name = defined_name.get("name", "")
+                local_sheet_id = defined_name.get("localSheetId")
+                if local_sheet_id is not None and not (
+                    local_sheet_id.isdigit() and int(local_sheet_id) < len(sheets)
+                ):
+                    errors.append(
+                        check_error(
+                            workbook,
+                            defined_name.sourceline,
+                            f"Defined name {name!r} has localSheetId={local_sheet_id!r}, "
+                            f"but the workbook has {len(sheets)} sheet(s)",
+                        )
+                    )
+
+                key = (name.lower(), local_sheet_id)
+                if key in defined_names:
+                    scope = (
+                        f"sheet {local_sheet_id}"
+                        if local_sheet_id is not None
+                        else "the workbook"
+                    )
+                    errors.append(
+                        check_error(
+                            workbook,
+                            defined_name.sourceline,
+                            f"Duplicate defined name {name!r} in {scope} "
+                            f"(first occurrence at line {defined_names[key]})",
+                        )
+                    )
+                else:
+                    defined_names[key] = defined_name.sourceline
+
+        if errors:
+            print(f"FAILED - Found {len(errors)} workbook name errors:")
+            print_errors(errors)
+            return False
+        else:
+            if self.verbose:
+                print("PASSED - Sheet and defined names are unique")
+            return True
+
+    @reported_check("shared_string_indices")
+    def validate_shared_string_indices(self):
+        errors = self._element_rule_errors("shared_string_indices")
+
+        if errors:
+            print(f"FAILED - Found {len(errors)} shared string index errors:")
+            print_errors(errors)
+            return False
+        else:
+            if self.verbose:
+                print("PASSED - All shared string cells reference existing strings")
+            return True
+
+    @reported_check("style_indices")
+    def validate_style_indices(self):
+        errors = self._element_rule_errors("style_indices")
+
+        if errors:
+            print(f"FAILED - Found {len(errors)} style index errors:")
+            print_errors(errors)
+            return False
+        else:
+            if self.verbose:
+                print("PASSED - All style indices reference existing cell formats")
+            return True
+
+    @reported_check("calc_chain")
+    def validate_calc_chain(self):
+        calc_chain = self._workbook()["related"].get("calcChain")
+        errors = []
+        if calc_chain is not None and self.source.is_file(calc_chain):
+            errors.extend(
+                self._part_result(
+                    "calc_chain_sheets",
+                    self._workbook_dependencies("calcChain"),
+                    self._calc_chain_sheet_errors,
+                )
+            )
+        errors.extend(self._element_rule_errors("calc_chain"))
+
+        if errors:
+            print(f"FAILED - Found {len(errors)} calculation chain errors:")
+            print_errors(errors)
+            print(
+                "Excel repairs a stale calcChain.xml on open; remove it (and its "
+                "relationship and content type) after editing formulas."
+            )
+            return False
+        else:
+            if self.verbose:
+                print("PASSED - Calculation chain matches the sheet formulas")
+            return True
+
+    def _streams(self, xml_file):
+        if super()._streams(xml_file):
+            return True
+        # Worksheets and shared strings of large exports are streamed whether
+        # or not --streaming was given; they are never needed as trees.
+        if not (
+            self._is_worksheet(xml_file)
+            or xml_file == self._workbook()["related"].get("sharedStrings")
+        ):
+            return False
+        try:
+            return self.source.size(xml_file) >= self.STREAMING_THRESHOLD
+        except (OSError, KeyError):
+            return False
+
+    def _get_schema_path(self, xml_file):
+        if self._is_worksheet(xml_file):
+            return self.schemas_dir / self.SCHEMA_MAPPINGS["xl"]
+        return super()._get_schema_path(xml_file)
+
+    def _is_worksheet(self, relative_path):
+        return relative_path in self._workbook()["worksheets"]
+
+    def _workbook(self):
+        if self._workbook_info is None:
+            self._workbook_info = self._read_workbook()
+        return self._workbook_info
+
+    def _read_workbook(self):
+        workbook = self.DEFAULT_WORKBOOK
+        for _, rel_type, target in self._relationships(PurePosixPath("_rels/.rels")):
+            if rel_type == "officeDocument":
+                workbook = target
+                break
+
+        rels = workbook.parent / "_rels" / f"{workbook.name}.rels"
+        targets = {}
+        related = {}
+        for rid, rel_type, target in self._relationships(rels):
+            targets[rid] = (rel_type, target)
+            related.setdefault(rel_type, target)
+
+        sheets = {}
+        try:
+            root = self.package.getroot(workbook)
+            for sheet in root.iter(f"{{{SPREADSHEET_NAMESPACE}}}sheet"):
+                rid = sheet.get(f"{{{self.OFFICE_RELATIONSHIPS_NAMESPACE}}}id")
+                if rid in targets:
+                    sheets[sheet.get("sheetId")] = targets[rid]
+        except Exception:
+            pass
+
+        worksheets = {
+            target for rel_type, target in sheets.values() if rel_type == "worksheet"
+        }
+        if not worksheets and not targets:
+            # Without readable workbook relationships, fall back to where Excel
+            # puts worksheets.
+            worksheets = {
+                xml_file
+                for xml_file in self.xml_files
+                if xml_file.parent == PurePosixPath("xl/worksheets")
+                and xml_file.suffix == ".xml"
+            }
+
+        return {
+            "part": workbook,
+            "rels": rels,
+            "related": related,
+            "sheets": {
+                sheet_id: target
+                for sheet_id, (rel_type, target) in sheets.items()
+                if rel_type == "worksheet"
+            },
+            "worksheets": worksheets,
+        }
+
+    def _relationships(self, rels_file):
+        try:
+            rels_root = self.package.getroot(rels_file)
+        except Exception:
+            return []
+
+        base_dir = "" if rels_file.name == ".rels" else rels_file.parent.parent
+        relationships = []
+        for rel in rels_root.iter(
+            f"{{{self.PACKAGE_RELATIONSHIPS_NAMESPACE}}}Relationship"
+        ):
+            target = rel.get("Target")
+            if not target or rel.get("TargetMode") == "External":
+                continue
+            if target.startswith("/"):
+                target_path = _normalize_part_name("", target.lstrip("/"))
+            else:
+                target_path = _normalize_part_name(base_dir, target)
+            rel_type = rel.get("Type", "").split("/")[-1]
+            relationships.append((rel.get("Id"), rel_type, target_path))
+        return relationships
+
+    def _workbook_dependencies(self, rel_type):
+        info = self._workbook()
+        parts = [info["part"], info["rels"], info["related"].get(rel_type)]
+        return [
+            part_name
+            for part_name in parts
+            if part_name is not None and self.source.is_file(part_name)
+        ]
+
+    def _shared_string_count(self):
+        if self._shared_strings is None:
+            self._shared_strings = self._count_items(
+                "sharedStrings", f"{{{SPREADSHEET_NAMESPACE}}}si"
+            )
+        return self._shared_strings
+
+    def _cell_style_count(self):
+        if self._cell_styles is None:
+            self._cell_styles = self._count_items(
+                "styles",
+                f"{{{SPREADSHEET_NAMESPACE}}}xf",
+                parent=f"{{{SPREADSHEET_NAMESPACE}}}cellXfs",
+            )
+        return self._cell_styles
+
+    def _count_items(self, rel_type, tag, parent=None):
+        """Returns (part, count) for the workbook part of rel_type: count is 0
+        without such a part and None when it cannot be read, which disables
+        the checks that depend on it."""
+        part = self._workbook()["related"].get(rel_type)
+        if part is None:
+            return None, 0
+        try:
+            return part, sum(
+                1
+                for elem in self._iter_elements(part, tag)
+                if parent is None or elem.getparent().tag == parent
+            )
+        except Exception:
+            return part, None
+
+    def _calc_chain_cells(self):
+        """Maps each worksheet to the {cell reference: line} entries
+        calcChain.xml lists for it."""
+        if self._calc_chain is None:
+            part = self._workbook()["related"].get("calcChain")
+            cells = {}
+            unknown = []
+            if part is not None:
+                sheets = self._workbook()["sheets"]
+                sheet_id = None
+                try:
+                    for elem in self._iter_elements(
+                        part, f"{{{SPREADSHEET_NAMESPACE}}}c"
+                    ):
+                        # i is only written when it changes from the previous entry.
+                        sheet_id = elem.get("i", sheet_id)
+                        ref = elem.get("r")
+                        if sheet_id in sheets:
+                            cells.setdefault(sheets[sheet_id], {})[ref] = (
+                                elem.sourceline
+                            )
+                        else:
+                            unknown.append(
+                                check_error(
+                                    part,
+                                    elem.sourceline,
+                                    f"Entry for cell {ref} refers to unknown sheet id {sheet_id!r}",
+                                )
+                            )
+                except Exception as e:
+                    unknown.append(check_error(part, None, f"Error parsing: {e}"))
+            self._calc_chain = (part, cells, unknown)
+        return self._calc_chain[:2]
+
+    def _calc_chain_sheet_errors(self):
+        self._calc_chain_cells()
+        return self._calc_chain[2]
+
+
+if __name__ == "__main__":
+    raise RuntimeError("This module should not be run directly.")
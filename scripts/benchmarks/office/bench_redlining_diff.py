@@ -0,0 +1,104 @@
+"""Benchmark for the diff shown when redlining verification fails.
+
+Compares textdiff.format_paragraph_diff, which aligns paragraphs by hash and
+only diffs changed paragraphs character by character, against the git
+--word-diff invocation it replaced, on synthetic paragraph lists with a few
+scattered edits.
+
+Usage:
+    python scripts/benchmarks/office/bench_redlining_diff.py [--paragraphs N] [--edits N] [--repeat N]
+"""
+
+import argparse
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+# Benchmarks run against the docx skill's copy of scripts/office.
+OFFICE_DIR = (
+    Path(__file__).resolve().parents[3]
+    / "apps" / "electron" / "default-skills" / "docx" / "scripts" / "office"
+)
+sys.path.insert(0, str(OFFICE_DIR))
+
+from validators.textdiff import format_paragraph_diff
+
+WORDS = "lorem ipsum dolor sit amet consectetur adipiscing elit sed do".split()
+
+
+def git_word_diff(original, modified):
+    """The character-level git diff the validator used to shell out to."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        original_file = Path(temp_dir) / "original.txt"
+        modified_file = Path(temp_dir) / "modified.txt"
+        original_file.write_text("\n".join(original), encoding="utf-8")
+        modified_file.write_text("\n".join(modified), encoding="utf-8")
+        return subprocess.run(
+            [
+                "git",
+                "diff",
+                "--word-diff=plain",
+                "--word-diff-regex=.",
+                "-U0",
+                "--no-index",
+                str(original_file),
+                str(modified_file),
+            ],
+            capture_output=True,
+            text=True,
+        ).stdout
+
+
+def build_paragraphs(paragraphs, edits):
+    rng = random.Random(0)
+    original = [
+        " ".join(rng.choice(WORDS) for _ in range(60)) for _ in range(paragraphs)
+    ]
+    modified = list(original)
+    for index in rng.sample(range(paragraphs), edits):
+        modified[index] = modified[index].replace("dolor", "DOLOR", 1)
+    # One deleted and one inserted paragraph shift every later index.
+    del modified[paragraphs // 4]
+    modified.insert(paragraphs // 2, "an inserted paragraph")
+    return original, modified
+
+
+def best_of(repeat, func, *args):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=20_000)
+    parser.add_argument("--edits", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    original, modified = build_paragraphs(args.paragraphs, args.edits)
+    print(
+        f"{args.paragraphs} paragraphs, {args.edits} edited, "
+        f"{sum(map(len, original)) / 1e6:.1f} MB of text"
+    )
+
+    in_process = best_of(args.repeat, format_paragraph_diff, original, modified)
+    print(f"  in-process diff: {in_process:.3f}s")
+    try:
+        git = best_of(args.repeat, git_word_diff, original, modified)
+    except FileNotFoundError:
+        print("  git word diff:   (git not available)")
+        return
+    print(f"  git word diff:   {git:.3f}s")
+    print(f"  speedup:         {git / in_process:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
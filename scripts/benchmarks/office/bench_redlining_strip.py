@@ -0,0 +1,134 @@
+"""Benchmark for removing one author's tracked changes before the redlining
+comparison.
+
+Compares RedliningValidator._remove_author_tracked_changes, which rebuilds each
+child list once, against the previous index-and-reinsert implementation on a
+synthetic document.xml with many tracked changes per paragraph.
+
+Usage:
+    python scripts/benchmarks/office/bench_redlining_strip.py [--changes N] [--per-paragraph N] [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Benchmarks run against the docx skill's copy of scripts/office.
+OFFICE_DIR = (
+    Path(__file__).resolve().parents[3]
+    / "apps" / "electron" / "default-skills" / "docx" / "scripts" / "office"
+)
+sys.path.insert(0, str(OFFICE_DIR))
+
+from validators import RedliningValidator
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+def index_and_reinsert(validator, root):
+    """The implementation _remove_author_tracked_changes replaced, kept here as
+    the reference."""
+    ins_tag = f"{{{W}}}ins"
+    del_tag = f"{{{W}}}del"
+    author_attr = f"{{{W}}}author"
+
+    for parent in root.iter():
+        to_remove = []
+        for child in parent:
+            if child.tag == ins_tag and child.get(author_attr) == validator.author:
+                to_remove.append(child)
+        for elem in to_remove:
+            parent.remove(elem)
+
+    deltext_tag = f"{{{W}}}delText"
+    t_tag = f"{{{W}}}t"
+
+    for parent in root.iter():
+        to_process = []
+        for child in parent:
+            if child.tag == del_tag and child.get(author_attr) == validator.author:
+                to_process.append((child, list(parent).index(child)))
+
+        for del_elem, del_index in reversed(to_process):
+            for elem in del_elem.iter():
+                if elem.tag == deltext_tag:
+                    elem.tag = t_tag
+
+            for child in reversed(list(del_elem)):
+                parent.insert(del_index, child)
+            parent.remove(del_elem)
+
+
+def single_pass(validator, root):
+    validator._remove_author_tracked_changes(root)
+
+
+def build_document(changes, per_paragraph):
+    # Cycles through the author's insertions and deletions, another author's
+    # changes, and the author rejecting another author's insertion.
+    patterns = [
+        '<w:ins w:id="{n}" w:author="Claude"><w:r><w:t>added {n} </w:t></w:r></w:ins>',
+        '<w:del w:id="{n}" w:author="Claude"><w:r><w:delText>removed {n} </w:delText></w:r></w:del>',
+        '<w:ins w:id="{n}" w:author="Other"><w:r><w:t>theirs {n} </w:t></w:r></w:ins>',
+        '<w:del w:id="{n}" w:author="Other"><w:r><w:delText>gone {n} </w:delText></w:r></w:del>',
+        '<w:ins w:id="{n}" w:author="Other"><w:del w:id="{n}" w:author="Claude">'
+        "<w:r><w:delText>rejected {n} </w:delText></w:r></w:del></w:ins>",
+    ]
+    paragraphs = []
+    for start in range(0, changes, per_paragraph):
+        runs = "".join(
+            f"<w:r><w:t>text {n} </w:t></w:r>"
+            + patterns[n % len(patterns)].format(n=n)
+            for n in range(start, min(start + per_paragraph, changes))
+        )
+        paragraphs.append(f"<w:p>{runs}</w:p>")
+    return (
+        f'<w:document xmlns:w="{W}"><w:body>{"".join(paragraphs)}</w:body></w:document>'
+    ).encode("utf-8")
+
+
+def time_strip(strip, validator, document, repeat):
+    best = None
+    result = None
+    for _ in range(repeat):
+        root = ET.fromstring(document)
+        start = time.perf_counter()
+        strip(validator, root)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        result = ET.tostring(root)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--changes", type=int, default=50_000)
+    parser.add_argument(
+        "--per-paragraph",
+        type=int,
+        default=500,
+        help="Tracked changes per paragraph (default: 500)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    validator = RedliningValidator(".", "original.docx", author="Claude")
+    document = build_document(args.changes, args.per_paragraph)
+
+    print(
+        f"{args.changes} tracked changes, {args.per_paragraph} per paragraph, "
+        f"{len(document) / 1e6:.1f} MB document.xml"
+    )
+    before, before_xml = time_strip(index_and_reinsert, validator, document, args.repeat)
+    after, after_xml = time_strip(single_pass, validator, document, args.repeat)
+
+    assert before_xml == after_xml, "implementations disagree"
+    print(f"  index and reinsert: {before:.3f}s")
+    print(f"  single pass:        {after:.3f}s")
+    print(f"  speedup:            {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
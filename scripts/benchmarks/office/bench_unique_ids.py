@@ -0,0 +1,173 @@
+"""Micro-benchmark for the unique-ID check on a synthetic bookmark-heavy document.
+
+Compares UniqueIdRule against the previous ancestor-scan implementation on the
+same parsed tree, so only the walk itself is timed.
+
+Usage:
+    python scripts/benchmarks/office/bench_unique_ids.py [--bookmarks N] [--depth N] [--repeat N]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from functools import partial
+from pathlib import Path
+
+import lxml.etree
+
+# Benchmarks run against the docx skill's copy of scripts/office.
+OFFICE_DIR = (
+    Path(__file__).resolve().parents[3]
+    / "apps" / "electron" / "default-skills" / "docx" / "scripts" / "office"
+)
+sys.path.insert(0, str(OFFICE_DIR))
+
+from validators import DOCXSchemaValidator
+from validators.rules import MC_NAMESPACE, RuleEngine, UniqueIdRule
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+
+
+class AncestorScanUniqueIdRule(UniqueIdRule):
+    """The implementation UniqueIdRule replaced, kept here as the reference."""
+
+    end_tags = (f"{{{MC_NAMESPACE}}}AlternateContent",)
+
+    def accepts_start(self, tag):
+        return True
+
+    def accepts_end(self, tag):
+        return True
+
+    def start(self, elem):
+        if elem.tag == f"{{{MC_NAMESPACE}}}AlternateContent":
+            self.mc_depth += 1
+            return
+        if self.mc_depth:
+            return
+
+        tag = elem.tag.split("}")[-1].lower() if "}" in elem.tag else elem.tag.lower()
+        if tag not in self.requirements:
+            return
+
+        in_excluded_container = any(
+            ancestor.tag.split("}")[-1].lower() in self.excluded_containers
+            for ancestor in elem.iterancestors()
+        )
+        if in_excluded_container:
+            return
+
+        attr_name, scope = self.requirements[tag]
+
+        id_value = None
+        for attr, value in elem.attrib.items():
+            attr_local = attr.split("}")[-1].lower() if "}" in attr else attr.lower()
+            if attr_local == attr_name:
+                id_value = value
+                break
+
+        if id_value is None:
+            return
+
+        if scope == "global":
+            self._record(["global", id_value, elem.sourceline, tag])
+        elif scope == "file":
+            ids = self.file_ids.setdefault((tag, attr_name), {})
+            if id_value in ids:
+                self._record(
+                    [
+                        "error",
+                        f"  {self.part}: "
+                        f"Line {elem.sourceline}: Duplicate {attr_name}='{id_value}' in <{tag}> "
+                        f"(first occurrence at line {ids[id_value]})",
+                    ]
+                )
+            else:
+                ids[id_value] = elem.sourceline
+
+    def end(self, elem):
+        self.mc_depth -= 1
+
+
+def build_document(bookmarks, depth):
+    open_tags = "".join("<w:sdt><w:sdtContent>" for _ in range(depth))
+    close_tags = "".join("</w:sdtContent></w:sdt>" for _ in range(depth))
+    # Every 1000th bookmark reuses id 0 so both implementations report errors.
+    paragraphs = "".join(
+        f'<w:p><w:bookmarkStart w:id="{n % 1000 and n}" w:name="b{n}"/>'
+        f"<w:r><w:t>Paragraph {n}</w:t></w:r>"
+        f'<w:bookmarkEnd w:id="{n % 1000 and n}"/></w:p>'
+        for n in range(bookmarks)
+    )
+    return (
+        f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        f'<w:document xmlns:w="{W}"><w:body>'
+        f"{open_tags}{paragraphs}{close_tags}"
+        f"</w:body></w:document>"
+    ).encode("utf-8")
+
+
+def time_rule(validator, rule_class, part_name, repeat):
+    best = None
+    errors = None
+    for _ in range(repeat):
+        rule = rule_class(validator)
+        engine = RuleEngine([rule])
+        start = time.perf_counter()
+        engine.run(
+            [
+                (
+                    part_name,
+                    partial(
+                        lxml.etree.iterwalk,
+                        validator.package.getroot(part_name),
+                        events=("start", "end"),
+                    ),
+                )
+            ]
+        )
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        errors = rule.errors
+    return best, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--bookmarks", type=int, default=100_000)
+    parser.add_argument(
+        "--depth",
+        type=int,
+        default=8,
+        help="Content-control nesting around the body (default: 8)",
+    )
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        document = Path(temp_dir) / "word" / "document.xml"
+        document.parent.mkdir()
+        document.write_bytes(build_document(args.bookmarks, args.depth))
+
+        validator = DOCXSchemaValidator(temp_dir)
+        part_name = validator._part_name(document)
+        validator.package.parse(part_name)
+
+        print(
+            f"{args.bookmarks} bookmarks, nesting depth {args.depth}, "
+            f"{document.stat().st_size / 1e6:.1f} MB document.xml"
+        )
+        before, before_errors = time_rule(
+            validator, AncestorScanUniqueIdRule, part_name, args.repeat
+        )
+        after, after_errors = time_rule(validator, UniqueIdRule, part_name, args.repeat)
+
+    assert before_errors == after_errors, "implementations disagree"
+    print(f"  ancestor scan:  {before:.3f}s")
+    print(f"  single descent: {after:.3f}s")
+    print(f"  speedup:        {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
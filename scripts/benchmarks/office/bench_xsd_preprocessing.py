@@ -0,0 +1,179 @@
+"""Benchmark for the preprocessing done before XSD validation of a part.
+
+Compares BaseSchemaValidator._prepare_for_xsd, which edits one copy of the
+cached tree in place, against the previous serialize-and-reparse pipeline on a
+synthetic word/document.xml. Reports the best time and the growth in peak RSS
+of a forked process for one validated part.
+
+Usage:
+    python scripts/benchmarks/office/bench_xsd_preprocessing.py [--paragraphs N] [--repeat N]
+"""
+
+import argparse
+import copy
+import multiprocessing
+import re
+import resource
+import sys
+import time
+from pathlib import Path, PurePosixPath
+
+import lxml.etree
+
+# Benchmarks run against the docx skill's copy of scripts/office.
+OFFICE_DIR = (
+    Path(__file__).resolve().parents[3]
+    / "apps" / "electron" / "default-skills" / "docx" / "scripts" / "office"
+)
+sys.path.insert(0, str(OFFICE_DIR))
+
+from validators import DOCXSchemaValidator
+
+W = "http://schemas.openxmlformats.org/wordprocessingml/2006/main"
+W14 = "http://schemas.microsoft.com/office/word/2010/wordml"
+MC = "http://schemas.openxmlformats.org/markup-compatibility/2006"
+
+
+def reserialize_pipeline(validator, xml_doc, relative_path):
+    """The preprocessing _prepare_for_xsd replaced, kept here as the reference."""
+    template_pattern = re.compile(r"\{\{[^}]*\}\}")
+
+    xml_copy = lxml.etree.fromstring(lxml.etree.tostring(xml_doc, encoding="unicode"))
+    for elem in xml_copy.iter():
+        if not hasattr(elem, "tag") or callable(elem.tag):
+            continue
+        tag_str = str(elem.tag)
+        if tag_str.endswith("}t") or tag_str == "t":
+            continue
+        if elem.text:
+            elem.text = template_pattern.sub("", elem.text)
+        if elem.tail:
+            elem.tail = template_pattern.sub("", elem.tail)
+    xml_doc = lxml.etree.ElementTree(xml_copy)
+
+    root = xml_doc.getroot()
+    if f"{{{MC}}}Ignorable" in root.attrib:
+        del root.attrib[f"{{{MC}}}Ignorable"]
+
+    if relative_path.parts[0] not in validator.MAIN_CONTENT_FOLDERS:
+        return xml_doc
+
+    xml_copy = lxml.etree.fromstring(lxml.etree.tostring(xml_doc, encoding="unicode"))
+    for elem in xml_copy.iter():
+        for attr in [a for a in elem.attrib if "{" in a]:
+            if attr.split("}")[0][1:] not in validator.OOXML_NAMESPACES:
+                del elem.attrib[attr]
+
+    def remove_ignorable_elements(parent):
+        to_remove = []
+        for elem in list(parent):
+            if callable(elem.tag):
+                continue
+            if elem.tag.startswith("{"):
+                if elem.tag.split("}")[0][1:] not in validator.OOXML_NAMESPACES:
+                    to_remove.append(elem)
+                    continue
+            remove_ignorable_elements(elem)
+        for elem in to_remove:
+            parent.remove(elem)
+
+    remove_ignorable_elements(xml_copy)
+    return lxml.etree.ElementTree(xml_copy)
+
+
+def in_place_pipeline(validator, xml_doc, relative_path):
+    return validator._prepare_for_xsd(copy.deepcopy(xml_doc), relative_path)
+
+
+def build_document(paragraphs):
+    body = "".join(
+        f'<w:p w14:paraId="{n:08X}" w14:textId="77777777" w:rsidR="00AB12CD">'
+        f'<w:pPr><w:pStyle w:val="Normal"/></w:pPr>'
+        f'<w:r><w:rPr><w:b/></w:rPr><w:t xml:space="preserve">Paragraph {n} {{{{kept}}}} </w:t></w:r>'
+        + (f"<w14:checkbox><w14:checked/></w14:checkbox>tail {{{{field{n}}}}}" if n % 10 == 0 else "")
+        + "</w:p>"
+        for n in range(paragraphs)
+    )
+    return (
+        f'<w:document xmlns:w="{W}" xmlns:w14="{W14}" xmlns:mc="{MC}" '
+        f'mc:Ignorable="w14"><w:body>{body}</w:body></w:document>'
+    ).encode("utf-8")
+
+
+def _peak_rss():
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _load(paragraphs):
+    return lxml.etree.ElementTree(lxml.etree.fromstring(build_document(paragraphs)))
+
+
+def _measure_peak_in_child(pipeline, paragraphs, relative_path, conn):
+    xml_doc = _load(paragraphs)
+    validator = DOCXSchemaValidator.__new__(DOCXSchemaValidator)
+    baseline = _peak_rss()
+    result = pipeline(validator, xml_doc, relative_path)
+    conn.send((_peak_rss() - baseline, lxml.etree.tostring(result)))
+    conn.close()
+
+
+def measure_peak(pipeline, paragraphs, relative_path):
+    # Each pipeline runs in a fresh process so it cannot reuse memory another
+    # run has already grown the heap by.
+    context = multiprocessing.get_context("fork")
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(
+        target=_measure_peak_in_child,
+        args=(pipeline, paragraphs, relative_path, sender),
+    )
+    process.start()
+    peak, serialized = receiver.recv()
+    process.join()
+    return peak, serialized
+
+
+def measure_time(pipeline, validator, xml_doc, relative_path, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = pipeline(validator, xml_doc, relative_path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+        del result
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--paragraphs", type=int, default=100_000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    relative_path = PurePosixPath("word/document.xml")
+    before_peak, before_xml = measure_peak(
+        reserialize_pipeline, args.paragraphs, relative_path
+    )
+    after_peak, after_xml = measure_peak(
+        in_place_pipeline, args.paragraphs, relative_path
+    )
+    assert before_xml == after_xml, "pipelines disagree"
+
+    xml_doc = _load(args.paragraphs)
+    validator = DOCXSchemaValidator.__new__(DOCXSchemaValidator)
+    size = len(lxml.etree.tostring(xml_doc))
+    print(f"{args.paragraphs} paragraphs, {size / 1e6:.1f} MB document.xml")
+    before = measure_time(
+        reserialize_pipeline, validator, xml_doc, relative_path, args.repeat
+    )
+    after = measure_time(
+        in_place_pipeline, validator, xml_doc, relative_path, args.repeat
+    )
+
+    print(f"  serialize + reparse: {before:.3f}s, peak RSS +{before_peak / 1e6:.1f} MB")
+    print(f"  in place:            {after:.3f}s, peak RSS +{after_peak / 1e6:.1f} MB")
+    print(f"  speedup:             {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()